@@ -1,34 +1,172 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
 import pandas as pd
+from sqlalchemy import func
 
+from models import db, Categoria, MetaFormaPagamento, ResumoMensal
 
-METAS = {
-    'cartao_credito': 1500.00,
-    'alimentacao': 800.00,
-    'transporte': 300.00
-}
-
-def verificar_meta_cartao(df_lancamentos):
-    """Verifica se os gastos no cartão ultrapassaram a meta"""
-    gastos_cartao = df_lancamentos[df_lancamentos['forma_pagamento'] == 'Cartão']['valor'].sum()
-    if gastos_cartao > METAS['cartao_credito']:
-        excesso = gastos_cartao - METAS['cartao_credito']
-        return f"⚠️ Você ultrapassou sua meta no cartão em R$ {excesso:.2f}."
-    return "✅ Gastos no cartão estão dentro da meta."
-
-
-def analisar_gastos_por_categoria(df_lancamentos):
-    """Compara gastos por categoria com metas"""
-    alertas = []
-    categorias = df_lancamentos['tipo'].unique()
-    for categoria in categorias:
-        total = df_lancamentos[df_lancamentos['tipo'] == categoria]['valor'].sum()
-        meta = METAS.get(categoria.lower())
-        if meta and total > meta:
-            excesso = total - meta
-            alertas.append(f"📉 Categoria '{categoria}' ultrapassou a meta em R$ {excesso:.2f}.")
-    return alertas
+TOLERANCIA = 0.005
+COLUNAS = ["competencia", "categoria", "forma_pagamento", "total"]
+
+
+class RegraAlerta(NamedTuple):
+    """
+    Limite mensal sobre as despesas agrupadas por `dimensao` ("categoria", "forma_pagamento" ou None
+    para o total do mês). `chave` restringe a regra a um valor da dimensão. Sem `limite`, vale a meta
+    cadastrada: meta_mensal de cada categoria ou forma de pagamento ou, no total do mês, a soma das
+    metas das categorias.
+    """
+    nome: str
+    dimensao: Optional[str]
+    mensagem: str
+    chave: Optional[str] = None
+    limite: Optional[float] = None
+    dentro_da_meta: Optional[str] = None
+
+
+REGRAS = [
+    RegraAlerta("cartao", "forma_pagamento", "⚠️ Você ultrapassou sua meta no cartão em R$ {excesso:.2f}.",
+                chave="Cartão", dentro_da_meta="✅ Gastos no cartão estão dentro da meta."),
+    RegraAlerta("categoria", "categoria", "📉 Categoria '{chave}' ultrapassou a meta em R$ {excesso:.2f}."),
+    RegraAlerta("total", None, "💸 As despesas do mês passaram da soma das metas em R$ {excesso:.2f}."),
+]
+
+
+# ============================
+# 🔹 Dados: uma agregação e as metas do banco
+# ============================
+def gastos_agregados(competencia=None, inicio=None, fim=None):
+    """
+    Despesas por (competência, categoria, forma de pagamento) numa única consulta agrupada ao resumo
+    mensal. Sem `competencia`, todos os meses em [inicio, fim] (limites opcionais, "AAAA-MM").
+    """
+    q = db.session.query(
+        ResumoMensal.competencia, ResumoMensal.categoria, ResumoMensal.forma_pagamento,
+        func.sum(ResumoMensal.total)
+    ).filter(ResumoMensal.tipo == "Despesa")
+    if competencia:
+        q = q.filter(ResumoMensal.competencia == competencia)
+    if inicio:
+        q = q.filter(ResumoMensal.competencia >= inicio)
+    if fim:
+        q = q.filter(ResumoMensal.competencia <= fim)
+    agrupado = q.group_by(ResumoMensal.competencia, ResumoMensal.categoria, ResumoMensal.forma_pagamento).all()
+    return pd.DataFrame(agrupado, columns=COLUNAS).astype({"total": float})
+
+
+def limites_cadastrados():
+    """
+    Metas mensais cadastradas, por dimensão das regras: {"categoria": {categoria: limite}} para as
+    categorias de despesa com meta e {"forma_pagamento": {forma: limite}} da tabela meta_forma_pagamento.
+    """
+    return {
+        "categoria": {
+            nome: float(meta) for nome, meta in db.session.query(Categoria.nome, Categoria.meta_mensal)
+            .filter(Categoria.tipo == "Despesa", Categoria.meta_mensal > 0)
+        },
+        "forma_pagamento": {
+            forma: float(meta) for forma, meta in db.session.query(
+                MetaFormaPagamento.forma_pagamento, MetaFormaPagamento.meta_mensal
+            ).filter(MetaFormaPagamento.meta_mensal > 0)
+        },
+    }
+
+
+# ============================
+# 🔹 Avaliação das regras
+# ============================
+def avaliar_regras(agregado, limites, regras=REGRAS):
+    """
+    Aplica todas as regras aos totais de `gastos_agregados`, de qualquer quantidade de meses de uma
+    vez: cada regra soma o agregado por (mês, valor da dimensão) com um bincount e compara com o
+    limite de cada valor (`limites`: metas por dimensão, como em `limites_cadastrados`). Devolve um
+    DataFrame com uma linha por estouro: competencia, regra, chave, total, limite e excesso (por mês,
+    na ordem das regras e do maior excesso).
+    """
+    meses, competencias = pd.factorize(agregado["competencia"], sort=True)
+    totais = agregado["total"].to_numpy(dtype=float)
+    dimensoes = {}
+    estouros = []
+    for ordem, regra in enumerate(regras):
+        if regra.dimensao is None:
+            codigos, chaves = np.zeros(len(agregado), dtype=np.intp), np.array([""], dtype=object)
+        else:
+            if regra.dimensao not in dimensoes:
+                codigos, chaves = pd.factorize(agregado[regra.dimensao])
+                dimensoes[regra.dimensao] = codigos, np.asarray(chaves, dtype=object)
+            codigos, chaves = dimensoes[regra.dimensao]
 
+        if regra.limite is not None:
+            limite = np.full(len(chaves), float(regra.limite))
+        elif regra.dimensao is None:
+            limite = np.array([float(sum(limites.get("categoria", {}).values()))])
+        else:
+            metas = limites.get(regra.dimensao, {})
+            limite = np.array([metas.get(chave, 0.0) for chave in chaves], dtype=float)
+        if regra.chave is not None:
+            limite = np.where(chaves == regra.chave, limite, 0.0)
 
+        validos = codigos >= 0
+        somas = np.bincount(meses[validos] * len(chaves) + codigos[validos], weights=totais[validos],
+                            minlength=len(competencias) * len(chaves)).reshape(len(competencias), len(chaves))
+        mes, chave = np.nonzero((limite > 0) & (somas - limite >= TOLERANCIA))
+        estouros.append((mes, np.full(len(mes), ordem), chaves[chave], somas[mes, chave], limite[chave]))
+
+    mes, ordem, chave, total, limite = (np.concatenate(coluna) for coluna in zip(*estouros))
+    posicoes = np.lexsort((limite - total, ordem, mes))
+    nomes = np.array([regra.nome for regra in regras], dtype=object)
+    return pd.DataFrame({
+        "competencia": np.asarray(competencias, dtype=object)[mes[posicoes]],
+        "regra": nomes[ordem[posicoes]],
+        "chave": chave[posicoes],
+        "total": total[posicoes],
+        "limite": limite[posicoes],
+        "excesso": (total - limite)[posicoes],
+    })
+
+
+def mensagens(estouros, regras=REGRAS):
+    """Textos dos alertas de um mês, na ordem das regras (com a mensagem de "dentro da meta", se houver)."""
+    textos = []
+    for regra in regras:
+        linhas = estouros[estouros["regra"] == regra.nome]
+        if linhas.empty and regra.dentro_da_meta:
+            textos.append(regra.dentro_da_meta)
+        textos.extend(regra.mensagem.format(chave=chave, excesso=excesso)
+                      for chave, excesso in zip(linhas["chave"], linhas["excesso"]))
+    return textos
+
+
+def alertas_do_mes(competencia):
+    """Estouros de meta da competência "AAAA-MM"."""
+    return avaliar_regras(gastos_agregados(competencia), limites_cadastrados())
+
+
+def historico_de_alertas(inicio=None, fim=None):
+    """
+    Backtest: avalia as regras em todos os meses do histórico (ou em [inicio, fim]) de uma vez, com as
+    metas atuais (meta_mensal não guarda versões). Devolve (meses avaliados, estouros).
+    """
+    agregado = gastos_agregados(inicio=inicio, fim=fim)
+    return sorted(agregado["competencia"].unique()), avaliar_regras(agregado, limites_cadastrados())
+
+
+def resumo_do_historico(estouros):
+    """Por regra e chave: meses com estouro, excesso somado e maior excesso."""
+    if estouros.empty:
+        return []
+    resumo = estouros.groupby(["regra", "chave"], sort=False)["excesso"].agg(["count", "sum", "max"]).reset_index()
+    return [
+        {"regra": regra, "chave": chave, "meses": int(meses), "excesso_total": round(float(soma), 2),
+         "maior_excesso": round(float(maior), 2)}
+        for regra, chave, meses, soma, maior in resumo.itertuples(index=False)
+    ]
+
+
+# ============================
+# 🔹 Sugestões e alertas do painel
+# ============================
 def sugestao_investimento(saldo_disponivel):
     """Sugere investimentos com base no saldo"""
     if saldo_disponivel >= 1000:
@@ -39,11 +177,8 @@ def sugestao_investimento(saldo_disponivel):
         return "🔒 Priorize montar uma reserva de emergência antes de investir."
 
 
-def gerar_alertas(df_lancamentos, saldo_disponivel):
-    """Função principal que reúne todos os alertas"""
-    alertas = []
-    alertas.append(verificar_meta_cartao(df_lancamentos))
-    alertas.extend(analisar_gastos_por_categoria(df_lancamentos))
+def gerar_alertas(competencia, saldo_disponivel):
+    """Função principal que reúne todos os alertas da competência "AAAA-MM"."""
+    alertas = mensagens(alertas_do_mes(competencia))
     alertas.append(sugestao_investimento(saldo_disponivel))
     return alertas
-
@@ -0,0 +1,114 @@
+"""
+Regras de alerta de meta: compara o caminho antigo do analisador (ler os lançamentos e, para cada
+categoria, refiltrar o DataFrame inteiro; o cartão somado à parte) com `analisador_financeiro`, que
+avalia todas as regras a partir de uma única agregação do resumo mensal. Mede um mês e o backtest de
+todo o histórico, e confere que os estouros encontrados são os mesmos.
+
+Uso: python benchmarks/bench_alertas.py [linhas]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from comum import criar_app, cronometro
+
+from models import db, Categoria, Lancamento, MetaFormaPagamento
+from importador import TAMANHO_LOTE, executemany_insert
+from resumo_mensal import reconstruir_resumo
+from previsao_sazonal import mes_do_indice, indice_do_mes
+from analisador_financeiro import alertas_do_mes, historico_de_alertas, mensagens
+
+MESES = 60
+CATEGORIAS = 30
+FORMAS = ["Pix", "Cartão", "Débito", "Boleto"]
+LIMITE_CARTAO = 1500.00  # meta cadastrada para o cartão (a migração semeia o mesmo valor)
+
+
+def lancamentos_sinteticos(n, semente=11):
+    rng = np.random.default_rng(semente)
+    competencias = [mes_do_indice(int(i)) for i in indice_do_mes("2020-07") + rng.integers(0, MESES, n)]
+    return {
+        "competencia": competencias,
+        "data": [f"{c}-15" for c in competencias],
+        "descricao": ["Compra"] * n,
+        "valor": np.round(rng.gamma(2.0, 12.0, n), 2).tolist(),
+        "tipo": ["Despesa"] * n,
+        "categoria": [f"Categoria {c:02d}" for c in rng.integers(0, CATEGORIAS, n)],
+        "forma_pagamento": [FORMAS[f] for f in rng.integers(0, len(FORMAS), n)],
+    }
+
+
+def alertas_legado(df, limites):
+    """Cópia do analisador antigo (laço por categoria sobre o DataFrame), com as metas do banco."""
+    estouros = {}
+    gastos_cartao = df[df['forma_pagamento'] == 'Cartão']['valor'].sum()
+    if gastos_cartao > LIMITE_CARTAO:
+        estouros[("cartao", "Cartão")] = gastos_cartao - LIMITE_CARTAO
+    for categoria in df['categoria'].unique():
+        total = df[df['categoria'] == categoria]['valor'].sum()
+        meta = limites.get(categoria)
+        if meta and total > meta:
+            estouros[("categoria", categoria)] = total - meta
+    total = df['valor'].sum()
+    if total > sum(limites.values()):
+        estouros[("total", "")] = total - sum(limites.values())
+    return estouros
+
+
+def como_dicionario(estouros):
+    return {(c, r, k): round(e, 2) for c, r, k, e in zip(estouros["competencia"], estouros["regra"],
+                                                         estouros["chave"], estouros["excesso"])}
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = criar_app("alertas.db")
+    with app.app_context():
+        dados = lancamentos_sinteticos(n)
+        with cronometro(f"gravação de {n} lançamentos e do resumo mensal"):
+            executemany_insert(db.session.connection(), Lancamento.__table__, dados, TAMANHO_LOTE)
+            # Metas perto do gasto médio: algumas categorias estouram em parte dos meses
+            media = n / MESES / CATEGORIAS * 24.0
+            db.session.add_all(Categoria(nome=f"Categoria {c:02d}", tipo="Despesa", meta_mensal=round(media * 1.02, 2))
+                               for c in range(0, CATEGORIAS, 2))
+            db.session.add(MetaFormaPagamento(forma_pagamento="Cartão", meta_mensal=LIMITE_CARTAO))
+            db.session.commit()
+            reconstruir_resumo()
+        limites = {c.nome: c.meta_mensal for c in Categoria.query}
+
+        ultimo = mes_do_indice(indice_do_mes("2020-07") + MESES - 1)
+        inicio = time.perf_counter()
+        df = pd.read_sql(f"SELECT valor, categoria, forma_pagamento FROM lancamento WHERE competencia = '{ultimo}'", db.engine)
+        esperado_mes = alertas_legado(df, limites)
+        antes = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        estouros = alertas_do_mes(ultimo)
+        depois = time.perf_counter() - inicio
+        obtido = {(r, k): e for (_, r, k), e in como_dicionario(estouros).items()}
+        assert obtido == {chave: round(e, 2) for chave, e in esperado_mes.items()}
+        assert mensagens(estouros)
+        print(f"⏱️ alertas de {ultimo}: laço por categoria {antes * 1000:.1f}ms → agregação {depois * 1000:.1f}ms "
+              f"({antes / depois:.0f}x)")
+
+        inicio = time.perf_counter()
+        df = pd.read_sql("SELECT competencia, valor, categoria, forma_pagamento FROM lancamento", db.engine)
+        esperado = {}
+        for competencia in df['competencia'].unique():
+            for (regra, chave), excesso in alertas_legado(df[df['competencia'] == competencia], limites).items():
+                esperado[(competencia, regra, chave)] = round(excesso, 2)
+        antes = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        meses, estouros = historico_de_alertas()
+        depois = time.perf_counter() - inicio
+        assert len(meses) == MESES and como_dicionario(estouros) == esperado
+        assert 0 < len(estouros[estouros["regra"] == "categoria"]) < MESES * CATEGORIAS // 2
+        print(f"⏱️ backtest de {MESES} meses ({len(estouros)} estouros): laço {antes:.3f}s → "
+              f"agregação {depois * 1000:.1f}ms ({antes / depois:.0f}x)")
+
+    print("✅ Mesmos estouros do laço por categoria, no mês e em todo o histórico")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Compara o classificador compilado (`classificador.py`) com as funções antigas
+(cadeia if/elif de modelo_ia.classificar_texto e o laço de utils.sugerir_categoria),
+conferindo que a saída é idêntica com as mesmas regras.
+
+Uso: python benchmarks/bench_classificador.py [linhas]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+from comum import cronometro
+
+from utils import CATEGORIAS_PALAVRAS
+from classificador import Classificador, Regra, REGRAS_MODELO, REGRAS_PALAVRAS, normalizar
+from modelo_ia import classificar_texto
+
+PALAVRAS = ["Supermercado", "Mercado Livre", "UBER *TRIP", "Farmácia", "Remédio", "Academia", "Cinema",
+            "Netflix.com", "Padaria", "Restaurante", "Pizza", "Aluguel", "Condomínio", "Conta de Luz",
+            "Internet", "Salário", "Pagamento", "Fatura Cartão", "Juros", "Escola", "Curso", "IPVA",
+            "Combustível", "Viagem", "Show", "Mesada", "Consulta", "Dentista", "Pix", "Transferência",
+            "Loja", "Compra", "Posto", "Drogaria"]
+ESTABELECIMENTOS = ["", "", "", "Supermercado Extra", "99 Táxi", "Netflix", "Loja X", "Posto Shell"]
+
+
+def classificar_texto_legado(descricao, estabelecimento=""):
+    """Cópia fiel da cadeia if/elif que existia em modelo_ia."""
+    descricao = descricao.lower()
+    estabelecimento = estabelecimento.lower()
+
+    if "mercado" in descricao or "supermercado" in estabelecimento:
+        return "Alimentação"
+    elif "uber" in descricao or "99" in estabelecimento:
+        return "Transporte"
+    elif "farmácia" in descricao or "remédio" in descricao:
+        return "Saúde"
+    elif "academia" in descricao:
+        return "Bem-estar"
+    elif "cinema" in descricao or "netflix" in estabelecimento:
+        return "Lazer"
+    else:
+        return "Outros"
+
+
+def sugerir_categoria_legado(descricao):
+    """Cópia fiel do laço que existia em utils."""
+    descricao = unidecode(descricao.lower())
+
+    for categoria, palavras in CATEGORIAS_PALAVRAS.items():
+        if any(palavra in descricao for palavra in palavras):
+            return categoria
+
+    return "Outros"
+
+
+def classificar_por_laco(regras, descricao, estabelecimento=""):
+    """A cadeia if/elif generalizada: um teste `in` por regra, na ordem, até a primeira que casar."""
+    textos = {"descricao": normalizar(descricao), "estabelecimento": normalizar(estabelecimento)}
+    for regra in regras:
+        campos = ("descricao", "estabelecimento") if regra.campo == "qualquer" else (regra.campo,)
+        if any(normalizar(regra.palavra) in textos[c] for c in campos):
+            return regra.categoria
+    return "Outros"
+
+
+def regras_de_estabelecimentos(n, semente=5):
+    """Regras cadastradas no banco: uma por estabelecimento conhecido."""
+    rng = np.random.default_rng(semente)
+    nomes = {f"loja {''.join(rng.choice(list('abcdefghijklmnopqrstuvwxyz'), 6))}" for _ in range(n)}
+    return [Regra(nome, rng.choice(list(CATEGORIAS_PALAVRAS)), "qualquer") for nome in sorted(nomes)]
+
+
+def corpus(n, semente=3):
+    """Descrições de extrato: 1 a 3 termos + código numérico (muitos textos distintos, como nos bancos)."""
+    rng = np.random.default_rng(semente)
+    termos = rng.choice(PALAVRAS, (n, 3))
+    quantos = rng.integers(1, 4, n)
+    codigos = rng.integers(0, 5000, n)
+    descricoes = [" ".join(t[:q]) + f" {c}" for t, q, c in zip(termos, quantos, codigos)]
+    return pd.Series(descricoes), pd.Series(rng.choice(ESTABELECIMENTOS, n))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    descricoes, estabelecimentos = corpus(n)
+    print(f"📄 {n} descrições ({descricoes.nunique()} distintas)")
+    resultados = {}
+
+    modelo = Classificador(REGRAS_MODELO)
+    palavras = Classificador(REGRAS_PALAVRAS)
+
+    with cronometro("classificar_texto (if/elif, linha a linha)", resultados):
+        esperado_modelo = [classificar_texto_legado(d, e) for d, e in zip(descricoes, estabelecimentos)]
+    with cronometro("classificar_texto compilado (Series)", resultados):
+        obtido_modelo = modelo.classificar_serie(descricoes, estabelecimentos)
+    assert obtido_modelo.tolist() == esperado_modelo, "classificar_texto divergente"
+
+    with cronometro("sugerir_categoria (laço, linha a linha)", resultados):
+        esperado_palavras = [sugerir_categoria_legado(d) for d in descricoes]
+    with cronometro("sugerir_categoria compilado (Series)", resultados):
+        obtido_palavras = palavras.classificar_serie(descricoes)
+    assert obtido_palavras.tolist() == esperado_palavras, "sugerir_categoria divergente"
+
+    with cronometro("sugerir_categoria compilado (linha a linha)", resultados):
+        assert [palavras.classificar(d) for d in descricoes] == esperado_palavras
+
+    # modelo_ia.classificar_texto em uso (fora do app: sem modelo treinado, só as regras embutidas)
+    with cronometro("modelo_ia.classificar_texto (linha a linha)", resultados):
+        esperado_texto = [classificar_texto(d, e) for d, e in zip(descricoes, estabelecimentos)]
+    with cronometro("modelo_ia.classificar_texto (Series)", resultados):
+        obtido_texto = classificar_texto(descricoes, estabelecimentos)
+    assert obtido_texto.tolist() == esperado_texto, "classificar_texto com Series divergente"
+
+    print("✅ Saída idêntica às funções antigas")
+
+    # Custo conforme cresce o número de regras (regras do banco + embutidas)
+    for quantidade in (100, 1000):
+        regras = regras_de_estabelecimentos(quantidade) + REGRAS_MODELO + REGRAS_PALAVRAS
+        amostra_d = descricoes.where(np.arange(n) % 7 != 0, [r.palavra.upper() for r in regras][0])
+        rotulo_laco = f"{len(regras)} regras, laço linha a linha"
+        rotulo_compilado = f"{len(regras)} regras, compilado (Series)"
+        with cronometro(rotulo_laco, resultados):
+            esperado = [classificar_por_laco(regras, d, e) for d, e in zip(amostra_d, estabelecimentos)]
+        with cronometro(rotulo_compilado, resultados):
+            obtido = Classificador(regras).classificar_serie(amostra_d, estabelecimentos)
+        assert obtido.tolist() == esperado, f"divergência com {len(regras)} regras"
+    comparacoes = [("classificar_texto (if/elif, linha a linha)", "classificar_texto compilado (Series)"),
+                   ("sugerir_categoria (laço, linha a linha)", "sugerir_categoria compilado (Series)"),
+                   ("modelo_ia.classificar_texto (linha a linha)", "modelo_ia.classificar_texto (Series)")]
+    comparacoes += [(r, r.replace("laço linha a linha", "compilado (Series)")) for r in resultados if "laço linha" in r]
+    for antigo, novo in comparacoes:
+        print(f"🚀 {novo}: {resultados[antigo] / resultados[novo]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
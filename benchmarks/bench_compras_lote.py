@@ -0,0 +1,104 @@
+"""
+Cadastro de compras parceladas: o caminho antigo (objeto por objeto via ORM e `gerar_parcelas`, uma compra
+por vez como em /cartao/nova) contra `compras_lote.importar_compras` (cronograma vetorizado e dois INSERTs
+em lote). Confere que os cronogramas são iguais, que as parcelas somam o total de cada compra e que a
+tabela fatura bate com as parcelas.
+
+Com 10 mil compras o caminho antigo leva minutos (commit e recálculo da fatura por compra).
+
+Uso: python benchmarks/bench_compras_lote.py [compras] [parcelas]
+"""
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+
+from comum import criar_app
+
+from models import db, CompraCartao, ParcelaCartao, gerar_parcelas
+from compras_lote import importar_compras
+from faturas import verificar_faturas
+
+
+def gerar_compras(n, parcelas, semente=11):
+    """n compras sintéticas de `parcelas` parcelas, com valores que nem sempre dividem exato."""
+    rng = np.random.default_rng(semente)
+    primeiras = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+    return pd.DataFrame({
+        "descricao": [f"Compra {i}" for i in range(n)],
+        "cartao": rng.choice(["Nubank", "Itaú", "Inter", "C6"], n),
+        "valor_total": np.round(rng.uniform(50, 5000, n), 2),
+        "total_parcelas": parcelas,
+        "data_primeira_fatura": primeiras.strftime("%Y-%m-%d"),
+    })
+
+
+def cadastrar_um_a_um(compras):
+    """Como a rota /cartao/nova: CompraCartao + flush + gerar_parcelas + commit por linha, cada uma numa sessão limpa."""
+    for linha in compras.itertuples():
+        compra = CompraCartao(
+            descricao=linha.descricao,
+            cartao=linha.cartao,
+            valor_total=linha.valor_total,
+            total_parcelas=linha.total_parcelas,
+            data_primeira_fatura=pd.Timestamp(linha.data_primeira_fatura).date(),
+        )
+        db.session.add(compra)
+        db.session.flush()
+        db.session.add_all(gerar_parcelas(compra))
+        db.session.commit()
+        db.session.expunge_all()
+
+
+def cronogramas():
+    """{(descricao, numero): (valor, vencimento)} de todas as parcelas gravadas."""
+    linhas = db.session.query(CompraCartao.descricao, ParcelaCartao.numero, ParcelaCartao.valor, ParcelaCartao.vencimento) \
+        .join(ParcelaCartao, ParcelaCartao.compra_id == CompraCartao.id).all()
+    return {(d, n): (Decimal(v).quantize(Decimal("0.01")), venc) for d, n, v, venc in linhas}
+
+
+def conferir(compras, parcelas):
+    assert CompraCartao.query.count() == len(compras)
+    assert ParcelaCartao.query.count() == len(compras) * parcelas
+    somas = db.session.query(CompraCartao.valor_total, func.sum(ParcelaCartao.valor)) \
+        .join(ParcelaCartao, ParcelaCartao.compra_id == CompraCartao.id).group_by(CompraCartao.id).all()
+    assert all(round(float(total) - float(soma), 2) == 0 for total, soma in somas), "parcelas não somam o total"
+    assert not verificar_faturas(), "tabela fatura divergente das parcelas"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    parcelas = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    compras = gerar_compras(n, parcelas)
+    print(f"📄 {n} compras × {parcelas} parcelas")
+
+    app = criar_app("compras_orm.db")
+    with app.app_context():
+        inicio = time.perf_counter()
+        cadastrar_um_a_um(compras)
+        antes = time.perf_counter() - inicio
+        conferir(compras, parcelas)
+        esperado = cronogramas()
+
+    app = criar_app("compras_lote.db")
+    with app.app_context():
+        inicio = time.perf_counter()
+        resultado = importar_compras(compras.copy())
+        depois = time.perf_counter() - inicio
+        assert resultado["compras"] == n and not resultado["rejeitadas"], resultado
+        conferir(compras, parcelas)
+        assert cronogramas() == esperado, "cronograma em lote diferente do gerado por gerar_parcelas"
+
+        repetido = importar_compras(compras.copy())
+        assert repetido["compras"] == 0 and repetido["duplicadas"] == n
+
+    print(f"⏱️ ORM, uma compra por vez: {antes:.3f}s ({n / antes:,.0f} compras/s)")
+    print(f"⏱️ em lote (vetorizado): {depois:.3f}s ({n / depois:,.0f} compras/s) — {antes / depois:.1f}x")
+    print("✅ Cronogramas iguais, parcelas somando o total e faturas conferidas")
+
+
+if __name__ == "__main__":
+    main()
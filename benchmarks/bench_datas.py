@@ -0,0 +1,96 @@
+"""
+Tempo das consultas de lançamentos por período antes e depois da migração d5b9f03a6c12
+(data como Date, índices (data, id) e (competencia, tipo)), numa tabela sintética.
+"Antes" é a mesma tabela sem os dois índices: no SQLite a coluna Date continua gravada
+como texto AAAA-MM-DD, então o ganho vem de os intervalos poderem usar o índice.
+
+Uso: python benchmarks/bench_datas.py [linhas]
+"""
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, text, tuple_
+
+from comum import criar_app
+
+from models import db, Lancamento
+
+REPETICOES = 5
+INDICES = ("ix_lancamento_data_id", "ix_lancamento_competencia_tipo")
+
+
+def popular(n, semente=5):
+    """n lançamentos espalhados por 6 anos, inseridos direto no driver."""
+    rng = np.random.default_rng(semente)
+    datas = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 365 * 6, n), unit="D")
+    textos = datas.strftime("%Y-%m-%d")
+    linhas = zip(textos.str[:7], textos, rng.choice(["Mercado", "Uber", "Farmácia", "Aluguel"], n).tolist(),
+                 np.round(rng.uniform(5, 500, n), 2).tolist(), rng.choice(["Receita", "Despesa"], n, p=[0.2, 0.8]).tolist())
+    conn = db.session.connection()
+    conn.exec_driver_sql(
+        "INSERT INTO lancamento (competencia, data, descricao, estabelecimento, valor, tipo, categoria) "
+        "VALUES (?, ?, ?, '', ?, ?, 'Outros')",
+        [(c, d, desc, v, t) for c, d, desc, v, t in linhas]
+    )
+    db.session.commit()
+
+
+def consultas():
+    """As consultas do app que filtram ou ordenam por data/competência."""
+    inicio, fim = date(2023, 3, 1), date(2023, 4, 1)
+    return {
+        "lançamentos do mês (intervalo de datas)": lambda: db.session.query(Lancamento.data, Lancamento.valor)
+            .filter(Lancamento.data >= inicio, Lancamento.data < fim).all(),
+        "evolução diária do mês (GROUP BY data)": lambda: db.session.query(Lancamento.data, func.sum(Lancamento.valor))
+            .filter(Lancamento.data >= inicio, Lancamento.data < fim).group_by(Lancamento.data).all(),
+        "total por competência e tipo": lambda: db.session.query(func.sum(Lancamento.valor))
+            .filter(Lancamento.competencia == "2023-03", Lancamento.tipo == "Despesa").scalar(),
+        "primeira página da listagem": lambda: Lancamento.query
+            .order_by(Lancamento.data.desc(), Lancamento.id.desc()).limit(51).all(),
+        "página seguinte (cursor)": lambda: Lancamento.query
+            .filter(tuple_(Lancamento.data, Lancamento.id) < (date(2022, 6, 1), 10 ** 9))
+            .order_by(Lancamento.data.desc(), Lancamento.id.desc()).limit(51).all(),
+    }
+
+
+def medir():
+    tempos = {}
+    for rotulo, consulta in consultas().items():
+        duracoes = []
+        for _ in range(REPETICOES):
+            inicio = time.perf_counter()
+            consulta()
+            duracoes.append(time.perf_counter() - inicio)
+        tempos[rotulo] = float(np.median(duracoes))
+    return tempos
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"📄 {n} lançamentos")
+
+    app = criar_app("datas.db")
+    with app.app_context():
+        popular(n)
+        for indice in INDICES:
+            db.session.execute(text(f"DROP INDEX {indice}"))
+        db.session.commit()
+        antes = medir()
+
+        for tabela_indice in Lancamento.__table__.indexes:
+            if tabela_indice.name in INDICES:
+                tabela_indice.create(db.engine)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        depois = medir()
+
+    for rotulo in antes:
+        print(f"⏱️ {rotulo}: {antes[rotulo] * 1000:.1f}ms → {depois[rotulo] * 1000:.1f}ms "
+              f"({antes[rotulo] / depois[rotulo]:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
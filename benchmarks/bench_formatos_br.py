@@ -0,0 +1,114 @@
+"""
+Mede a conversão de datas e valores em formatos brasileiros (`formatos_br.py`) sobre um
+extrato sintético com layouts misturados, comparando com a conversão célula a célula.
+
+Uso: python benchmarks/bench_formatos_br.py [linhas]
+"""
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from comum import cronometro
+
+from formatos_br import FORMATOS_DATA, converter_datas, converter_valores, separar_rejeitadas
+
+
+def _valor_br(v):
+    inteiro, centavos = f"{abs(v):.2f}".split(".")
+    partes = []
+    while len(inteiro) > 3:
+        partes.insert(0, inteiro[-3:])
+        inteiro = inteiro[:-3]
+    return ".".join([inteiro] + partes) + "," + centavos
+
+
+def extrato_sintetico(n, semente=7):
+    """Valores em "1.234,56", "R$ -12,30", "(45,00)", "99,90 D", "1234.56" e datas em vários layouts."""
+    rng = np.random.default_rng(semente)
+    brutos = np.round(rng.normal(-80, 900, n), 2)
+    base = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 365 * 5, n), unit="D")
+
+    # Poucos valores distintos formatados por layout (o custo aqui é montar o arquivo, não medir)
+    amostra = np.unique(brutos)[:5000]
+    layouts = [
+        lambda v: ("-" if v < 0 else "") + _valor_br(v),
+        lambda v: "R$ " + ("-" if v < 0 else "") + _valor_br(v),
+        lambda v: f"({_valor_br(v)})" if v < 0 else _valor_br(v),
+        lambda v: _valor_br(v) + (" D" if v < 0 else " C"),
+        lambda v: f"{v:.2f}",
+    ]
+    escolha = rng.integers(0, len(layouts), n)
+    indice = rng.integers(0, len(amostra), n)
+    tabela = np.array([[f(v) for v in amostra] for f in layouts], dtype=object)
+    valores = tabela[escolha, indice]
+    esperados = amostra[indice]
+
+    formatos = ["%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d.%m.%Y"]
+    formato = rng.integers(0, len(formatos), n)
+    datas = np.empty(n, dtype=object)
+    for i, f in enumerate(formatos):
+        datas[formato == i] = base[formato == i].strftime(f)
+
+    # 0,1% de lixo para exercitar a saída de rejeitadas
+    lixo = rng.random(n) < 0.001
+    valores[lixo] = "abc"
+    datas[rng.random(n) < 0.001] = "31/02/2024"
+
+    df = pd.DataFrame({"data": datas, "valor": valores})
+    return df, pd.Series(esperados, index=df.index).where(~lixo), pd.Series(base.normalize(), index=df.index)
+
+
+def converter_legado(df):
+    """Conversão célula a célula: replace/float e tentativa de cada layout com datetime.strptime."""
+    valores, datas = [], []
+    for valor, data in zip(df["valor"], df["data"]):
+        texto = valor.upper().replace("R$", "").strip()
+        negativo = texto.startswith("-") or texto.startswith("(") or texto.endswith("D")
+        texto = texto.rstrip("DC ").strip("()-+ ")
+        if "," in texto:
+            texto = texto.replace(".", "").replace(",", ".")
+        try:
+            v = float(texto)
+            valores.append(-abs(v) if negativo else v)
+        except ValueError:
+            valores.append(np.nan)
+
+        convertida = None
+        for formato in FORMATOS_DATA:
+            try:
+                convertida = datetime.strptime(data, formato)
+                break
+            except ValueError:
+                continue
+        datas.append(convertida)
+    return valores, datas
+
+
+def main(n):
+    print(f"🔹 Gerando extrato sintético com {n:,} linhas...")
+    df, esperados, datas_esperadas = extrato_sintetico(n)
+    resultados = {}
+
+    with cronometro("conversão célula a célula", resultados):
+        converter_legado(df)
+
+    with cronometro("conversão vetorizada", resultados):
+        valores, valores_invalidos = converter_valores(df["valor"])
+        datas, datas_invalidas = converter_datas(df["data"])
+        validas, rejeitadas = separar_rejeitadas(df, {
+            "data inválida": datas_invalidas,
+            "valor inválido": valores_invalidos,
+        })
+
+    assert np.allclose(valores[validas], esperados[validas]), "valores divergentes"
+    assert (datas[validas] == datas_esperadas[validas]).all(), "datas divergentes"
+    print(f"🔹 {len(rejeitadas):,} linhas rejeitadas: {rejeitadas['motivo'].value_counts().to_dict()}")
+
+    ganho = resultados["conversão célula a célula"] / resultados["conversão vetorizada"]
+    print(f"🚀 {n / resultados['conversão vetorizada']:,.0f} linhas/s — {ganho:.1f}x mais rápido que célula a célula")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
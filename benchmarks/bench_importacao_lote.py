@@ -0,0 +1,74 @@
+"""
+Importação de um mês inteiro (vários extratos CSV, um por conta/cartão): arquivo a arquivo,
+como em /importar-extrato, contra `processar_lote` preparando os arquivos num pool de processos.
+
+Uso: python benchmarks/bench_importacao_lote.py [arquivos] [linhas por arquivo]
+"""
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from comum import criar_app, cronometro
+from bench_importacao import extrato_sintetico
+
+from models import db, Importacao, Lancamento
+from importador import importar_em_blocos, processar_lote
+from resumo_mensal import verificar_resumo
+
+
+def gerar_arquivos(quantidade, linhas):
+    pasta = tempfile.mkdtemp(prefix="financeiro_lote_")
+    caminhos = []
+    for i in range(quantidade):
+        caminho = os.path.join(pasta, f"conta_{i}.csv")
+        extrato_sintetico(linhas + i * linhas // 10, semente=i).assign(Conta=f"conta {i}").to_csv(caminho, index=False)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    linhas = int(sys.argv[2]) if len(sys.argv) > 2 else 30_000
+    caminhos = gerar_arquivos(quantidade, linhas)
+    print(f"📄 {quantidade} extratos de ~{linhas} linhas ({os.cpu_count()} núcleos)")
+    resultados = {}
+
+    app = criar_app("sequencial.db")
+    with app.app_context():
+        with cronometro("arquivo a arquivo", resultados):
+            for caminho in caminhos:
+                with open(caminho, "rb") as arquivo:
+                    importar_em_blocos(arquivo, os.path.basename(caminho), "csv", "extrato")
+        esperado = Lancamento.query.count()
+
+    # O maior arquivo sozinho: referência do "tempo do maior arquivo"
+    app = criar_app("maior.db")
+    with app.app_context():
+        with cronometro("somente o maior arquivo", resultados):
+            with open(caminhos[-1], "rb") as arquivo:
+                importar_em_blocos(arquivo, "maior.csv", "csv", "extrato")
+
+    app = criar_app("paralelo.db")
+    with app.app_context(), ProcessPoolExecutor() as executor:
+        importacoes = [
+            Importacao(nome_arquivo=os.path.basename(c), caminho_arquivo=c, assinatura="-", tipo="extrato",
+                       formato="csv")
+            for c in caminhos
+        ]
+        db.session.add_all(importacoes)
+        db.session.commit()
+        executor.submit(int).result()  # sobe os processos antes de medir
+
+        with cronometro("lote em paralelo", resultados):
+            processar_lote(importacoes, executor)
+        assert Lancamento.query.count() == esperado
+        assert not verificar_resumo()
+
+    ganho = resultados["arquivo a arquivo"] / resultados["lote em paralelo"]
+    proporcao = resultados["lote em paralelo"] / resultados["somente o maior arquivo"]
+    print(f"🚀 {ganho:.1f}x mais rápido que arquivo a arquivo — {proporcao:.1f}x o tempo do maior arquivo")
+
+
+if __name__ == "__main__":
+    main()
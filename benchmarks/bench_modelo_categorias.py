@@ -0,0 +1,105 @@
+"""
+Treina o modelo de categorias (`modelo_categorias.py`) com lançamentos sintéticos já categorizados
+e mede, numa parte separada para teste: acurácia do modelo, das regras de palavras-chave e da
+combinação usada no app (modelo acima de CONFIANCA_MINIMA, regras no resto), além de previsões/s.
+
+Uso: python benchmarks/bench_modelo_categorias.py [linhas]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from comum import cronometro
+
+from classificador import Classificador, REGRAS_MODELO, REGRAS_PALAVRAS
+from modelo_categorias import CONFIANCA_MINIMA, ModeloBayes
+
+# Estabelecimentos reais de extrato: a maioria não tem nenhuma palavra-chave das regras embutidas
+ESTABELECIMENTOS = {
+    "Alimentação": ["IFOOD", "RAPPI", "CARREFOUR", "ASSAI ATACADISTA", "ATACADAO", "HORTIFRUTI", "ACOUGUE BOI",
+                    "BURGER KING", "MCDONALDS", "PADARIA REAL", "PAO DE ACUCAR", "OUTBACK"],
+    "Transporte": ["UBER *TRIP", "99POP", "SHELL BOX", "POSTO IPIRANGA", "ESTAPAR", "SEM PARAR", "CABIFY",
+                   "PETROBRAS BR", "METRO SP", "BILHETE UNICO"],
+    "Saúde": ["DROGASIL", "PAGUE MENOS", "DROGA RAIA", "UNIMED", "HAPVIDA", "LAB FLEURY", "ODONTOPREV",
+              "CLINICA SIM", "FARMACIA POPULAR", "OTICAS CAROL"],
+    "Lazer": ["NETFLIX.COM", "SPOTIFY", "CINEMARK", "STEAMGAMES", "INGRESSO.COM", "DISNEY PLUS", "HBOMAX",
+              "PLAYSTATION NETWORK", "BAR DO ZE", "SYMPLA"],
+    "Moradia": ["LEROY MERLIN", "TELHANORTE", "TOK STOK", "CAMICADO", "ENEL SP", "SABESP", "COMGAS",
+                "MADEIRAMADEIRA", "CONDOMINIO ED SOL", "ALUGUEL APTO"],
+    "Educação": ["UDEMY", "ALURA", "LIVRARIA CULTURA", "SARAIVA", "COURSERA", "KUMON", "WIZARD IDIOMAS",
+                 "PAPELARIA ALFA", "ESCOLA BETA", "FACULDADE XYZ"],
+    "Contas e Serviços": ["VIVO FIBRA", "CLARO", "TIM", "NET SERVICOS", "OI FIBRA", "AMAZON PRIME",
+                          "GOOGLE STORAGE", "APPLE.COM/BILL", "MICROSOFT 365", "CONTA LUZ"],
+}
+PREFIXOS = ["", "", "COMPRA CARTAO ", "PIX ", "DEB AUT ", "PAG*", "EC *"]
+SUFIXOS = ["", "", " SAO PAULO BR", " RIO DE JANEIRO", " CURITIBA", " ONLINE", " BR"]
+
+
+def lancamentos(n, semente=7):
+    """
+    Descrições de extrato: prefixo + estabelecimento (às vezes com um caractere faltando) + cidade +
+    código. Devolve (descrições, categoria verdadeira, se o estabelecimento é o último da categoria).
+    """
+    rng = np.random.default_rng(semente)
+    pares = [(e, c, i == len(lista) - 1) for c, lista in ESTABELECIMENTOS.items() for i, e in enumerate(lista)]
+    escolhidos = rng.integers(0, len(pares), n)
+    prefixos = rng.choice(PREFIXOS, n)
+    sufixos = rng.choice(SUFIXOS, n)
+    codigos = rng.integers(0, 10 ** 6, n)
+    falhas = rng.random(n) < 0.3
+    descricoes = []
+    for i, p, s, c, falha in zip(escolhidos, prefixos, sufixos, codigos, falhas):
+        nome = pares[i][0]
+        if falha:
+            corte = rng.integers(0, len(nome))
+            nome = nome[:corte] + nome[corte + 1:]
+        descricoes.append(f"{p}{nome}{s} {c:06d}")
+    return (pd.Series(descricoes), pd.Series([pares[i][1] for i in escolhidos]),
+            np.array([pares[i][2] for i in escolhidos]))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    descricoes, categorias, reservado = lancamentos(n)
+    # Teste: 20% das linhas, mais todas as do último estabelecimento de cada categoria (nunca visto no treino)
+    teste = (np.random.default_rng(1).random(n) < 0.2) | reservado
+    treino_categorias = categorias[~teste].copy()
+    ruido = np.random.default_rng(2).random(len(treino_categorias)) < 0.05  # 5% de categorias erradas no treino
+    treino_categorias[ruido] = np.random.default_rng(4).choice(list(ESTABELECIMENTOS), ruido.sum())
+    print(f"📄 {n} lançamentos ({(~teste).sum()} para treino, {teste.sum()} para teste)")
+    resultados = {}
+
+    with cronometro("treino", resultados):
+        modelo = ModeloBayes.treinar(descricoes[~teste], treino_categorias)
+
+    esperadas = categorias[teste].to_numpy()
+    inicio = time.perf_counter()
+    previstas, confiancas = modelo.prever(descricoes[teste])
+    duracao = time.perf_counter() - inicio
+    print(f"⏱️ previsão em lote: {teste.sum() / duracao:,.0f} previsões/s ({descricoes[teste].nunique()} textos distintos)")
+
+    regras = Classificador(REGRAS_MODELO + REGRAS_PALAVRAS).classificar_serie(descricoes[teste]).to_numpy()
+    confiante = confiancas >= CONFIANCA_MINIMA
+    combinada = np.where(confiante, previstas, regras)
+    novos = reservado[teste]
+
+    print(f"🎯 regras de palavras-chave: {(regras == esperadas).mean():.1%}")
+    print(f"🎯 modelo sozinho: {(previstas == esperadas).mean():.1%}")
+    print(f"🎯 modelo confiante ({confiante.mean():.1%} das linhas): {(previstas[confiante] == esperadas[confiante]).mean():.1%}")
+    print(f"🎯 modelo + regras (como no app): {(combinada == esperadas).mean():.1%}")
+    print(f"🎯 estabelecimentos vistos no treino: modelo + regras {(combinada[~novos] == esperadas[~novos]).mean():.1%}"
+          f" (modelo confiante em {confiante[~novos].mean():.1%}), regras {(regras[~novos] == esperadas[~novos]).mean():.1%}")
+    print(f"🎯 estabelecimentos nunca vistos: modelo + regras {(combinada[novos] == esperadas[novos]).mean():.1%}"
+          f" (modelo confiante em {confiante[novos].mean():.1%}), regras {(regras[novos] == esperadas[novos]).mean():.1%}")
+
+    # Uma importação grande: 1 milhão de linhas com muitos textos repetidos
+    grande = descricoes.sample(1_000_000, replace=True, random_state=3)
+    with cronometro("previsão de 1M linhas", resultados):
+        modelo.prever(grande)
+    print(f"🚀 {1_000_000 / resultados['previsão de 1M linhas']:,.0f} previsões/s em 1M linhas")
+
+
+if __name__ == "__main__":
+    main()
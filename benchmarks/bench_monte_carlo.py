@@ -0,0 +1,83 @@
+"""
+Simulação de Monte Carlo do simulador (`simulador.monte_carlo`): mede 100 mil caminhos (menos em prazos
+longos, pelo orçamento de caminhos × meses) por perfil e prazo, sem e com cache, e compara com um laço caminho a caminho (medido numa fração dos caminhos e
+extrapolado). Confere que a média dos saldos finais bate com a fórmula fechada do valor esperado, que
+a mesma semente repete o resultado e que as faixas de percentis são ordenadas.
+
+Uso: python benchmarks/bench_monte_carlo.py [caminhos]
+"""
+import sys
+import time
+
+import numpy as np
+
+import comum  # noqa: F401 (coloca a raiz do projeto no sys.path)
+
+import simulador
+from simulador import PERFIS_RETORNO, monte_carlo, saldo_final
+
+SALDO, META, APORTE = 1_000.0, 30_000.0, 500.0
+PRAZOS = (12, 60, 120, 360)
+AMOSTRA_LACO = 2_000
+
+
+def laco(caminhos, prazo, perfil, semente=7):
+    """Um caminho por vez, um mês por vez, sorteando cada retorno separadamente."""
+    media, desvio = PERFIS_RETORNO[perfil]
+    sigma = np.log1p((desvio / (1 + media)) ** 2) ** 0.5
+    mu = np.log1p(media) - sigma ** 2 / 2
+    gerador = np.random.default_rng(semente)
+    finais = []
+    for _ in range(caminhos):
+        saldo = SALDO
+        for _ in range(prazo):
+            saldo = (saldo + APORTE) * float(np.exp(mu + sigma * gerador.standard_normal()))
+        finais.append(saldo)
+    return np.array(finais)
+
+
+def main():
+    caminhos = int(sys.argv[1]) if len(sys.argv) > 1 else simulador.CAMINHOS
+    for prazo in PRAZOS:
+        for perfil in PERFIS_RETORNO:
+            simulador._cache_monte_carlo.clear()
+            inicio = time.perf_counter()
+            resultado = monte_carlo(SALDO, META, APORTE, prazo, perfil, caminhos=caminhos)
+            frio = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            assert monte_carlo(SALDO, META, APORTE, prazo, perfil, caminhos=caminhos) is resultado
+            em_cache = time.perf_counter() - inicio
+
+            simulador._cache_monte_carlo.clear()
+            assert monte_carlo(SALDO, META, APORTE, prazo, perfil, caminhos=caminhos) == resultado, "semente não reproduz"
+            faixas = np.array([resultado["faixas"][f"p{q}"] for q in simulador.PERCENTIS])
+            assert (np.diff(faixas, axis=0) >= 0).all(), "percentis fora de ordem"
+
+            print(f"⏱️ {perfil:<11} {prazo:>3} meses, {resultado['caminhos']:>6} caminhos: {frio * 1000:6.1f}ms → cache {em_cache * 1000:.3f}ms · "
+                  f"P(meta) {resultado['probabilidade_meta']:.1%} · mediana R$ {resultado['saldo_final']['p50']:,.2f}")
+            if perfil == "conservador":  # volatilidade baixa: a mediana fica colada no valor esperado
+                esperado = float(saldo_final(SALDO, APORTE, prazo, PERFIS_RETORNO[perfil][0]))
+                assert abs(resultado["saldo_final"]["p50"] / esperado - 1) < 0.01, (resultado["saldo_final"], esperado)
+
+    # E[saldo final] = fórmula fechada com a taxa média (retornos independentes, E[fator] = 1 + média)
+    media_simulada = laco(AMOSTRA_LACO, 60, "arrojado").mean()
+    esperado = float(saldo_final(SALDO, APORTE, 60, PERFIS_RETORNO["arrojado"][0]))
+    assert abs(media_simulada / esperado - 1) < 0.03, (media_simulada, esperado)
+
+    inicio = time.perf_counter()
+    laco(AMOSTRA_LACO, 60, "arrojado")
+    por_caminho = (time.perf_counter() - inicio) / AMOSTRA_LACO
+    simulador._cache_monte_carlo.clear()
+    inicio = time.perf_counter()
+    monte_carlo(SALDO, META, APORTE, 60, "arrojado", caminhos=caminhos)
+    vetorizado = time.perf_counter() - inicio
+    print(f"⏱️ {caminhos} caminhos × 60 meses: laço ~{por_caminho * caminhos:.1f}s (extrapolado de {AMOSTRA_LACO}) → "
+          f"vetorizado {vetorizado * 1000:.1f}ms ({por_caminho * caminhos / vetorizado:.0f}x)")
+
+    diferente = monte_carlo(SALDO, META, APORTE, 60, "arrojado", caminhos=caminhos, semente=43)
+    assert diferente["saldo_final"] != monte_carlo(SALDO, META, APORTE, 60, "arrojado", caminhos=caminhos)["saldo_final"]
+    print("✅ Resultados reproduzíveis pela semente, percentis ordenados e média coerente com o valor esperado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Compara as consultas antigas das páginas de cartão (filtro e agrupamento por extract(ano/mês) do
+vencimento, sem índices) com as de `parcelas.py` (intervalos de vencimento, índices
+(vencimento, paga) / (compra_id, vencimento) e a tabela fatura), conferindo os resultados, que a
+tabela fatura bate com as parcelas (o uso de índice pelas consultas quentes, via EXPLAIN QUERY PLAN,
+é conferido em tests/test_parcelas.py).
+Mede também o custo da manutenção incremental da fatura ao marcar uma parcela como paga e o de
+pagar uma fatura inteira num único UPDATE, comparado a marcar as parcelas dela uma a uma.
+
+Uso: python benchmarks/bench_parcelas.py [compras]
+"""
+import sys
+import time
+from datetime import date
+
+import numpy as np
+from sqlalchemy import extract, text
+
+from comum import criar_app
+
+from models import db, CompraCartao, ParcelaCartao
+from faturas import marcar_fatura, reconstruir_faturas, totais_da_fatura, verificar_faturas
+from parcelas import consulta_parcelas, planejamento_por_mes, totais_por_mes
+
+REPETICOES = 5
+INDICES = ("ix_parcelas_cartao_vencimento_paga", "ix_parcelas_cartao_compra_id_vencimento")
+HOJE = date(2025, 3, 15)
+
+
+def popular(n, semente=3):
+    """n compras de 1 a 12 parcelas espalhadas por 8 anos, inseridas direto no driver."""
+    rng = np.random.default_rng(semente)
+    conn = db.session.connection()
+    conn.exec_driver_sql(
+        "INSERT INTO compras_cartao (id, descricao, cartao, valor_total, total_parcelas, data_primeira_fatura, criado_em) "
+        "VALUES (?, 'Compra', ?, 0, 0, '2020-01-10', '2020-01-01')",
+        [(i + 1, c) for i, c in enumerate(rng.choice(["Nubank", "Itaú", "Inter", "C6"], n).tolist())]
+    )
+    parcelas = []
+    for compra, (inicio, quantidade) in enumerate(zip(rng.integers(0, 96, n).tolist(), rng.integers(1, 13, n).tolist())):
+        for numero in range(quantidade):
+            mes = inicio + numero
+            parcelas.append((compra + 1, numero + 1, round(float(rng.uniform(10, 300)), 2),
+                             f"{2020 + mes // 12}-{mes % 12 + 1:02d}-10", int(mes < 60)))
+    conn.exec_driver_sql(
+        "INSERT INTO parcelas_cartao (compra_id, numero, valor, vencimento, paga) VALUES (?, ?, ?, ?, ?)", parcelas
+    )
+    db.session.commit()
+    return len(parcelas)
+
+
+def consultas_antigas():
+    """Cópia das consultas que existiam nas rotas (extract sobre o vencimento)."""
+    def listar():
+        return ParcelaCartao.query.join(CompraCartao).filter(
+            extract("year", ParcelaCartao.vencimento) == HOJE.year,
+            extract("month", ParcelaCartao.vencimento) == HOJE.month
+        ).order_by(ParcelaCartao.vencimento).all()
+
+    def por_mes():
+        dados = db.session.query(
+            extract("year", ParcelaCartao.vencimento).label("ano"),
+            extract("month", ParcelaCartao.vencimento).label("mes"),
+            db.func.sum(ParcelaCartao.valor).label("total")
+        ).group_by("ano", "mes").order_by("ano", "mes").all()
+        return [{"mes": f"{int(mes):02d}/{ano}", "total": float(total)} for ano, mes, total in dados]
+
+    def planejamento():
+        dados = db.session.query(
+            extract("year", ParcelaCartao.vencimento).label("ano"),
+            extract("month", ParcelaCartao.vencimento).label("mes"),
+            CompraCartao.cartao,
+            db.func.count(ParcelaCartao.id),
+            db.func.sum(ParcelaCartao.valor)
+        ).join(CompraCartao).filter(
+            ParcelaCartao.vencimento >= HOJE,
+            extract("year", ParcelaCartao.vencimento) == HOJE.year
+        ).group_by("ano", "mes", CompraCartao.cartao).order_by("ano", "mes").all()
+        meses = {}
+        for ano, mes, cartao, quantidade, total in dados:
+            meses.setdefault(f"{int(mes):02d}/{ano}", {})[cartao or "Não informado"] = {
+                "quantidade": quantidade, "total": float(total)}
+        return meses
+
+    return {"parcelas do mês": listar, "totais por mês": por_mes, "planejamento": planejamento}
+
+
+def consultas_novas():
+    return {
+        "parcelas do mês": lambda: consulta_parcelas(HOJE.strftime("%Y-%m")).all(),
+        "totais por mês": totais_por_mes,
+        "planejamento": lambda: planejamento_por_mes(HOJE),
+    }
+
+
+def medir(consultas):
+    tempos, resultados = {}, {}
+    for rotulo, consulta in consultas.items():
+        duracoes = []
+        for _ in range(REPETICOES):
+            db.session.expunge_all()
+            inicio = time.perf_counter()
+            resultados[rotulo] = consulta()
+            duracoes.append(time.perf_counter() - inicio)
+        tempos[rotulo] = float(np.median(duracoes))
+    return tempos, resultados
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    app = criar_app("parcelas.db")
+    with app.app_context():
+        print(f"📄 {n} compras, {popular(n)} parcelas")
+
+        for indice in INDICES:
+            db.session.execute(text(f"DROP INDEX {indice}"))
+        db.session.commit()
+        antes, esperado = medir(consultas_antigas())
+
+        for indice in ParcelaCartao.__table__.indexes:
+            indice.create(db.engine)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        inicio = time.perf_counter()
+        faturas = reconstruir_faturas()
+        print(f"⏱️ reconstrução da tabela fatura ({faturas} faturas): {time.perf_counter() - inicio:.3f}s")
+        depois, obtido = medir(consultas_novas())
+
+        assert sorted(p.id for p in obtido["parcelas do mês"]) == sorted(p.id for p in esperado["parcelas do mês"])
+        arredondar = lambda totais: [(t["mes"], round(t["total"], 2)) for t in totais]
+        assert arredondar(obtido["totais por mês"]) == arredondar(esperado["totais por mês"]), "totais por mês divergentes"
+        # O planejamento agora conta a fatura inteira do mês atual (antes, só parcelas de hoje em diante)
+        assert not verificar_faturas(), "tabela fatura divergente das parcelas"
+
+        duracoes = []
+        for parcela in ParcelaCartao.query.order_by(ParcelaCartao.id).limit(20):
+            inicio = time.perf_counter()
+            parcela.paga = not parcela.paga
+            db.session.commit()
+            duracoes.append(time.perf_counter() - inicio)
+        assert not verificar_faturas(), "fatura divergente após marcar parcelas"
+        print(f"⏱️ marcar uma parcela como paga (commit + fatura): {np.median(duracoes) * 1000:.1f}ms")
+
+        mes, cartao = HOJE.strftime("%Y-%m"), "Nubank"
+        em_aberto = [linha.id for linha in consulta_parcelas(mes, cartao).filter(ParcelaCartao.paga == False)]
+        parcelas = ParcelaCartao.query.filter(ParcelaCartao.id.in_(em_aberto)).all()
+        inicio = time.perf_counter()
+        for parcela in parcelas:
+            parcela.paga = True
+            db.session.commit()
+        uma_a_uma = time.perf_counter() - inicio
+        marcar_fatura(mes, cartao, paga=False)
+        db.session.commit()
+
+        inicio = time.perf_counter()
+        alteradas = marcar_fatura(mes, cartao, paga=True)
+        db.session.commit()
+        em_lote = time.perf_counter() - inicio
+        assert len(alteradas) >= len(parcelas) and totais_da_fatura(mes, cartao)["abertas"] == 0
+        assert not verificar_faturas(), "fatura divergente após o pagamento em lote"
+        print(f"⏱️ pagar a fatura {cartao} {mes} ({len(alteradas)} parcelas): uma a uma {uma_a_uma * 1000:.1f}ms "
+              f"→ em lote {em_lote * 1000:.1f}ms ({uma_a_uma / em_lote:.0f}x)")
+
+    for rotulo in antes:
+        print(f"⏱️ {rotulo}: {antes[rotulo] * 1000:.1f}ms → {depois[rotulo] * 1000:.1f}ms "
+              f"({antes[rotulo] / depois[rotulo]:.1f}x)")
+    print("✅ Resultados iguais às consultas antigas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compara a antiga `prever_gastos` (máscaras .dt.month/.dt.year sobre o DataFrame inteiro, um número só),
+chamada uma vez por categoria e por forma de pagamento, com `previsao.projetar_mes`, que projeta
+tudo numa passada vetorizada sobre a fatia do mês de um DataFrame indexado por data. Confere que os
+números batem com a regra antiga.
+
+Depois grava os mesmos lançamentos num SQLite e mede `previsao_do_mes` sem e com cache, conferindo
+que o cache é descartado por commits que alteram dados (ORM ou INSERT direto) e mantido num rollback.
+
+Uso: python benchmarks/bench_previsao.py [linhas]
+"""
+import calendar
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from comum import criar_app, cronometro
+
+from models import db, Lancamento
+from importador import TAMANHO_LOTE, executemany_insert
+import previsao
+from previsao import previsao_do_mes, projetar_mes
+
+HOJE = date(2025, 3, 17)
+CATEGORIAS = ["Alimentação", "Transporte", "Saúde", "Lazer", "Moradia", "Educação", "Serviços", "Outros"]
+FORMAS = ["Pix", "Débito", "Crédito", "Dinheiro", "Boleto"]
+
+
+def lancamentos_sinteticos(n, semente=11):
+    """n lançamentos espalhados por 3 anos (80% despesas), indexados por data em ordem."""
+    rng = np.random.default_rng(semente)
+    datas = np.sort(np.datetime64("2023-01-01") + rng.integers(0, 365 * 3, n).astype("timedelta64[D]"))
+    return pd.DataFrame({
+        "valor": np.round(rng.gamma(2.0, 60.0, n), 2),
+        "tipo": np.where(rng.random(n) < 0.8, "Despesa", "Receita"),
+        "categoria": rng.choice(CATEGORIAS, n),
+        "forma_pagamento": rng.choice(FORMAS, n),
+    }, index=pd.DatetimeIndex(datas.astype("datetime64[ns]"), name="data"))
+
+
+def prever_gastos_legado(df_lancamentos, data_atual):
+    """Cópia da antiga previsao.prever_gastos (sem os prints)."""
+    df_mes = df_lancamentos[
+        (df_lancamentos['data'].dt.month == data_atual.month) &
+        (df_lancamentos['data'].dt.year == data_atual.year) &
+        (df_lancamentos['tipo'] == 'Despesa')
+    ]
+    if df_mes.empty:
+        return 0.0
+    gastos_por_dia = df_mes.groupby(df_mes['data'].dt.date)['valor'].sum()
+    if len(gastos_por_dia) < 2:
+        return 0.0
+    dias_restantes = calendar.monthrange(data_atual.year, data_atual.month)[1] - data_atual.day
+    return round(gastos_por_dia.mean() * dias_restantes, 2)
+
+
+def legado(df):
+    """O que seria preciso para ter os mesmos números com a função antiga: uma chamada por grupo."""
+    colunas = df.reset_index()
+    resultado = {"total": prever_gastos_legado(colunas, HOJE)}
+    for chave, coluna in previsao.DIMENSOES.items():
+        resultado[chave] = {nome: prever_gastos_legado(colunas[colunas[coluna] == nome], HOJE)
+                            for nome in colunas[coluna].unique()}
+    return resultado
+
+
+def medir(funcao, repeticoes=3):
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        duracoes.append(time.perf_counter() - inicio)
+    return resultado, float(np.median(duracoes))
+
+
+def gravar(df):
+    conn = db.session.connection()
+    executemany_insert(conn, Lancamento.__table__, {
+        "competencia": df.index.strftime("%Y-%m").tolist(),
+        "data": df.index.strftime("%Y-%m-%d").tolist(),  # texto AAAA-MM-DD, como a coluna Date é gravada
+        "descricao": ["Compra"] * len(df),
+        "estabelecimento": [""] * len(df),
+        "valor": df["valor"].tolist(),
+        "tipo": df["tipo"].tolist(),
+        "categoria": df["categoria"].tolist(),
+        "forma_pagamento": df["forma_pagamento"].tolist(),
+    }, TAMANHO_LOTE)
+    db.session.commit()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = lancamentos_sinteticos(n)
+    mes = HOJE.strftime("%Y-%m")
+    print(f"📄 {n} lançamentos, {len(previsao.fatia_do_mes(df, mes))} no mês {mes}")
+
+    esperado, antes = medir(lambda: legado(df), repeticoes=1)
+    obtido, depois = medir(lambda: projetar_mes(df, mes, HOJE))
+    assert obtido["total"]["restante"] == esperado["total"], (obtido["total"], esperado["total"])
+    for chave in previsao.DIMENSOES:
+        assert {linha["nome"]: linha["restante"] for linha in obtido[chave]} == esperado[chave], chave
+    print(f"⏱️ previsão por categoria e forma de pagamento ({n} linhas): {antes * 1000:.1f}ms → "
+          f"{depois * 1000:.1f}ms ({antes / depois:.0f}x)")
+
+    app = criar_app("previsao.db")
+    with app.app_context():
+        with cronometro(f"gravação de {n} lançamentos"):
+            gravar(df)
+
+        previsao.invalidar()
+        banco, sem_cache = medir(lambda: (previsao.invalidar(), previsao_do_mes(mes, HOJE))[1])
+        _, com_cache = medir(lambda: previsao_do_mes(mes, HOJE))
+        assert banco["total"] == obtido["total"] and banco["categorias"] == obtido["categorias"]
+        print(f"⏱️ previsao_do_mes: sem cache {sem_cache * 1000:.1f}ms → em cache {com_cache * 1000:.3f}ms")
+
+        previsao_do_mes(mes, HOJE)
+        db.session.add(Lancamento(competencia=mes, data=HOJE, descricao="Extra", valor=1000.0, tipo="Despesa",
+                                  categoria="Lazer", forma_pagamento="Pix"))
+        db.session.rollback()
+        assert previsao_do_mes(mes, HOJE) is previsao_do_mes(mes, HOJE), "rollback não deveria descartar o cache"
+
+        db.session.add(Lancamento(competencia=mes, data=HOJE, descricao="Extra", valor=1000.0, tipo="Despesa",
+                                  categoria="Lazer", forma_pagamento="Pix"))
+        db.session.commit()
+        depois_orm = previsao_do_mes(mes, HOJE)
+        assert round(depois_orm["total"]["realizado"] - banco["total"]["realizado"], 2) == 1000.0
+
+        gravar(df.iloc[-1:].set_axis(pd.DatetimeIndex([datetime(2025, 3, 2)], name="data")).assign(
+            valor=500.0, tipo="Despesa"))
+        depois_insert = previsao_do_mes(mes, HOJE)
+        assert round(depois_insert["total"]["realizado"] - depois_orm["total"]["realizado"], 2) == 500.0
+
+    print("✅ Mesmos números da regra antiga; cache descartado só por commits que alteram lançamentos")
+
+
+if __name__ == "__main__":
+    main()
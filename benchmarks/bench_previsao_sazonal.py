@@ -0,0 +1,126 @@
+"""
+Previsão sazonal por categoria: compara o caminho ingênuo (ler todos os lançamentos e ajustar uma
+categoria por vez, mês a mês) com `previsao_sazonal.atualizar_previsoes`, que ajusta todas as séries
+numa passada vetorizada sobre o resumo mensal. Confere os números contra o ajuste ingênuo, que os
+picos sazonais conhecidos (13º em dezembro, IPVA em janeiro) são previstos e que a tabela só é
+reajustada quando o histórico fechado muda.
+
+Uso: python benchmarks/bench_previsao_sazonal.py [linhas]
+"""
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from comum import criar_app, cronometro
+
+from models import db, Lancamento, PrevisaoMensal
+from importador import TAMANHO_LOTE, executemany_insert
+from resumo_mensal import reconstruir_resumo
+from previsao_sazonal import (HORIZONTE, TEMPORADA, atualizar_previsoes, fluxo_previsto, indice_do_mes,
+                              mes_do_indice, previsao_desatualizada, ultimo_mes_fechado)
+
+HOJE = date(2025, 7, 10)
+CATEGORIAS = 40
+
+
+def lancamentos_sinteticos(n, semente=5):
+    """
+    n lançamentos de jan/2019 a jun/2025 em CATEGORIAS categorias de despesa, mais salário (com 13º em
+    dezembro) e IPVA em janeiro.
+    """
+    rng = np.random.default_rng(semente)
+    meses = indice_do_mes(ultimo_mes_fechado(HOJE)) - indice_do_mes("2019-01") + 1
+    indice = indice_do_mes("2019-01") + rng.integers(0, meses, n)
+    categoria = rng.integers(0, CATEGORIAS, n)
+    fixas = []
+    for i in range(indice_do_mes("2019-01"), indice_do_mes("2019-01") + meses):
+        fixas.append((i, "Receita", "Salário", 5000.0 + (5000.0 if i % 12 == 11 else 0.0)))
+        if i % 12 == 0:
+            fixas.append((i, "Despesa", "IPVA", 1800.0))
+    indices = np.concatenate([indice, [f[0] for f in fixas]])
+    competencias = [mes_do_indice(int(i)) for i in indices]
+    return pd.DataFrame({
+        "competencia": competencias,
+        "data": [f"{c}-10" for c in competencias],
+        "descricao": "Compra",
+        "estabelecimento": "",
+        "valor": np.concatenate([np.round(rng.gamma(2.0, 30.0, n) * (1 + 0.5 * (indice % 12 == 1)), 2),
+                                 [f[3] for f in fixas]]),
+        "tipo": ["Despesa"] * n + [f[1] for f in fixas],
+        "categoria": [f"Categoria {c:02d}" for c in categoria] + [f[2] for f in fixas],
+        "forma_pagamento": "Pix",
+    })
+
+
+def ajuste_ingenuo():
+    """Lê todos os lançamentos e ajusta o mesmo modelo uma série por vez, com laços por mês."""
+    base = indice_do_mes(ultimo_mes_fechado(HOJE))
+    df = pd.read_sql("SELECT competencia, tipo, categoria, valor FROM lancamento", db.engine)
+    previsoes = {}
+    for (tipo, categoria), grupo in df.groupby(["tipo", "categoria"]):
+        por_mes = grupo.groupby("competencia")["valor"].sum()
+        inicio = min(indice_do_mes(m) for m in por_mes.index)
+        serie = [float(por_mes.get(mes_do_indice(i), 0.0)) for i in range(inicio, base + 1)]
+        desvios = {m: [] for m in range(TEMPORADA)}
+        for t in range(TEMPORADA - 1, len(serie)):
+            media = sum(serie[t - TEMPORADA + 1:t + 1]) / TEMPORADA
+            desvios[(inicio + t) % TEMPORADA].append(serie[t] - media)
+        sazonal = {m: sum(v) / len(v) for m, v in desvios.items() if v}
+        centro = sum(sazonal.values()) / len(sazonal) if sazonal else 0.0
+        recentes = serie[-TEMPORADA:]
+        nivel = sum(recentes) / len(recentes)
+        for h in range(HORIZONTE):
+            mes = base + 1 + h
+            efeito = sazonal[mes % TEMPORADA] - centro if mes % TEMPORADA in sazonal else 0.0
+            previsoes[(mes_do_indice(mes), tipo, categoria)] = round(max(nivel + efeito, 0.0), 2)
+    return previsoes
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = criar_app("previsao_sazonal.db")
+    with app.app_context():
+        df = lancamentos_sinteticos(n)
+        with cronometro(f"gravação de {len(df)} lançamentos e do resumo mensal"):
+            executemany_insert(db.session.connection(), Lancamento.__table__,
+                               {c: df[c].tolist() if c in ("valor", "competencia", "data", "tipo", "categoria")
+                                else [df[c].iloc[0]] * len(df) for c in df.columns}, TAMANHO_LOTE)
+            db.session.commit()
+            reconstruir_resumo()
+
+        inicio = time.perf_counter()
+        esperado = ajuste_ingenuo()
+        antes = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        linhas = atualizar_previsoes(HOJE)
+        depois = time.perf_counter() - inicio
+        obtido = {(p.mes, p.tipo, p.categoria): p.valor for p in PrevisaoMensal.query}
+        assert obtido.keys() == esperado.keys() and linhas == len(esperado)
+        diferenca = max(abs(obtido[k] - esperado[k]) for k in esperado)
+        assert diferenca <= 0.011, f"diferença máxima {diferenca}"
+        print(f"⏱️ ajuste de {len(esperado) // HORIZONTE} séries × {HORIZONTE} meses: ingênuo {antes:.3f}s → "
+              f"vetorizado {depois:.3f}s ({antes / depois:.0f}x)")
+
+        assert obtido[("2025-12", "Receita", "Salário")] == 10000.0 and obtido[("2025-11", "Receita", "Salário")] == 5000.0
+        assert obtido[("2026-01", "Despesa", "IPVA")] == 1800.0 and obtido[("2025-08", "Despesa", "IPVA")] == 0.0
+
+        inicio = time.perf_counter()
+        assert atualizar_previsoes(HOJE) is None and not previsao_desatualizada(HOJE)
+        print(f"⏱️ conferência sem reajuste (histórico igual): {(time.perf_counter() - inicio) * 1000:.2f}ms")
+
+        inicio = time.perf_counter()
+        fluxo = fluxo_previsto("2025-07", "2026-07")
+        print(f"⏱️ leitura do fluxo previsto (12 meses): {(time.perf_counter() - inicio) * 1000:.2f}ms")
+        assert len(fluxo) == 12 and fluxo["2025-12"]["receitas"] == 10000.0
+
+        assert previsao_desatualizada(date(2025, 8, 1)), "mês fechado deveria pedir reajuste"
+
+    print("✅ Previsões iguais ao ajuste série a série, sazonalidade recuperada e reajuste só quando necessário")
+
+
+if __name__ == "__main__":
+    main()
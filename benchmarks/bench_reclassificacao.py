@@ -0,0 +1,100 @@
+"""
+Compara o laço antigo de /reclassificar_antigos (objeto por linha, consulta de Categoria por
+linha e commit dentro do laço) com o motor em lote de `reclassificacao.py`, conferindo que
+as categorias finais e o resumo mensal batem.
+
+Uso: python benchmarks/bench_reclassificacao.py [linhas]
+"""
+import sys
+from datetime import date
+
+import numpy as np
+from sqlalchemy import insert
+
+from comum import criar_app, cronometro
+
+from models import db, Categoria, Lancamento
+from cache_categorias import categoria_de, usar_correcoes
+from reclassificacao import aplicar, categorias_faltando, planejar
+from resumo_mensal import reconstruir_resumo, verificar_resumo
+
+DESCRICOES = ["UBER *TRIP", "Farmácia Pague Menos", "Academia Smart", "Cinema Center", "Mercado Livre",
+              "Transferência", "Loja Desconhecida", "Padaria do Bairro", "Pizza Hut", "Posto Shell"]
+
+
+def popular(n, semente=11):
+    """Lançamentos "Outros" com descrições de extrato (termo + código), como após uma importação antiga."""
+    rng = np.random.default_rng(semente)
+    descricoes = rng.choice(DESCRICOES, n)
+    codigos = rng.integers(1000, 99999, n)
+    meses = rng.integers(1, 13, n)
+    db.session.execute(insert(Lancamento.__table__), [
+        {"competencia": f"2024-{m:02d}", "data": date(2024, int(m), 10), "descricao": f"{d} {c}",
+         "estabelecimento": "", "valor": float(v), "tipo": "Despesa", "categoria": "Outros",
+         "forma_pagamento": "Pix"}
+        for d, c, m, v in zip(descricoes, codigos, meses, np.round(rng.uniform(5, 500, n), 2))
+    ])
+    db.session.commit()
+    reconstruir_resumo()
+
+
+def reclassificar_legado():
+    """Cópia fiel do laço que existia em /reclassificar_antigos."""
+    lancamentos = Lancamento.query.filter_by(categoria="Outros").all()
+    atualizados = 0
+
+    for l in lancamentos:
+        nova_categoria = categoria_de(l.descricao, l.estabelecimento)
+
+        if nova_categoria and nova_categoria != "Outros":
+            categoria_obj = Categoria.query.filter_by(nome=nova_categoria).first()
+            if not categoria_obj:
+                categoria_obj = Categoria(nome=nova_categoria, tipo="Despesa", meta_mensal=None)
+                db.session.add(categoria_obj)
+                db.session.commit()
+
+            l.categoria = categoria_obj.nome
+            atualizados += 1
+
+    db.session.commit()
+    return atualizados
+
+
+def categorias_finais():
+    return dict(db.session.query(Lancamento.id, Lancamento.categoria).all())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"📄 {n} lançamentos em \"Outros\"")
+    resultados = {}
+
+    app = criar_app("legado.db")
+    with app.app_context():
+        popular(n)
+        with cronometro("laço legado", resultados):
+            esperado_alterados = reclassificar_legado()
+        esperado = categorias_finais()
+        assert not verificar_resumo()
+
+    app = criar_app("lote.db")
+    with app.app_context():
+        popular(n)
+        # LRU de estabelecimentos zerado antes de cada medição: nada aproveitado do laço legado
+        usar_correcoes({})
+        with cronometro("simulação (plano)", resultados):
+            _, plano = planejar(gravar=False)
+        usar_correcoes({})
+        with cronometro("reclassificação em lote", resultados):
+            _, plano = planejar()
+            alterados = aplicar(plano, categorias_faltando(plano))
+        assert alterados == esperado_alterados
+        assert categorias_finais() == esperado, "categorias divergentes do laço legado"
+        assert not verificar_resumo()
+
+    print(f"✅ {alterados} lançamentos reclassificados, iguais ao laço legado e com o resumo em dia")
+    print(f"🚀 {resultados['laço legado'] / resultados['reclassificação em lote']:.1f}x mais rápido que o laço legado")
+
+
+if __name__ == "__main__":
+    main()
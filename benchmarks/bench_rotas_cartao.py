@@ -0,0 +1,137 @@
+"""
+Quantidade de comandos SQL por rota de cartão, com a base pequena (compras de 3 parcelas) e grande
+(10x mais compras, de 12 parcelas). A contagem tem de ser a mesma nas duas: se crescer com o número de
+compras ou parcelas, há N+1. Aponta também consultas de compra que arrastam as parcelas por JOIN
+(uma linha por parcela para cada compra). As mesmas verificações rodam, numa base menor, em
+tests/test_rotas_cartao.py; aqui servem para inspecionar os comandos com bases maiores.
+
+Usa o app completo (financeiro.py) sobre um SQLite temporário.
+
+Uso: python benchmarks/bench_rotas_cartao.py [compras]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import event
+
+import comum  # noqa: F401 (coloca a raiz do projeto no sys.path)
+
+HOJE = date.today()
+MES = HOJE.strftime("%Y-%m")
+
+
+def carregar_app():
+    """Importa financeiro.py apontando para um banco e um modelo de categorias temporários."""
+    pasta = tempfile.mkdtemp(prefix="financeiro_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(pasta, 'rotas.db')}"
+    os.environ["MODELO_CATEGORIAS"] = os.path.join(pasta, "modelo_categorias.npz")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import financeiro
+    return financeiro.app
+
+
+def popular(n, parcelas):
+    """n compras de `parcelas` parcelas, começando no mês atual, via cadastro em lote."""
+    from compras_lote import importar_compras
+    return importar_compras(pd.DataFrame({
+        "descricao": [f"Compra {i}" for i in range(n)],
+        "cartao": ["Nubank", "Itaú"] * (n // 2) + ["Nubank"] * (n % 2),
+        "valor_total": [100 + i for i in range(n)],
+        "total_parcelas": parcelas,
+        "data_primeira_fatura": HOJE.isoformat(),
+    }))
+
+
+def rotas(cliente, parcelas):
+    """(rótulo, requisição) das rotas de cartão; a compra 1 tem `parcelas` parcelas."""
+    return [
+        ("GET  /cartao/nova", lambda: cliente.get("/cartao/nova")),
+        ("POST /cartao/nova", lambda: cliente.post("/cartao/nova", data={
+            "descricao": "Nova", "cartao": "Nubank", "valor_total": "120", "total_parcelas": str(parcelas),
+            "data_primeira_fatura": HOJE.isoformat()})),
+        ("POST /cartao/nova (duplicada)", lambda: cliente.post("/cartao/nova", data={
+            "descricao": "Nova", "cartao": "Nubank", "valor_total": "120", "total_parcelas": str(parcelas),
+            "data_primeira_fatura": HOJE.isoformat()})),
+        ("GET  /cartao/parcelas", lambda: cliente.get("/cartao/parcelas")),
+        ("GET  /cartao/parcelas?mes", lambda: cliente.get(f"/cartao/parcelas?mes={MES}")),
+        ("GET  /cartao/parcela/editar/1", lambda: cliente.get("/cartao/parcela/editar/1")),
+        ("POST /cartao/parcela/editar/1", lambda: cliente.post("/cartao/parcela/editar/1", data={
+            "valor": "10", "vencimento": HOJE.isoformat()})),
+        ("GET  /cartao/editar/1", lambda: cliente.get("/cartao/editar/1")),
+        ("POST /cartao/editar/1", lambda: cliente.post("/cartao/editar/1", data={
+            "descricao": "Compra 0", "cartao": "Nubank", "valor_total": "100",
+            "data_primeira_fatura": HOJE.isoformat()})),
+        ("GET  /cartao/compra/editar-completo/1", lambda: cliente.get("/cartao/compra/editar-completo/1")),
+        ("POST /cartao/compra/editar-completo/1", lambda: cliente.post("/cartao/compra/editar-completo/1", data={
+            "descricao": "Compra 0", "cartao": "Nubank", "total_parcelas": str(parcelas), "valor_2": "9"})),
+        ("POST /cartao/compra/editar-completo/1 (reparcela)", lambda: cliente.post("/cartao/compra/editar-completo/1", data={
+            "descricao": "Compra 0", "cartao": "Nubank", "total_parcelas": str(parcelas + 1)})),
+        ("POST /cartao/parcela/1/toggle", lambda: cliente.post("/cartao/parcela/1/toggle")),
+        ("POST /cartao/fatura/pagamento", lambda: cliente.post("/cartao/fatura/pagamento", json={
+            "mes": MES, "cartao": "Nubank", "paga": True})),
+        ("GET  /planejamento", lambda: cliente.get("/planejamento")),
+        ("GET  /api/parcelas-por-mes", lambda: cliente.get("/api/parcelas-por-mes")),
+        ("GET  /api/planejamento-por-cartao", lambda: cliente.get("/api/planejamento-por-cartao")),
+        ("POST /cartao/excluir/1", lambda: cliente.post("/cartao/excluir/1")),
+    ]
+
+
+def contar(app, n, parcelas):
+    """{rota: [comandos SQL]} com a base recriada com n compras de `parcelas` parcelas."""
+    from models import db
+    from previsao_sazonal import atualizar_previsoes
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        popular(n, parcelas)
+        atualizar_previsoes()  # previsão em dia: /planejamento não dispara o reajuste em segundo plano
+        motor = db.engine
+
+    comandos = []
+
+    def registrar(conn, cursor, sql, parametros, contexto, executemany):
+        comandos.append(" ".join(sql.split()))
+
+    event.listen(motor, "before_cursor_execute", registrar)
+    resultado = {}
+    try:
+        cliente = app.test_client()
+        for rotulo, requisicao in rotas(cliente, parcelas):
+            comandos.clear()
+            resposta = requisicao()
+            assert resposta.status_code < 400, f"{rotulo}: HTTP {resposta.status_code}"
+            resultado[rotulo] = list(comandos)
+    finally:
+        event.remove(motor, "before_cursor_execute", registrar)
+    return resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = carregar_app()
+    pequena = contar(app, n, 3)
+    grande = contar(app, n * 10, 12)
+
+    problemas = []
+    for rotulo, comandos in grande.items():
+        print(f"🔎 {rotulo:<50} {len(pequena[rotulo]):>3} → {len(comandos):>3} comandos")
+        if len(comandos) != len(pequena[rotulo]):
+            problemas.append(f"{rotulo}: {len(pequena[rotulo])} → {len(comandos)} comandos (N+1)")
+        for sql in comandos:
+            if sql.startswith("SELECT") and "JOIN parcelas_cartao" in sql:
+                problemas.append(f"{rotulo}: compra carregada com JOIN nas parcelas — {sql[:120]}")
+
+    for problema in problemas:
+        print(f"⚠️ {problema}")
+    if problemas:
+        raise SystemExit(1)
+    print("✅ Contagem de comandos constante em todas as rotas de cartão e nenhuma compra carregada com JOIN nas parcelas")
+
+
+if __name__ == "__main__":
+    main()
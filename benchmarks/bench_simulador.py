@@ -0,0 +1,70 @@
+"""
+Compara o cálculo antigo do simulador (laço mês a mês para o saldo e soma de potências para o fator
+da anuidade, um cenário por vez) com a grade de `simulador.grade_cenarios`, que avalia todos os
+cenários aportes × prazos × taxas com as fórmulas fechadas vetorizadas. Confere os números e mede a
+grade repetida (cache).
+
+Uso: python benchmarks/bench_simulador.py [aportes] [prazos] [taxas]
+"""
+import sys
+import time
+
+import numpy as np
+
+import comum  # noqa: F401 (coloca a raiz do projeto no sys.path)
+
+import simulador
+from simulador import grade_cenarios
+
+SALDO, META = 2_000.0, 50_000.0
+
+
+def cenario_legado(saldo, meta, aporte, prazo, taxa):
+    """Cópia do cálculo de /api/sugestao_aplicacao, com a taxa fixa de 0,3% trocada por `taxa`."""
+    saldo_simulado = saldo
+    for _ in range(prazo):
+        saldo_simulado += aporte
+        saldo_simulado *= 1 + taxa
+    fator = sum([(1 + taxa) ** i for i in range(1, prazo + 1)])
+    aporte_ideal = max((meta - saldo * (1 + taxa) ** prazo) / fator, 0.0)
+    return saldo_simulado, aporte_ideal
+
+
+def main():
+    quantidades = [int(v) for v in sys.argv[1:4]] + [40, 60, 12][len(sys.argv[1:4]):]
+    aportes = np.linspace(100, 4_000, quantidades[0])
+    prazos = np.unique(np.linspace(1, 360, quantidades[1]).round())
+    taxas = np.round(np.linspace(0, 1.1, quantidades[2]), 4)
+    total = len(aportes) * len(prazos) * len(taxas)
+    print(f"📄 {len(aportes)} aportes × {len(prazos)} prazos × {len(taxas)} taxas = {total} cenários")
+
+    inicio = time.perf_counter()
+    esperado = np.empty((len(taxas), len(prazos), len(aportes)))
+    necessario = np.empty((len(taxas), len(prazos)))
+    for t, taxa in enumerate(taxas):
+        for p, prazo in enumerate(prazos):
+            for a, aporte in enumerate(aportes):
+                esperado[t, p, a], necessario[t, p] = cenario_legado(SALDO, META, aporte, int(prazo), taxa / 100)
+    antes = time.perf_counter() - inicio
+
+    simulador._cache.clear()
+    inicio = time.perf_counter()
+    grade = grade_cenarios(SALDO, META, aportes.tolist(), prazos.tolist(), taxas.tolist())
+    depois = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    repetida = grade_cenarios(SALDO, META, aportes.tolist(), prazos.tolist(), taxas.tolist())
+    em_cache = time.perf_counter() - inicio
+
+    assert grade["cenarios"] == total and repetida is grade
+    assert np.allclose(grade["saldo_final"], np.round(esperado, 2), rtol=1e-9, atol=0.01)
+    assert np.allclose(grade["aporte_necessario"], np.round(necessario, 2), rtol=1e-9, atol=0.01)
+    assert np.array_equal(grade["atinge_meta"], esperado >= META)
+
+    print(f"⏱️ grade de cenários: laço {antes:.3f}s → vetorizado {depois * 1000:.1f}ms ({antes / depois:.0f}x); "
+          f"repetida (cache) {em_cache * 1000:.3f}ms")
+    print("✅ Saldos finais e aportes necessários iguais ao cálculo cenário a cenário")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Utilidades compartilhadas pelos benchmarks (app Flask isolado com SQLite temporário)."""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from models import db
+
+
+def criar_app(nome="benchmark.db"):
+    """Cria um app Flask apontando para um SQLite novo em diretório temporário."""
+    pasta = tempfile.mkdtemp(prefix="financeiro_bench_")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(pasta, nome)}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["MODELO_CATEGORIAS"] = os.path.join(pasta, "modelo_categorias.npz")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@contextmanager
+def cronometro(rotulo, resultados=None):
+    inicio = time.perf_counter()
+    yield
+    duracao = time.perf_counter() - inicio
+    print(f"⏱️ {rotulo}: {duracao:.3f}s")
+    if resultados is not None:
+        resultados[rotulo] = duracao
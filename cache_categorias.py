@@ -0,0 +1,231 @@
+import pandas as pd
+from flask import has_app_context
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session
+
+from models import db, EstabelecimentoCategoria, RegraCategoria
+from cache_lru import CacheLRU
+from classificador import limpar, normalizar, normalizar_juntos
+from modelo_categorias import aprender, classificar, classificar_serie
+
+TAMANHO_CACHE = 20_000
+TAMANHO_CONSULTA = 500  # chaves por SELECT ... IN
+
+
+# ============================
+# 🔹 Chave do estabelecimento
+# ============================
+def chave_estabelecimento(descricao, estabelecimento=""):
+    """Estabelecimento (ou, na falta dele, a descrição) normalizado e sem códigos: "UBER *TRIP 4821" → "uber trip"."""
+    texto = (estabelecimento or "").strip() or (descricao or "")
+    return limpar(normalizar(texto)).strip()[:100]
+
+
+def chaves_serie(descricoes, estabelecimentos):
+    """`chave_estabelecimento` para Series inteiras, normalizando cada texto distinto uma única vez."""
+    textos = estabelecimentos.where(estabelecimentos.str.strip() != "", descricoes)
+    codigos, unicos = pd.factorize(textos)
+    if not len(unicos):
+        return pd.Series("", index=textos.index, dtype=object)
+    junto, _ = normalizar_juntos(unicos)
+    chaves = pd.Index([c.strip()[:100] for c in limpar(junto).split("\n")], dtype=object)
+    return pd.Series(chaves[codigos], index=textos.index, dtype=object)
+
+
+# ============================
+# 🔹 LRU em memória
+# ============================
+_cache = CacheLRU(TAMANHO_CACHE)
+
+
+def _anotar_no_cache(chaves):
+    """
+    Anota na sessão as chaves que o LRU terá antes de o banco confirmar: se a transação for desfeita,
+    só elas saem do cache (ver `_descartar_chaves_no_rollback`).
+    """
+    db.session.info.setdefault("chaves_cache", set()).update(chaves)
+
+
+# ============================
+# 🔹 Tabela merchant_categoria
+# ============================
+def _buscar_no_banco(chaves, origem=None):
+    """Categorias gravadas para as chaves, opcionalmente só de uma origem (fora do app, ex.: processos do pool: nenhuma)."""
+    if not chaves or not has_app_context():
+        return {}
+    tabela = EstabelecimentoCategoria.__table__
+    encontradas = {}
+    for inicio in range(0, len(chaves), TAMANHO_CONSULTA):
+        lote = chaves[inicio:inicio + TAMANHO_CONSULTA]
+        consulta = select(tabela.c.chave, tabela.c.categoria).where(tabela.c.chave.in_(lote))
+        if origem is not None:
+            consulta = consulta.where(tabela.c.origem == origem)
+        encontradas.update(db.session.execute(consulta).all())
+    return encontradas
+
+
+def _gravar(categorias, renovar=False):
+    """
+    Agenda os resultados do classificador para gravação no commit da transação atual (ver
+    `_gravar_pendentes`): assim a escrita não prende o banco durante a classificação/importação.
+    Com `renovar`, as linhas que o classificador já tinha gravado para essas chaves são substituídas.
+    """
+    if not categorias or not has_app_context():
+        return
+    db.session.info.setdefault("categorias_pendentes", {}).update(categorias)
+    if renovar:
+        db.session.info.setdefault("chaves_renovadas", set()).update(categorias)
+    _anotar_no_cache(categorias)
+
+
+def correcoes_do_usuario():
+    """Correções manuais gravadas ({chave: categoria}), para repassar a processos sem banco."""
+    return dict(db.session.execute(
+        select(EstabelecimentoCategoria.chave, EstabelecimentoCategoria.categoria)
+        .where(EstabelecimentoCategoria.origem == "usuario")
+    ).all())
+
+
+def usar_correcoes(correcoes):
+    """Zera o cache e o semeia com as correções (processos do pool, que não acessam o banco)."""
+    _cache.clear()
+    for chave, categoria in correcoes.items():
+        _cache.put(chave, categoria)
+
+
+# ============================
+# 🔹 Consulta: LRU → tabela → classificador (modelo treinado + regras)
+# ============================
+def categoria_de(descricao, estabelecimento="", gravar=True):
+    """Categoria do lançamento: acerto no cache, depois na tabela e só então o classificador (resultado gravado)."""
+    chave = chave_estabelecimento(descricao, estabelecimento)
+    if not chave:
+        return classificar(descricao, estabelecimento)
+
+    categoria = _cache.get(chave)
+    if categoria is None:
+        categoria = _buscar_no_banco([chave]).get(chave)
+        if categoria is None:
+            categoria = classificar(descricao, estabelecimento)
+            if gravar:
+                _gravar({chave: categoria})
+        _cache.put(chave, categoria)
+    return categoria
+
+
+def categorias_serie(descricoes, estabelecimentos=None, gravar=True, renovar=False):
+    """
+    Versão em lote de `categoria_de`: cada estabelecimento distinto é buscado uma vez no cache/tabela,
+    e os que faltam são classificados a partir da primeira linha em que aparecem.
+    Com `renovar`, só valem as correções do usuário: o LRU e o que o classificador gravou são ignorados
+    e refeitos (ex.: reclassificação dos "Outros", que um classificador antigo deixou guardados).
+    """
+    descricoes = pd.Series(descricoes).fillna("").astype(str)
+    if estabelecimentos is None:
+        estabelecimentos = pd.Series("", index=descricoes.index)
+    estabelecimentos = pd.Series(estabelecimentos, index=descricoes.index).fillna("").astype(str)
+
+    chaves = chaves_serie(descricoes, estabelecimentos)
+    unicas = [c for c in chaves.unique() if c]
+    encontradas = {}
+    for chave in unicas if not renovar else ():
+        categoria = _cache.get(chave)
+        if categoria is not None:
+            encontradas[chave] = categoria
+    encontradas.update(_buscar_no_banco(
+        [c for c in unicas if c not in encontradas], origem="usuario" if renovar else None
+    ))
+
+    faltando = [c for c in unicas if c not in encontradas]
+    if faltando:
+        primeiras = chaves[chaves.isin(faltando)].drop_duplicates()
+        classificadas = classificar_serie(
+            descricoes[primeiras.index], estabelecimentos[primeiras.index]
+        )
+        novas = dict(zip(primeiras, classificadas))
+        if gravar:
+            _gravar(novas, renovar=renovar)
+        encontradas.update(novas)
+
+    if gravar or not renovar:  # numa simulação da renovação, o LRU continua igual à tabela
+        for chave in unicas:
+            _cache.put(chave, encontradas[chave])
+
+    resultado = chaves.map(encontradas)
+    sem_chave = chaves == ""
+    if sem_chave.any():
+        resultado[sem_chave] = classificar_serie(
+            descricoes[sem_chave], estabelecimentos[sem_chave]
+        )
+    return resultado.astype(object)
+
+
+def registrar_correcao(descricao, estabelecimento, categoria):
+    """Grava a categoria escolhida pelo usuário para o estabelecimento (vale também nas próximas importações)."""
+    chave = chave_estabelecimento(descricao, estabelecimento)
+    if not chave:
+        return
+    registro = db.session.get(EstabelecimentoCategoria, chave)
+    if registro is None:
+        db.session.add(EstabelecimentoCategoria(chave=chave, categoria=categoria, origem="usuario"))
+    else:
+        registro.categoria = categoria
+        registro.origem = "usuario"
+    _anotar_no_cache([chave])
+    _cache.put(chave, categoria)
+    aprender(descricao, estabelecimento, categoria)
+
+
+def descartar_classificados():
+    """Agenda, para o próximo commit, o descarte das categorias vindas do classificador (ex.: modelo retreinado)."""
+    db.session.info["descartar_classificados"] = True
+
+
+# ============================
+# 🔹 Hooks da sessão: gravação no commit e descarte quando as regras ou o modelo mudam
+# ============================
+@event.listens_for(Session, "before_commit")
+def _descartar_classificados(session):
+    pendentes = (*session.new, *session.dirty, *session.deleted)
+    if (session.info.pop("descartar_classificados", False) or session.info.get("regras_alteradas")
+            or any(isinstance(obj, RegraCategoria) for obj in pendentes)):
+        session.execute(delete(EstabelecimentoCategoria.__table__).where(
+            EstabelecimentoCategoria.__table__.c.origem == "classificador"
+        ))
+        session.info["limpar_cache_categorias"] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _gravar_pendentes(session):
+    # Renovadas: o que o classificador tinha gravado sai antes; correções do usuário nunca são substituídas
+    renovadas = list(session.info.pop("chaves_renovadas", ()))
+    tabela = EstabelecimentoCategoria.__table__
+    for inicio in range(0, len(renovadas), TAMANHO_CONSULTA):
+        session.execute(delete(tabela).where(
+            tabela.c.chave.in_(renovadas[inicio:inicio + TAMANHO_CONSULTA]), tabela.c.origem == "classificador"
+        ))
+    # Chaves já gravadas (ex.: outro job, ou correção do usuário) ficam como estão
+    pendentes = session.info.pop("categorias_pendentes", None)
+    if pendentes:
+        session.execute(
+            insert(tabela).prefix_with("OR IGNORE", dialect="sqlite"),
+            [{"chave": chave, "categoria": categoria, "origem": "classificador"} for chave, categoria in pendentes.items()]
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _limpar_cache(session):
+    session.info.pop("chaves_cache", None)
+    if session.info.pop("limpar_cache_categorias", False):
+        _cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_chaves_no_rollback(session):
+    # Correções/classificações da transação desfeita podem estar só no LRU: saem só as chaves desta sessão
+    session.info.pop("limpar_cache_categorias", None)
+    session.info.pop("categorias_pendentes", None)
+    session.info.pop("chaves_renovadas", None)
+    session.info.pop("descartar_classificados", None)
+    for chave in session.info.pop("chaves_cache", ()):
+        _cache.pop(chave)
@@ -0,0 +1,36 @@
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Dicionário limitado e seguro entre threads: ao passar de `tamanho`, descarta a chave usada há mais tempo."""
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def get(self, chave):
+        with self._trava:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+
+    def put(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def pop(self, chave):
+        with self._trava:
+            return self._itens.pop(chave, None)
+
+    def clear(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
@@ -0,0 +1,248 @@
+import re
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from unidecode import unidecode
+
+from models import RegraCategoria
+from utils import CATEGORIAS_PALAVRAS
+
+CATEGORIA_PADRAO = "Outros"
+CAMPOS = ("descricao", "estabelecimento")
+
+# Palavras com 3+ dígitos (códigos de transação, datas, parcelas) não identificam o estabelecimento
+_CODIGOS = re.compile(r"(?<!\S)\S*\d\S*\d\S*\d\S*(?!\S)")
+_SIMBOLOS = re.compile(r"[^a-z0-9\n]+")
+# Até quantas palavras por campo a Series é varrida palavra a palavra (busca literal, em C) em vez do
+# regex em árvore: com poucas regras, testar o lookahead em cada posição do texto custa mais
+PALAVRAS_POR_VARREDURA = 64
+
+
+class Regra(NamedTuple):
+    """Palavra-chave → categoria. `campo`: descricao, estabelecimento ou qualquer."""
+    palavra: str
+    categoria: str
+    campo: str = "descricao"
+
+
+# Regras da antiga cadeia if/elif de modelo_ia.classificar_texto, na mesma ordem
+REGRAS_MODELO = [
+    Regra("mercado", "Alimentação"),
+    Regra("supermercado", "Alimentação", "estabelecimento"),
+    Regra("uber", "Transporte"),
+    Regra("99", "Transporte", "estabelecimento"),
+    Regra("farmácia", "Saúde"),
+    Regra("remédio", "Saúde"),
+    Regra("academia", "Bem-estar"),
+    Regra("cinema", "Lazer"),
+    Regra("netflix", "Lazer", "estabelecimento"),
+]
+
+# Palavras de utils.CATEGORIAS_PALAVRAS, na ordem do dicionário
+REGRAS_PALAVRAS = [
+    Regra(palavra, categoria) for categoria, palavras in CATEGORIAS_PALAVRAS.items() for palavra in palavras
+]
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos (mesmo resultado de unidecode(texto.lower()))."""
+    texto = str(texto).lower()
+    return texto if texto.isascii() else unidecode(texto)
+
+
+def normalizar_juntos(textos):
+    """
+    Normaliza vários textos de uma vez: junta tudo com quebras de linha, passa para minúsculas e troca
+    cada caractere não ASCII distinto pela transliteração do unidecode (que é feita caractere a caractere).
+    Devolve (texto único normalizado, posição inicial de cada texto nele).
+    """
+    junto = "\n".join(np.asarray(textos, dtype=object).tolist()).lower()  # sem iterar elemento a elemento no pandas
+    if not junto.isascii():
+        for caractere in {c for c in set(junto) if not c.isascii()}:
+            junto = junto.replace(caractere, unidecode(caractere).replace("\n", " "))
+    quebras = np.flatnonzero(np.frombuffer(junto.encode("ascii"), dtype=np.uint8) == ord("\n"))
+    return junto, np.concatenate(([0], quebras + 1))
+
+
+def limpar(normalizado):
+    """Texto já normalizado sem códigos numéricos e símbolos (quebras de linha são mantidas)."""
+    return _SIMBOLOS.sub(" ", _CODIGOS.sub(" ", normalizado))
+
+
+def _trie_regex(palavras):
+    """Regex em forma de árvore de prefixos: em cada posição casa a palavra mais longa possível."""
+    raiz = {}
+    for palavra in palavras:
+        no = raiz
+        for caractere in palavra:
+            no = no.setdefault(caractere, {})
+        no[""] = True
+
+    def montar(no):
+        ramos = [re.escape(c) + montar(filho) for c, filho in sorted(no.items()) if c != ""]
+        if not ramos:
+            return ""
+        corpo = ramos[0] if len(ramos) == 1 else "(?:" + "|".join(ramos) + ")"
+        return f"(?:{corpo})?" if "" in no else corpo
+
+    return montar(raiz)
+
+
+# ============================
+# 🔹 Motor compilado
+# ============================
+class Classificador:
+    """
+    Compila uma lista de regras num único regex por campo. A posição na lista é a prioridade:
+    vale a regra mais prioritária encontrada em qualquer ponto do texto, como numa cadeia if/elif.
+    """
+
+    def __init__(self, regras, padrao=CATEGORIA_PADRAO):
+        self.regras = list(regras)
+        self.padrao = padrao
+        self._categorias = np.array([r.categoria for r in self.regras] + [padrao], dtype=object)
+        self._sem_regra = len(self.regras)  # "prioridade" de quem não casou: aponta para o padrão
+
+        palavras = {campo: {} for campo in CAMPOS}
+        for prioridade, regra in enumerate(self.regras):
+            palavra = normalizar(regra.palavra).strip()
+            if not palavra or "\n" in palavra:
+                continue
+            for campo in (CAMPOS if regra.campo == "qualquer" else (regra.campo,)):
+                palavras[campo].setdefault(palavra, prioridade)
+
+        # O lookahead testa toda posição (ocorrências sobrepostas) e casa a palavra mais longa ali;
+        # por isso cada palavra carrega a melhor prioridade entre as contidas nela ("supermercado" ⊃ "mercado").
+        self._prioridades, self._padroes = {}, {}
+        for campo, prioridades in palavras.items():
+            self._prioridades[campo] = {
+                p: min(q for outra, q in prioridades.items() if outra in p) for p in prioridades
+            }
+            self._padroes[campo] = re.compile("(?=(" + _trie_regex(prioridades) + "))") if prioridades else None
+        self._literais = {
+            campo: [(re.compile(re.escape(p)), q) for p, q in sorted(prioridades.items(), key=lambda item: item[1])]
+            for campo, prioridades in self._prioridades.items() if len(prioridades) <= PALAVRAS_POR_VARREDURA
+        }
+
+    def _melhores(self, campo, junto, inicios):
+        """Melhor prioridade casada em cada texto de `junto` (ou _sem_regra)."""
+        melhores = np.full(len(inicios), self._sem_regra, dtype=np.int64)
+        padrao = self._padroes[campo]
+        if padrao is None:
+            return melhores
+        if campo in self._literais:
+            for literal, prioridade in self._literais[campo]:
+                posicoes = [m.start() for m in literal.finditer(junto)]
+                if posicoes:
+                    np.minimum.at(melhores, np.searchsorted(inicios, posicoes, side="right") - 1, prioridade)
+            return melhores
+        prioridades = self._prioridades[campo]
+        achados = [(m.start(), prioridades[m.group(1)]) for m in padrao.finditer(junto)]
+        if achados:
+            posicoes, valores = np.array(achados, dtype=np.int64).T
+            np.minimum.at(melhores, np.searchsorted(inicios, posicoes, side="right") - 1, valores)
+        return melhores
+
+    def classificar(self, descricao, estabelecimento=""):
+        melhor = self._sem_regra
+        for campo, texto in (("descricao", descricao), ("estabelecimento", estabelecimento)):
+            if self._padroes[campo] is not None and texto:
+                prioridades = self._prioridades[campo]
+                for m in self._padroes[campo].finditer(normalizar(texto)):
+                    melhor = min(melhor, prioridades[m.group(1)])
+        return self._categorias[melhor]
+
+    def classificar_serie(self, descricoes, estabelecimentos=None):
+        """
+        Classifica Series inteiras: os textos distintos são normalizados juntos e varridos de uma vez
+        por campo (o regex em árvore ou, com poucas palavras, uma busca literal por palavra); a combinação descrição × estabelecimento é feita com NumPy.
+        Devolve uma Series alinhada com `descricoes`.
+        """
+        descricoes = pd.Series(descricoes).fillna("").astype(str)
+        if estabelecimentos is None:
+            estabelecimentos = pd.Series("", index=descricoes.index)
+        estabelecimentos = pd.Series(estabelecimentos, index=descricoes.index).fillna("").astype(str)
+
+        melhores = np.full(len(descricoes), self._sem_regra, dtype=np.int64)
+        for campo, serie in (("descricao", descricoes), ("estabelecimento", estabelecimentos)):
+            if self._padroes[campo] is None or serie.empty:
+                continue
+            codigos, unicos = pd.factorize(serie)
+            melhores = np.minimum(melhores, self._melhores(campo, *normalizar_juntos(unicos))[codigos])
+        return pd.Series(self._categorias[melhores], index=descricoes.index, dtype=object)
+
+
+# ============================
+# 🔹 Classificador em uso (regras do banco + embutidas)
+# ============================
+_atual = None
+_so_palavras = None
+_trava = threading.Lock()
+
+
+def regras_do_banco():
+    """Regras ativas da tabela regras_categoria, na ordem de prioridade (fora do app: nenhuma)."""
+    if not has_app_context():
+        return []
+    try:
+        linhas = RegraCategoria.query.filter_by(ativa=True).order_by(
+            RegraCategoria.prioridade, RegraCategoria.id
+        ).all()
+    except SQLAlchemyError:
+        # Tabela ainda não criada (ex.: antes das migrações)
+        return []
+    return [Regra(r.palavra, r.categoria, r.campo) for r in linhas]
+
+
+def classificador_atual():
+    """Classificador compilado com as regras do banco à frente das embutidas; recompilado após edições."""
+    global _atual
+    with _trava:
+        if _atual is None:
+            _atual = Classificador(regras_do_banco() + REGRAS_MODELO + REGRAS_PALAVRAS)
+        return _atual
+
+
+def usar_regras(regras):
+    """Fixa as regras do classificador em uso (ex.: processos do pool de importação, sem banco)."""
+    global _atual
+    with _trava:
+        _atual = Classificador(regras)
+
+
+def classificador_de_palavras():
+    """Classificador só com utils.CATEGORIAS_PALAVRAS (contrato de utils.sugerir_categoria)."""
+    global _so_palavras
+    if _so_palavras is None:
+        _so_palavras = Classificador(REGRAS_PALAVRAS)
+    return _so_palavras
+
+
+def invalidar():
+    global _atual
+    with _trava:
+        _atual = None
+
+
+# Recompila só depois do commit, para não compilar regras de uma transação ainda aberta
+@event.listens_for(Session, "before_flush")
+def _marcar_regras_alteradas(session, flush_context, instances):
+    if any(isinstance(obj, RegraCategoria) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["regras_alteradas"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _recompilar_regras(session):
+    if session.info.pop("regras_alteradas", False):
+        invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_regras_alteradas(session):
+    session.info.pop("regras_alteradas", None)
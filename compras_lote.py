@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select
+
+from models import db, CompraCartao, ParcelaCartao
+from faturas import atualizar_faturas
+from formatos_br import converter_datas, converter_valores, separar_rejeitadas
+from importador import TAMANHO_LOTE, executemany_insert, normalizar_colunas, trava_gravacao
+
+COLUNAS_COMPRA = ["descricao", "cartao", "valor_total", "total_parcelas", "data_primeira_fatura"]
+MAXIMO_PARCELAS = 120
+CHAVE_COMPRA = ["descricao", "cartao", "centavos", "total_parcelas", "data_primeira_fatura"]  # mesma da rota /cartao/nova
+
+
+# ============================
+# 🔹 Cronograma das parcelas (vetorizado)
+# ============================
+def cronograma_parcelas(centavos, quantidades, primeiras):
+    """
+    Parcelas de várias compras de uma vez, coluna a coluna: `centavos` (int), `quantidades` e
+    `primeiras` (datetime64[D]) têm uma posição por compra. Cada parcela vale o total truncado no
+    centavo e a última recebe o resto, como em `models.gerar_parcelas`; o vencimento é o dia da
+    primeira fatura em cada mês, limitado ao fim dos meses mais curtos.
+    Devolve {"compra": posição da compra, "numero", "centavos", "vencimento": datetime64[D]}.
+    """
+    centavos = np.asarray(centavos, dtype=np.int64)
+    quantidades = np.asarray(quantidades, dtype=np.int64)
+    primeiras = np.asarray(primeiras, dtype="datetime64[D]")
+
+    compra = np.repeat(np.arange(len(quantidades)), quantidades)
+    inicio = np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+    numero = np.arange(len(compra)) - inicio + 1
+
+    base, resto = np.divmod(centavos, quantidades)
+    valor = base[compra] + np.where(numero == quantidades[compra], resto[compra], 0)
+
+    mes_inicial = primeiras.astype("datetime64[M]")
+    dia = (primeiras - mes_inicial.astype("datetime64[D]")).astype(np.int64)
+    mes = mes_inicial[compra] + (numero - 1)
+    dias_no_mes = ((mes + 1).astype("datetime64[D]") - mes.astype("datetime64[D]")).astype(np.int64)
+    vencimento = mes.astype("datetime64[D]") + np.minimum(dia[compra], dias_no_mes - 1)
+
+    return {"compra": compra, "numero": numero, "centavos": valor, "vencimento": vencimento}
+
+
+# ============================
+# 🔹 Preparação das compras
+# ============================
+def preparar_compras(df):
+    """
+    Valida um DataFrame com as colunas de COLUNAS_COMPRA (nomes como no formulário de nova compra).
+    Devolve (compras prontas, com "centavos" e "data_primeira_fatura" como datetime64, rejeitadas com "motivo").
+    """
+    normalizar_colunas(df)
+    for coluna in COLUNAS_COMPRA:
+        if coluna not in df.columns:
+            df[coluna] = None
+
+    valor, valor_invalido = converter_valores(df["valor_total"])
+    quantidade = pd.to_numeric(df["total_parcelas"], errors="coerce")
+    datas, data_invalida = converter_datas(df["data_primeira_fatura"])
+    descricao = df["descricao"].fillna("").astype(str).str.strip()
+
+    validas, rejeitadas = separar_rejeitadas(df, {
+        "descrição ausente": descricao == "",
+        "valor inválido": valor_invalido,
+        "valor ausente": valor.isna(),
+        "valor deve ser positivo": valor.round(2) <= 0,
+        "total de parcelas inválido": quantidade.isna() | (quantidade % 1 != 0) |
+                                      ~quantidade.between(1, MAXIMO_PARCELAS),
+        "data inválida": data_invalida,
+        "data ausente": datas.isna(),
+    })
+
+    cartao = df["cartao"].fillna("").astype(str).str.strip()
+    compras = pd.DataFrame({
+        "descricao": descricao[validas],
+        "cartao": cartao[validas].where(cartao[validas] != "", None),
+        "centavos": (valor[validas] * 100).round().astype(np.int64),
+        "total_parcelas": quantidade[validas].astype(np.int64),
+        "data_primeira_fatura": datas[validas].astype("datetime64[ns]"),
+    })
+    return compras, rejeitadas
+
+
+def remover_compras_existentes(compras, conn):
+    """
+    Descarta as compras repetidas no próprio lote e as já cadastradas (mesma descrição, cartão, valor,
+    parcelas e primeira fatura). Devolve (compras novas, quantidade descartada).
+    """
+    if compras.empty:
+        return compras, 0
+
+    tabela = CompraCartao.__table__
+    existentes = pd.DataFrame(conn.execute(
+        select(tabela.c.descricao, tabela.c.cartao, tabela.c.valor_total, tabela.c.total_parcelas,
+               tabela.c.data_primeira_fatura)
+        .where(tabela.c.data_primeira_fatura.between(compras["data_primeira_fatura"].min().date(),
+                                                     compras["data_primeira_fatura"].max().date()))
+    ).all(), columns=["descricao", "cartao", "valor_total", "total_parcelas", "data_primeira_fatura"])
+    existentes = existentes.assign(
+        centavos=(existentes["valor_total"].astype(float) * 100).round().astype(np.int64),
+        data_primeira_fatura=pd.to_datetime(existentes["data_primeira_fatura"]),
+    )
+
+    chaves = compras[CHAVE_COMPRA].fillna({"cartao": ""})
+    ja_cadastradas = pd.MultiIndex.from_frame(chaves).isin(
+        pd.MultiIndex.from_frame(existentes[CHAVE_COMPRA].fillna({"cartao": ""}))
+    )
+    novas = ~ja_cadastradas & ~chaves.duplicated()
+    return compras[novas], int((~novas).sum())
+
+
+# ============================
+# 🔹 Gravação em lote
+# ============================
+def inserir_compras(compras, conn=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Grava compras já preparadas e deduplicadas com dois INSERTs em lote — compras (RETURNING id, na ordem
+    do lote) e parcelas do cronograma vetorizado — e recalcula as faturas afetadas na mesma transação.
+    Não faz commit. Devolve a quantidade de parcelas gravadas.
+    """
+    if compras.empty:
+        return 0
+
+    conn = conn or db.session.connection()
+    primeiras = compras["data_primeira_fatura"].to_numpy().astype("datetime64[D]")
+    registros = pd.DataFrame({
+        "descricao": compras["descricao"].to_numpy(),
+        "cartao": compras["cartao"].to_numpy(),
+        "valor_total": compras["centavos"].to_numpy() / 100,
+        "total_parcelas": compras["total_parcelas"].to_numpy(),
+        "data_primeira_fatura": [pd.Timestamp(d).date() for d in primeiras],
+    }).astype(object).to_dict("records")
+    comando = insert(CompraCartao.__table__).returning(CompraCartao.__table__.c.id, sort_by_parameter_order=True)
+    ids = np.array([linha.id for linha in conn.execute(comando, registros)], dtype=np.int64)
+
+    cronograma = cronograma_parcelas(compras["centavos"].to_numpy(), compras["total_parcelas"].to_numpy(), primeiras)
+    vencimentos = np.datetime_as_string(cronograma["vencimento"], unit="D")
+    quantidade = executemany_insert(conn, ParcelaCartao.__table__, {
+        "compra_id": ids[cronograma["compra"]].tolist(),
+        "numero": cronograma["numero"].tolist(),
+        "valor": (cronograma["centavos"] / 100).tolist(),
+        "vencimento": vencimentos.tolist(),  # texto AAAA-MM-DD, como a coluna Date é gravada no SQLite
+        "paga": [False] * len(vencimentos),
+    }, tamanho_lote)
+
+    cartoes = compras["cartao"].fillna("").to_numpy()[cronograma["compra"]]
+    atualizar_faturas(conn, set(zip(vencimentos.astype("U7").tolist(), cartoes.tolist())))  # (AAAA-MM, cartão)
+    return quantidade
+
+
+def importar_compras(df, primeira_linha=1):
+    """
+    Prepara, deduplica, grava e confirma um lote de compras parceladas.
+    Devolve {"compras", "parcelas", "duplicadas", "rejeitadas": [{"linha", "motivo"}]}, com as linhas
+    contadas a partir de `primeira_linha` (2 num CSV, em que a linha 1 é o cabeçalho).
+    """
+    compras, rejeitadas = preparar_compras(df)
+    try:
+        with trava_gravacao:
+            conn = db.session.connection()
+            compras, duplicadas = remover_compras_existentes(compras, conn)
+            parcelas = inserir_compras(compras, conn)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        "compras": len(compras),
+        "parcelas": parcelas,
+        "duplicadas": duplicadas,
+        "rejeitadas": [{"linha": int(i) + primeira_linha, "motivo": m} for i, m in rejeitadas["motivo"].items()],
+    }
@@ -0,0 +1,118 @@
+from decimal import Decimal
+
+from sqlalchemy import bindparam, delete, select, update
+
+from models import db, ParcelaCartao, somar_meses
+from faturas import atualizar_faturas, chaves_das_parcelas
+from importador import TAMANHO_LOTE, executemany_insert
+
+
+# ============================
+# 🔹 Diferença entre o cronograma atual e o desejado
+# ============================
+def diferenca_cronograma(existentes, centavos, quantidade, primeira):
+    """
+    Menor conjunto de mudanças que leva as parcelas `existentes` — tuplas (id, numero, centavos, vencimento,
+    paga) — ao cronograma de `quantidade` parcelas somando `centavos`, a partir da data `primeira`.
+
+    Parcelas pagas não mudam: o que falta pagar (total − pagas) é dividido entre as posições em aberto,
+    truncado no centavo com o resto na última, e cada uma vence no dia da primeira fatura do seu mês,
+    como em `gerar_parcelas`. Devolve (inserir [(numero, centavos, vencimento)],
+    atualizar [(id, centavos, vencimento)], remover [ids]). ValueError se o cronograma for impossível.
+    """
+    if quantidade < 1:
+        raise ValueError("O total de parcelas deve ser pelo menos 1.")
+
+    por_numero, remover = {}, []
+    for parcela in sorted(existentes, key=lambda p: (p[1], not p[4], p[0])):  # pagas primeiro em número repetido
+        if parcela[1] in por_numero or parcela[1] > quantidade:
+            if parcela[4]:
+                raise ValueError(f"A parcela {parcela[1]} já está paga e não pode ser removida.")
+            remover.append(parcela[0])
+        else:
+            por_numero[parcela[1]] = parcela
+
+    pagas = [p for p in por_numero.values() if p[4]]
+    restante = centavos - sum(p[2] for p in pagas)
+    abertas = [n for n in range(1, quantidade + 1) if n not in por_numero or not por_numero[n][4]]
+    if restante < 0:
+        raise ValueError("O valor total é menor que a soma das parcelas já pagas.")
+    if not abertas:
+        if restante:
+            raise ValueError("Todas as parcelas estão pagas: o valor total não pode mudar.")
+        return [], [], remover
+
+    base, resto = divmod(restante, len(abertas))
+    inserir, atualizar = [], []
+    for numero in abertas:
+        valor = base + (resto if numero == abertas[-1] else 0)
+        vencimento = somar_meses(primeira, numero - 1)
+        atual = por_numero.get(numero)
+        if atual is None:
+            inserir.append((numero, valor, vencimento))
+        elif (atual[2], atual[3]) != (valor, vencimento):
+            atualizar.append((atual[0], valor, vencimento))
+    return inserir, atualizar, remover
+
+
+# ============================
+# 🔹 Reparcelamento de uma compra
+# ============================
+def _centavos(valor):
+    return int((Decimal(str(valor)) * 100).to_integral_value())
+
+
+def reparcelar(compra):
+    """
+    Ajusta as parcelas da compra ao seu valor_total, total_parcelas e data_primeira_fatura atuais,
+    aplicando só a diferença (um UPDATE, um DELETE e um INSERT em lote, quando houver o que fazer) e
+    recalculando as faturas afetadas na mesma transação. Não faz commit.
+    Devolve {"inseridas", "atualizadas", "removidas"}; ValueError se o cronograma for impossível.
+    """
+    db.session.flush()  # dados da compra (ex.: troca de cartão) já gravados; as faturas seguem pelos hooks
+    conn = db.session.connection()
+    tabela = ParcelaCartao.__table__
+
+    existentes = [
+        (id_, numero, _centavos(valor), vencimento, bool(paga))
+        for id_, numero, valor, vencimento, paga in conn.execute(
+            select(tabela.c.id, tabela.c.numero, tabela.c.valor, tabela.c.vencimento, tabela.c.paga)
+            .where(tabela.c.compra_id == compra.id)
+        )
+    ]
+    inserir, atualizar, remover = diferenca_cronograma(
+        existentes, _centavos(compra.valor_total), compra.total_parcelas, compra.data_primeira_fatura
+    )
+    if not (inserir or atualizar or remover):
+        return {"inseridas": 0, "atualizadas": 0, "removidas": 0}
+
+    chaves = chaves_das_parcelas(conn, compras=[compra.id])
+    if atualizar:
+        conn.execute(
+            update(tabela).where(tabela.c.id == bindparam("id_parcela"))
+            .values(valor=bindparam("novo_valor"), vencimento=bindparam("novo_vencimento")),
+            [{"id_parcela": i, "novo_valor": Decimal(v) / 100, "novo_vencimento": d} for i, v, d in atualizar]
+        )
+    if remover:
+        conn.execute(delete(tabela).where(tabela.c.id.in_(remover)))
+    if inserir:
+        executemany_insert(conn, tabela, {
+            "compra_id": [compra.id] * len(inserir),
+            "numero": [n for n, _, _ in inserir],
+            "valor": [v / 100 for _, v, _ in inserir],
+            "vencimento": [d.isoformat() for _, _, d in inserir],  # texto AAAA-MM-DD, como a coluna Date é gravada
+            "paga": [False] * len(inserir),
+        }, TAMANHO_LOTE)
+    atualizar_faturas(conn, chaves | chaves_das_parcelas(conn, compras=[compra.id]))
+
+    # Parcelas já carregadas nesta sessão ficariam desatualizadas; a coleção da compra é recarregada no próximo acesso
+    alteradas = {(ParcelaCartao, (id_,)) for id_, _, _ in atualizar} | {(ParcelaCartao, (id_,)) for id_ in remover}
+    for chave in list(db.session.identity_map.keys()):
+        if chave[:2] in alteradas:
+            objeto = db.session.identity_map[chave]
+            if chave[1][0] in remover:
+                db.session.expunge(objeto)
+            else:
+                db.session.expire(objeto)
+    db.session.expire(compra, ["parcelas"])
+    return {"inseridas": len(inserir), "atualizadas": len(atualizar), "removidas": len(remover)}
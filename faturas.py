@@ -0,0 +1,206 @@
+from sqlalchemy import case, delete, event, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from models import db, CompraCartao, Fatura, ParcelaCartao
+from parcelas import intervalo_do_mes
+
+TAMANHO_CONSULTA = 500  # ids por SELECT ... IN
+TOLERANCIA = 0.005
+
+
+# ============================
+# 🔹 Agregação das parcelas por cartão e mês
+# ============================
+def _agregado(inicio=None, fim=None, cartoes=None):
+    """Faturas calculadas direto das parcelas, opcionalmente só com vencimento em [inicio, fim) e desses cartões."""
+    parcelas, compras = ParcelaCartao.__table__, CompraCartao.__table__
+    cartao = func.coalesce(compras.c.cartao, "")
+    mes = func.strftime("%Y-%m", parcelas.c.vencimento)
+    consulta = select(
+        mes.label("mes"),
+        cartao.label("cartao"),
+        func.sum(parcelas.c.valor).label("total"),
+        func.sum(case((parcelas.c.paga, parcelas.c.valor), else_=0)).label("total_pago"),
+        func.count().label("parcelas"),
+        func.sum(case((parcelas.c.paga, 0), else_=1)).label("abertas"),
+    ).select_from(parcelas.join(compras, compras.c.id == parcelas.c.compra_id)).group_by(mes, cartao)
+    if inicio is not None:
+        consulta = consulta.where(parcelas.c.vencimento >= inicio, parcelas.c.vencimento < fim)
+    if cartoes is not None:
+        consulta = consulta.where(cartao.in_(cartoes))
+    return consulta
+
+
+def atualizar_faturas(conn, chaves):
+    """
+    Recalcula só as faturas das chaves (mes, cartao) a partir das parcelas, na conexão (e transação)
+    informada: uma agregação restrita ao intervalo dos meses pelo índice de vencimento, e as
+    linhas dessas chaves apagadas e regravadas. Quem altera parcelas por SQL direto chama esta função.
+    """
+    chaves = set(chaves)
+    if not chaves:
+        return
+    meses = sorted(mes for mes, _ in chaves)
+    inicio, fim = intervalo_do_mes(meses[0])[0], intervalo_do_mes(meses[-1])[1]
+    linhas = [
+        dict(linha) for linha in conn.execute(_agregado(inicio, fim, {cartao for _, cartao in chaves})).mappings()
+        if (linha["mes"], linha["cartao"]) in chaves
+    ]
+
+    tabela = Fatura.__table__
+    lista = list(chaves)
+    for posicao in range(0, len(lista), TAMANHO_CONSULTA):
+        conn.execute(delete(tabela).where(
+            tuple_(tabela.c.mes, tabela.c.cartao).in_(lista[posicao:posicao + TAMANHO_CONSULTA])
+        ))
+    if linhas:
+        conn.execute(insert(tabela), linhas)
+
+
+def chaves_das_parcelas(conn, parcelas=(), compras=()):
+    """Chaves (mes, cartao) das parcelas com esses ids ou dessas compras, como estão gravadas agora."""
+    tabela_parcelas, tabela_compras = ParcelaCartao.__table__, CompraCartao.__table__
+    parcelas, compras = list(parcelas), list(compras)
+    chaves = set()
+    for ids, coluna in ((parcelas, tabela_parcelas.c.id), (compras, tabela_parcelas.c.compra_id)):
+        for posicao in range(0, len(ids), TAMANHO_CONSULTA):
+            linhas = conn.execute(
+                select(tabela_parcelas.c.vencimento, func.coalesce(tabela_compras.c.cartao, ""))
+                .select_from(tabela_parcelas.join(tabela_compras, tabela_compras.c.id == tabela_parcelas.c.compra_id))
+                .where(coluna.in_(ids[posicao:posicao + TAMANHO_CONSULTA]))
+                .distinct()
+            )
+            chaves.update((vencimento.strftime("%Y-%m"), cartao) for vencimento, cartao in linhas)
+    return chaves
+
+
+# ============================
+# 🔹 Hooks do ORM
+# ============================
+# Antes do flush guardam-se as chaves que as parcelas/compras alteradas ocupavam no banco; depois dele,
+# as que passaram a ocupar. As faturas dessas chaves são recalculadas na mesma transação. Trocar o
+# cartão de uma compra move todas as parcelas dela, por isso compras alteradas também entram.
+@event.listens_for(Session, "before_flush")
+def _registrar_faturas_afetadas(session, flush_context, instances):
+    parcelas_novas = [obj for obj in session.new if isinstance(obj, ParcelaCartao)]
+    parcelas = {obj.id for obj in (*session.dirty, *session.deleted)
+                if isinstance(obj, ParcelaCartao) and obj.id is not None}
+    compras = {obj.id for obj in (*session.dirty, *session.deleted)
+               if isinstance(obj, CompraCartao) and obj.id is not None}
+    if not (parcelas_novas or parcelas or compras):
+        return
+
+    with session.no_autoflush:
+        chaves = chaves_das_parcelas(session.connection(), parcelas, compras)
+    pendentes = session.info.setdefault("faturas_pendentes", {"chaves": set(), "parcelas": [], "ids": set(), "compras": set()})
+    pendentes["chaves"] |= chaves
+    pendentes["parcelas"] += parcelas_novas
+    pendentes["ids"] |= parcelas
+    pendentes["compras"] |= compras
+
+
+@event.listens_for(Session, "after_flush")
+def _atualizar_faturas_afetadas(session, flush_context):
+    pendentes = session.info.pop("faturas_pendentes", None)
+    if not pendentes:
+        return
+    conn = session.connection()
+    ids = pendentes["ids"] | {obj.id for obj in pendentes["parcelas"] if obj.id is not None}
+    chaves = pendentes["chaves"] | chaves_das_parcelas(conn, ids, pendentes["compras"])
+    atualizar_faturas(conn, chaves)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_faturas_afetadas(session):
+    session.info.pop("faturas_pendentes", None)
+
+
+# ============================
+# 🔹 Pagamento em lote
+# ============================
+def totais_da_fatura(mes, cartao):
+    """{"mes", "cartao", "total", "total_pago", "parcelas", "abertas"} da fatura, ou None se ela não existe."""
+    fatura = db.session.get(Fatura, (mes, cartao or ""))
+    if fatura is None:
+        return None
+    return {
+        "mes": fatura.mes,
+        "cartao": fatura.cartao,
+        "total": float(fatura.total),
+        "total_pago": float(fatura.total_pago),
+        "parcelas": fatura.parcelas,
+        "abertas": fatura.abertas,
+    }
+
+
+def marcar_fatura(mes, cartao, paga=True, parcelas=None):
+    """
+    Marca como pagas (ou a vencer) todas as parcelas da fatura (mes "AAAA-MM", cartao) — ou só as
+    de ids em `parcelas` que pertencem a ela — com um único UPDATE, e recalcula a fatura na mesma
+    transação. Devolve os ids alterados; o commit fica com quem chama. ValueError se o mês for inválido.
+    """
+    inicio, fim = intervalo_do_mes(mes)
+    tabela_parcelas, tabela_compras = ParcelaCartao.__table__, CompraCartao.__table__
+    comando = update(tabela_parcelas).where(
+        tabela_parcelas.c.vencimento >= inicio,
+        tabela_parcelas.c.vencimento < fim,
+        tabela_parcelas.c.paga != paga,
+        tabela_parcelas.c.compra_id.in_(
+            select(tabela_compras.c.id).where(func.coalesce(tabela_compras.c.cartao, "") == (cartao or ""))
+        ),
+    )
+    if parcelas is not None:
+        comando = comando.where(tabela_parcelas.c.id.in_(list(parcelas)))
+
+    conn = db.session.connection()
+    alteradas = [linha.id for linha in conn.execute(comando.values(paga=paga).returning(tabela_parcelas.c.id))]
+    if alteradas:
+        atualizar_faturas(conn, {(mes, cartao or "")})
+        # Parcelas e fatura já carregadas nesta sessão ficariam com os valores antigos. Compara-se pela
+        # chave de identidade: ler obj.id de um objeto expirado faria um SELECT por objeto.
+        chaves = {(ParcelaCartao, (id_,)) for id_ in alteradas} | {(Fatura, (mes, cartao or ""))}
+        for chave in list(db.session.identity_map.keys()):
+            if chave[:2] in chaves:
+                db.session.expire(db.session.identity_map[chave])
+    return alteradas
+
+
+# ============================
+# 🔹 Reconstrução e verificação
+# ============================
+def reconstruir_faturas():
+    """Apaga e recalcula toda a tabela fatura a partir das parcelas."""
+    tabela = Fatura.__table__
+    db.session.execute(delete(tabela))
+    linhas = [dict(linha) for linha in db.session.execute(_agregado()).mappings()]
+    if linhas:
+        db.session.execute(insert(tabela), linhas)
+    db.session.commit()
+    return len(linhas)
+
+
+def verificar_faturas():
+    """Compara a tabela fatura com a agregação completa das parcelas e devolve a lista de divergências."""
+    campos = ("total", "total_pago", "parcelas", "abertas")
+    esperado = {(l["mes"], l["cartao"]): l for l in db.session.execute(_agregado()).mappings()}
+    atual = {(f.mes, f.cartao): {c: getattr(f, c) for c in campos} for f in Fatura.query.all()}
+
+    divergencias = []
+    for chave in sorted(set(esperado) | set(atual)):
+        linha_esp, linha_atu = esperado.get(chave, {}), atual.get(chave, {})
+        valores_esp = {c: float(linha_esp.get(c) or 0) for c in campos}
+        valores_atu = {c: float(linha_atu.get(c) or 0) for c in campos}
+        if any(abs(valores_esp[c] - valores_atu[c]) > TOLERANCIA for c in campos):
+            divergencias.append({
+                "chave": dict(zip(("mes", "cartao"), chave)),
+                "esperado": {c: round(v, 2) for c, v in valores_esp.items()},
+                "fatura": {c: round(v, 2) for c, v in valores_atu.items()}
+            })
+    return divergencias
+
+
+def garantir_faturas():
+    """Reconstrói as faturas quando a tabela está vazia mas há parcelas (a tabela vem da migração c90231cef6e1)."""
+    vazia = db.session.query(Fatura.mes).first() is None
+    if vazia and db.session.query(ParcelaCartao.id).first() is not None:
+        reconstruir_faturas()
@@ -1,11 +1,17 @@
 import os
+import multiprocessing
 import secrets
 import traceback
 import time
 import threading
 import webbrowser
 from decimal import Decimal
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
+
+# 🔹 No executável (PyInstaller), os processos do pool de importação rodam este mesmo script:
+# freeze_support os desvia para o worker antes de subir o app, o banco e o servidor
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
 
 # 📦 Bibliotecas externas
 import pandas as pd
@@ -13,19 +19,31 @@ from dotenv import load_dotenv
 
 # 🌐 Flask e extensões
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, current_app
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_migrate import Migrate, upgrade
 
 # 🧠 SQLAlchemy
-from sqlalchemy import func, extract
-from sqlalchemy.orm import joinedload, aliased
+from sqlalchemy import func, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
 
 # 🧩 Módulos personalizados
 from insights import Insights
-from modelo_ia import classificar_texto, gerar_insights
-from analisador_financeiro import gerar_alertas
-from previsao import prever_gastos
-from models import CompraCartao, ParcelaCartao, Lancamento, Categoria, gerar_parcelas, db
+from analisador_financeiro import alertas_do_mes, gerar_alertas, historico_de_alertas, mensagens, resumo_do_historico
+from previsao import previsao_do_mes
+from previsao_sazonal import atualizar_previsoes, fluxo_previsto, garantir_previsoes, previsao_desatualizada
+from models import CompraCartao, ParcelaCartao, Lancamento, Categoria, MetaFormaPagamento, RegraCategoria, ResumoMensal, Importacao, Reclassificacao, gerar_parcelas, db
+from resumo_mensal import reconstruir_resumo, verificar_resumo, garantir_resumo
+from formatos_br import competencia_valida
+from faturas import garantir_faturas, marcar_fatura, reconstruir_faturas, totais_da_fatura, verificar_faturas
+from parcelas import (consulta_faturas_do_mes, consulta_parcelas, consulta_parcelas_futuras, consultas_sem_indice,
+                      horizonte as horizonte_do_planejamento, limites_do_mes, planejamento_por_mes, totais_por_mes)
+from compras_lote import importar_compras
+from cronograma import reparcelar
+from simulador import (CAMINHOS, MAXIMO_PRAZO, SEMENTE_PADRAO, TAXA_PADRAO, aporte_necessario, grade_cenarios,
+                       monte_carlo, projecao, saldo_final)
+from cache_categorias import categoria_de, descartar_classificados, registrar_correcao
+from modelo_categorias import garantir_modelo, modelo_atual, treinar_modelo
+from tarefas import enfileirar_importacao, enfileirar_lote, enfileirar_previsao, enfileirar_reclassificacao, iniciar_processos, retomar_pendentes, progresso, progresso_reclassificacao
 # from modulos.rotas import lancar
 
 
@@ -37,10 +55,11 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv("SECRET_KEY")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
+app.config["MODELO_CATEGORIAS"] = os.getenv("MODELO_CATEGORIAS")  # padrão: instance/modelo_categorias.npz
 
 # 🔧 Inicializa extensões
 db.init_app(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations"), render_as_batch=True)
 
 @app.route("/lancar", methods=["GET", "POST"])
 def lancar():
@@ -67,7 +86,11 @@ def lancar():
                 flash("Data inválida. Use o formato AAAA-MM-DD.", "danger")
                 return redirect(url_for("lancar"))
 
-            categoria_nome = sugerir_categoria(f"{dados['descricao']} {dados['estabelecimento']}")
+            if not competencia_valida(dados["competencia"]):
+                flash("Competência inválida. Use o formato AAAA-MM.", "danger")
+                return redirect(url_for("lancar"))
+
+            categoria_nome = categoria_de(dados["descricao"], dados["estabelecimento"])
             categoria_obj = Categoria.query.filter_by(nome=categoria_nome).first()
             if not categoria_obj:
                 categoria_obj = Categoria(nome=categoria_nome, tipo=dados["tipo"], meta_mensal=0.0)
@@ -88,17 +111,13 @@ def lancar():
             db.session.commit()
             flash("Lançamento cadastrado com sucesso!", "success")
 
-        df_lancamentos = carregar_lancamentos()
-        receitas = df_lancamentos[df_lancamentos['tipo'] == 'Receita']['valor'].sum()
-        despesas = df_lancamentos[df_lancamentos['tipo'] == 'Despesa']['valor'].sum()
+        hoje = date.today()
+        inicio_mes, fim_mes = limites_do_mes(hoje)
+
+        receitas, despesas = totais_por_tipo()
         saldo_disponivel = receitas - despesas
 
-        hoje = date.today()
-        parcelas_futuras = ParcelaCartao.query.filter(
-            ParcelaCartao.vencimento >= hoje,
-            ParcelaCartao.paga == False
-        ).all()
-        total_parcelas_futuras = sum(float(p.valor) for p in parcelas_futuras)
+        total_parcelas_futuras = float(consulta_parcelas_futuras(hoje).scalar() or 0.0)
         saldo_ajustado = saldo_disponivel - total_parcelas_futuras
 
         if saldo_disponivel > 1000:
@@ -110,8 +129,9 @@ def lancar():
         else:
             dica_aplicacao = "⚠️ Seu saldo está negativo. Reveja seus gastos e priorize despesas essenciais."
 
-        alertas_texto = gerar_alertas(df_lancamentos, saldo_disponivel)
-        previsao_gastos = prever_gastos(df_lancamentos)
+        # 📅 Alertas e previsão olham apenas o mês corrente
+        alertas_texto = gerar_alertas(hoje.strftime("%Y-%m"), saldo_disponivel)
+        previsao_gastos = previsao_do_mes(hoje.strftime("%Y-%m"), hoje)["total"]["restante"]
 
         alertas = []
         for texto in alertas_texto:
@@ -130,17 +150,22 @@ def lancar():
                 'acao': 'Planejar orçamento'
             })
 
-        categorias = df_lancamentos[df_lancamentos['tipo'] == 'Despesa'].groupby('categoria')['valor'].sum()
+        categorias = despesas_por_categoria()
         categorias_json = {
-            'labels': list(categorias.index),
-            'valores': list(categorias.values)
+            'labels': [c for c, _ in categorias],
+            'valores': [t for _, t in categorias]
         }
 
-        df_lancamentos['data'] = pd.to_datetime(df_lancamentos['data'], errors='coerce')
-        evolucao = df_lancamentos.groupby('data')['valor'].sum().reset_index()
+        evolucao = db.session.query(
+            Lancamento.data,
+            func.sum(Lancamento.valor)
+        ).filter(
+            Lancamento.data >= inicio_mes,
+            Lancamento.data < fim_mes
+        ).group_by(Lancamento.data).order_by(Lancamento.data).all()
         evolucao_json = {
-            'datas': evolucao['data'].dt.strftime('%d/%m').tolist(),
-            'saldos': evolucao['valor'].tolist()
+            'datas': [d.strftime("%d/%m") for d, _ in evolucao],
+            'saldos': [float(v or 0.0) for _, v in evolucao]
         }
 
         resumo = {
@@ -193,41 +218,20 @@ if __name__ == "__main__":
     threading.Thread(target=abrir_navegador).start()
 
     with app.app_context():
-        db.create_all()
+        upgrade()
 
     print("🔧 Iniciando aplicação...")
     app.run(debug=False)
 
 
 import os
+import multiprocessing
 import secrets
 
 # 🔹 Pasta de uploads
 UPLOAD_FOLDER = 'uploads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# 🔹 Modelos do banco de dados
-class Categoria(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    nome = db.Column(db.String(50), nullable=False)
-    tipo = db.Column(db.String(10), nullable=False)  # Receita ou Despesa
-    meta_mensal = db.Column(db.Float, nullable=True)
-
-class Lancamento(db.Model):
-    __tablename__ = 'lancamento'
-    __table_args__ = {'extend_existing': True}
-
-    id = db.Column(db.Integer, primary_key=True)
-    competencia = db.Column(db.String(7), nullable=False)
-    data = db.Column(db.String(10), nullable=False)
-    descricao = db.Column(db.String(100), nullable=False)
-    estabelecimento = db.Column(db.String(100), nullable=True)
-    valor = db.Column(db.Float, nullable=False)
-    tipo = db.Column(db.String(10), nullable=False)
-    categoria = db.Column(db.String(50), nullable=False)
-    forma_pagamento = db.Column(db.String(50), nullable=True)
-
-
 # 🔹 Classe auxiliar para dicas de economia
 class Insights:
     def __init__(self):
@@ -242,9 +246,6 @@ class Insights:
     def dica_aleatoria(self):
         return secrets.choice(self.dicas_economia)
 
-# 🔹 Importações de IA
-from modelo_ia import classificar_texto, gerar_insights
-
 
 # 🔹 Injeta a data atual nos templates
 @app.context_processor
@@ -264,10 +265,6 @@ def gerar_dica_ia(saldo, perfil_risco, despesas_mes, meta_mensal):
     else:
         return None
 
-# 🔹 Wrapper para classificação de categoria via IA
-def sugerir_categoria(texto):
-    return classificar_texto(texto, "")
-
 
 
 # 🔹 Rota para registrar nova compra parcelada no cartão
@@ -284,76 +281,86 @@ def nova_compra_cartao():
             flash("Preencha todos os campos corretamente.", "danger")
             return redirect(url_for("nova_compra_cartao"))
 
-        # 🔍 Verificação contra duplicatas
-        compra_existente = CompraCartao.query.filter_by(
-            descricao=descricao,
-            cartao=cartao,
-            valor_total=valor_total,
-            total_parcelas=total_parcelas,
-            data_primeira_fatura=data_primeira
-        ).first()
-
-        if compra_existente:
+        # ✅ Uma compra é um lote de uma: checagem de duplicata só por colunas e dois INSERTs (compra e parcelas)
+        resultado = importar_compras(pd.DataFrame([{
+            "descricao": descricao,
+            "cartao": cartao,
+            "valor_total": valor_total,
+            "total_parcelas": total_parcelas,
+            "data_primeira_fatura": data_primeira,
+        }]))
+        if resultado["rejeitadas"]:
+            flash(f"Preencha todos os campos corretamente ({resultado['rejeitadas'][0]['motivo']}).", "danger")
+            return redirect(url_for("nova_compra_cartao"))
+        if resultado["duplicadas"]:
             flash("Essa compra já foi registrada anteriormente!", "warning")
             return redirect(url_for("nova_compra_cartao"))
 
-        # ✅ Criação da nova compra
-        compra = CompraCartao(
-            descricao=descricao,
-            cartao=cartao,
-            valor_total=valor_total,
-            total_parcelas=total_parcelas,
-            data_primeira_fatura=data_primeira
-        )
-
-        db.session.add(compra)
-        db.session.flush()
-
-        parcelas = gerar_parcelas(compra)
-        db.session.add_all(parcelas)
-        db.session.commit()
-
-        # 🧮 Verifica se houve ajuste na última parcela
-        soma = sum(p.valor for p in parcelas)
-        ajuste_final = round(Decimal(str(valor_total)) - soma, 2) != 0
+        # 🧮 Verifica se a última parcela recebeu os centavos que sobraram da divisão
+        ajuste_final = round(valor_total * 100) % total_parcelas != 0
 
         flash("Compra parcelada cadastrada com sucesso!", "success")
         return render_template("nova_compra_cartao.html", ajuste_final=ajuste_final, valor_total=valor_total)
 
     return render_template("nova_compra_cartao.html")
 
+# 🔹 Cadastrar compras parceladas em lote (lista JSON ou arquivo .csv com as colunas do formulário)
+@app.route("/cartao/compras/lote", methods=["POST"])
+def importar_compras_cartao():
+    quer_json = request.is_json or \
+        request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+    arquivo = request.files.get("arquivo")
+
+    try:
+        if arquivo and arquivo.filename:
+            if not arquivo.filename.lower().endswith(".csv"):
+                raise ValueError("Arquivo inválido. Use .csv.")
+            # Separador detectado (vírgula ou ponto e vírgula); valores e datas no formato brasileiro são aceitos
+            resultado = importar_compras(pd.read_csv(arquivo, sep=None, engine="python", dtype=str), primeira_linha=2)
+        else:
+            dados = request.get_json(silent=True)
+            compras = dados.get("compras") if isinstance(dados, dict) else dados
+            if not isinstance(compras, list) or not compras:
+                raise ValueError("Envie uma lista de compras ou um arquivo .csv.")
+            resultado = importar_compras(pd.DataFrame(compras))
+    except ValueError as e:
+        if quer_json:
+            return jsonify({"erro": str(e)}), 400
+        flash(f"Erro ao importar compras: {e}", "danger")
+        return redirect(url_for("nova_compra_cartao"))
+
+    if quer_json:
+        return jsonify(resultado), 201
+    flash(f"{resultado['compras']} compra(s) e {resultado['parcelas']} parcela(s) cadastradas; "
+          f"{resultado['duplicadas']} duplicada(s) ignorada(s).", "success")
+    if resultado["rejeitadas"]:
+        exemplos = "; ".join(f"linha {r['linha']}: {r['motivo']}" for r in resultado["rejeitadas"][:5])
+        flash(f"{len(resultado['rejeitadas'])} linha(s) rejeitada(s) — {exemplos}", "warning")
+    return redirect(url_for("nova_compra_cartao"))
+
 # 🔹 Rota para listar parcelas do cartão
 @app.route("/cartao/parcelas")
 def listar_parcelas():
     mes = request.args.get("mes")
     cartao = request.args.get("cartao")
 
-    CompraAlias = aliased(CompraCartao)
-
-    query = db.session.query(ParcelaCartao).select_from(ParcelaCartao).join(
-        CompraAlias, ParcelaCartao.compra
-    ).options(joinedload(ParcelaCartao.compra))
-
-    if cartao:
-        query = query.filter(CompraAlias.cartao.ilike(f"%{cartao}%"))
-
-    if mes:
-        try:
-            ano, mes_num = map(int, mes.split("-"))
-            query = query.filter(
-                extract("year", ParcelaCartao.vencimento) == ano,
-                extract("month", ParcelaCartao.vencimento) == mes_num
-            )
-        except ValueError:
-            flash("Formato de mês inválido. Use AAAA-MM.", "warning")
-
-    parcelas = query.order_by(ParcelaCartao.vencimento).all()
+    faturas = []
+    try:
+        query = consulta_parcelas(mes, cartao)
+        if mes:
+            faturas = consulta_faturas_do_mes(mes, cartao).all()
+    except ValueError:
+        flash("Formato de mês inválido. Use AAAA-MM.", "warning")
+        query = consulta_parcelas(cartao=cartao)
+
+    parcelas = query.all()
     total_valor = sum(p.valor for p in parcelas)
     total_parcelas = len(parcelas)
 
     return render_template(
         "parcelas_cartao.html",
         parcelas=parcelas,
+        faturas=faturas,
         mes=mes,
         cartao=cartao,
         total_valor=total_valor,
@@ -379,7 +386,7 @@ def editar_parcela(id):
 
     return render_template("editar_parcela.html", parcela=parcela)
 
-# 🔹 Editar dados da compra (sem alterar parcelas)
+# 🔹 Editar dados da compra (valor total e 1ª fatura recalculam só as parcelas em aberto)
 @app.route("/cartao/editar/<int:id>", methods=["GET", "POST"])
 def editar_compra_cartao(id):
     compra = CompraCartao.query.get_or_404(id)
@@ -390,24 +397,45 @@ def editar_compra_cartao(id):
             compra.cartao = request.form["cartao"]
             compra.valor_total = float(request.form["valor_total"])
             compra.data_primeira_fatura = datetime.strptime(request.form["data_primeira_fatura"], "%Y-%m-%d").date()
-            db.session.commit()
-            flash("Compra atualizada com sucesso!", "success")
-            return redirect(url_for("listar_parcelas"))
         except (ValueError, KeyError):
             flash("Erro ao atualizar compra. Verifique os dados informados.", "danger")
+            return render_template("editar_compra_cartao.html", compra=compra)
+
+        try:
+            reparcelar(compra)
+        except ValueError as e:
+            db.session.rollback()
+            flash(f"Erro ao atualizar compra: {e}", "danger")
+            return redirect(url_for("editar_compra_cartao", id=id))
+        db.session.commit()
+        flash("Compra atualizada com sucesso!", "success")
+        return redirect(url_for("listar_parcelas"))
 
     return render_template("editar_compra_cartao.html", compra=compra)
 
 # 🔹 Editar compra completa com todas as parcelas
 @app.route("/cartao/compra/editar-completo/<int:id>", methods=["GET", "POST"])
 def editar_compra_completa(id):
-    compra = CompraCartao.query.get_or_404(id)
+    compra = CompraCartao.query.options(selectinload(CompraCartao.parcelas)).get_or_404(id)
 
     if request.method == "POST":
         try:
             compra.descricao = request.form["descricao"]
             compra.cartao = request.form.get("cartao", "")
-            compra.total_parcelas = int(request.form.get("total_parcelas", 0))
+            total_parcelas = int(request.form.get("total_parcelas", 0))
+
+            # 🔁 Mudou a quantidade: o cronograma é refeito (pagas preservadas) e os valores digitados são ignorados
+            if total_parcelas != len(compra.parcelas):
+                compra.total_parcelas = total_parcelas
+                try:
+                    reparcelar(compra)
+                except ValueError as e:
+                    db.session.rollback()
+                    flash(f"Erro ao atualizar compra: {e}", "danger")
+                    return redirect(url_for("editar_compra_completa", id=id))
+                db.session.commit()
+                flash(f"Compra reparcelada em {total_parcelas}x; parcelas pagas mantidas.", "success")
+                return redirect(url_for("editar_compra_completa", id=id))
 
             for parcela in compra.parcelas:
                 valor_key = f"valor_{parcela.id}"
@@ -425,97 +453,98 @@ def editar_compra_completa(id):
                     except ValueError:
                         flash(f"Data inválida para a parcela {parcela.numero}. Use o formato AAAA-MM-DD.", "danger")
 
+            # 🧮 Parcelas editadas à mão: o total da compra passa a ser a soma delas
+            compra.valor_total = sum(Decimal(str(parcela.valor)) for parcela in compra.parcelas)
             db.session.commit()
             flash("Compra atualizada com sucesso!", "success")
             return redirect(url_for("listar_parcelas"))
-        except Exception as e:
+        except (KeyError, ValueError, SQLAlchemyError):
+            db.session.rollback()
+            app.logger.exception("Erro ao atualizar a compra %s (edição completa)", id)
             flash("Erro ao atualizar compra completa.", "danger")
-            print("❌ Erro:", e)
 
     return render_template("editar_compra_completa.html", compra=compra)
 
 # 🔹 Alternar status de pagamento da parcela
 @app.route("/cartao/parcela/<int:parcela_id>/toggle", methods=["POST"])
 def toggle_parcela(parcela_id):
-    parcela = ParcelaCartao.query.get_or_404(parcela_id)
+    parcela = ParcelaCartao.query.options(joinedload(ParcelaCartao.compra)).get_or_404(parcela_id)
     parcela.paga = not parcela.paga
     db.session.commit()
     status = "paga" if parcela.paga else "a vencer"
     flash(f"Parcela {parcela.numero}/{parcela.compra.total_parcelas} marcada como {status}.", "success")
     return redirect(request.referrer or url_for("listar_parcelas"))
 
+# 🔹 Marcar a fatura inteira (ou as parcelas selecionadas dela) como paga ou a vencer, num único UPDATE
+@app.route("/cartao/fatura/pagamento", methods=["POST"])
+def pagar_fatura():
+    dados = request.get_json(silent=True) or request.form
+    quer_json = request.is_json or \
+        request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+    mes, cartao = dados.get("mes", ""), dados.get("cartao") or ""
+    paga = str(dados.get("paga", "1")).lower() in ("1", "true", "sim")
+    # Sem "parcelas", a fatura inteira; com a lista (mesmo vazia), só essas
+    ids = dados.get("parcelas") if request.is_json else (request.form.getlist("parcelas") or None)
+
+    try:
+        parcelas = None if ids is None else [int(i) for i in ids]
+        alteradas = marcar_fatura(mes, cartao, paga, parcelas)
+    except (TypeError, ValueError):
+        db.session.rollback()
+        if quer_json:
+            return jsonify({"erro": "Informe o mês (AAAA-MM) e ids de parcela válidos."}), 400
+        flash("Dados inválidos para o pagamento da fatura.", "danger")
+        return redirect(request.referrer or url_for("listar_parcelas"))
+    db.session.commit()
+
+    fatura = totais_da_fatura(mes, cartao)
+    if quer_json:
+        if fatura is None:
+            return jsonify({"erro": "Fatura não encontrada."}), 404
+        return jsonify({"paga": paga, "parcelas": alteradas, "fatura": fatura})
+
+    status = "pagas" if paga else "a vencer"
+    flash(f"{len(alteradas)} parcela(s) da fatura {mes[5:]}/{mes[:4]} ({cartao or 'Não informado'}) marcadas como {status}.", "success")
+    return redirect(request.referrer or url_for("listar_parcelas", mes=mes))
+
 # 🔹 API: Total de parcelas por mês
 @app.route("/api/parcelas-por-mes")
 def api_parcelas_por_mes():
-    dados = db.session.query(
-        extract("year", ParcelaCartao.vencimento).label("ano"),
-        extract("month", ParcelaCartao.vencimento).label("mes"),
-        db.func.sum(ParcelaCartao.valor).label("total")
-    ).group_by("ano", "mes").order_by("ano", "mes").all()
-
-    resultado = [
-        {
-            "mes": f"{int(mes):02d}/{ano}",
-            "total": float(total)
-        }
-        for ano, mes, total in dados
-    ]
-    return jsonify(resultado)
+    return jsonify(totais_por_mes())
 
 # 🔹 Página de planejamento financeiro futuro
 @app.route("/planejamento")
 def planejamento_futuro():
-    hoje = date.today()
-    ano_atual = hoje.year
-
-    dados = db.session.query(
-        extract("year", ParcelaCartao.vencimento).label("ano"),
-        extract("month", ParcelaCartao.vencimento).label("mes"),
-        CompraCartao.cartao,
-        db.func.count(ParcelaCartao.id).label("quantidade"),
-        db.func.sum(ParcelaCartao.valor).label("total")
-    ).join(CompraCartao).filter(
-        ParcelaCartao.vencimento >= hoje,
-        extract("year", ParcelaCartao.vencimento) == ano_atual
-    ).group_by("ano", "mes", CompraCartao.cartao).order_by("ano", "mes").all()
-
-    meses = {}
-    for ano, mes, cartao, quantidade, total in dados:
-        chave = f"{int(mes):02d}/{ano}"
-        if chave not in meses:
-            meses[chave] = []
-        meses[chave].append({
-            "cartao": cartao or "Não informado",
-            "quantidade": quantidade,
-            "total": float(total)
-        })
-
-    return render_template("planejamento.html", meses=meses)
+    horizonte = request.args.get("meses", type=int)
+    meses = {
+        mes: [{"cartao": cartao, **totais} for cartao, totais in cartoes.items()]
+        for mes, cartoes in planejamento_por_mes(meses=horizonte).items()
+    }
+
+    # 🔮 Previsão sazonal já gravada; se um mês fechou (ou o histórico mudou), o reajuste roda em segundo plano
+    if previsao_desatualizada():
+        enfileirar_previsao(current_app._get_current_object())
+    fluxo = fluxo_previsto(*horizonte_do_planejamento(meses=horizonte))
+    for mes, previsto in fluxo.items():
+        cartoes = meses.get(f"{mes[5:7]}/{mes[:4]}", [])
+        previsto["cartoes"] = round(sum(r["total"] - r["pago"] for r in cartoes), 2)
+        previsto["saldo"] = round(previsto["receitas"] - previsto["despesas"] - previsto["cartoes"], 2)
+    return render_template("planejamento.html", meses=meses, horizonte=horizonte, fluxo=fluxo)
 
 # 🔹 API: Planejamento por cartão
 @app.route("/api/planejamento-por-cartao")
 def api_planejamento_por_cartao():
-    hoje = date.today()
-    ano_atual = hoje.year
-
-    dados = db.session.query(
-        extract("year", ParcelaCartao.vencimento).label("ano"),
-        extract("month", ParcelaCartao.vencimento).label("mes"),
-        CompraCartao.cartao,
-        db.func.sum(ParcelaCartao.valor).label("total")
-    ).join(CompraCartao).filter(
-        ParcelaCartao.vencimento >= hoje,
-        extract("year", ParcelaCartao.vencimento) == ano_atual
-    ).group_by("ano", "mes", CompraCartao.cartao).order_by("ano", "mes").all()
-
-    resultado = {}
-    for ano, mes, cartao, total in dados:
-        chave = f"{int(mes):02d}/{ano}"
-        if chave not in resultado:
-            resultado[chave] = {}
-        resultado[chave][cartao or "Não informado"] = float(total)
+    return jsonify({
+        mes: {cartao: totais["total"] for cartao, totais in cartoes.items()}
+        for mes, cartoes in planejamento_por_mes(meses=request.args.get("meses", type=int)).items()
+    })
 
-    return jsonify(resultado)
+# 🔹 Função auxiliar: responde a importação enfileirada em JSON ou volta para /lancar
+def responder_importacao(importacao):
+    if request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json":
+        return jsonify(progresso(importacao)), 202
+    flash(f"Importação #{importacao.id} enfileirada. Acompanhe o progresso abaixo.", "info")
+    return redirect(url_for("lancar", importacao=importacao.id))
 
 # 🔹 Importar extrato bancário (.csv ou .txt)
 @app.route("/importar-extrato", methods=["POST"])
@@ -526,37 +555,12 @@ def importar_extrato():
         return redirect(url_for("lancar"))
 
     try:
-        df = pd.read_csv(file)
-        df.columns = [c.lower().strip() for c in df.columns]
-
-        for _, row in df.iterrows():
-            descricao = str(row.get("lançamentos", "")).strip()
-            try:
-                valor = float(row.get("valor", 0))
-            except ValueError:
-                valor = 0.0
-            data = str(row.get("data", ""))[:10] if row.get("data") else ""
-            tipo = "Despesa" if valor < 0 else "Receita"
-            categoria = classificar_texto(descricao, "")
-            competencia = data[:7] if data else ""
-
-            lanc = Lancamento(
-                competencia=competencia,
-                data=data,
-                descricao=descricao,
-                estabelecimento="",
-                valor=abs(valor),
-                tipo=tipo,
-                categoria=categoria
-            )
-            db.session.add(lanc)
-
-        db.session.commit()
-        flash("Extrato bancário importado com sucesso!", "success")
+        importacao = enfileirar_importacao(current_app._get_current_object(), file, "extrato", "csv", UPLOAD_FOLDER)
     except Exception as e:
         flash(f"Erro ao importar extrato: {str(e)}", "danger")
+        return redirect(url_for("lancar"))
 
-    return redirect(url_for("lancar"))
+    return responder_importacao(importacao)
 
 # 🔹 Importar planilha Excel (.xlsx)
 @app.route("/importar-planilha", methods=["POST"])
@@ -567,38 +571,49 @@ def importar_planilha():
         return redirect(url_for("lancar"))
 
     try:
-        df = pd.read_excel(file)
-        df.columns = [c.lower().strip() for c in df.columns]
+        importacao = enfileirar_importacao(current_app._get_current_object(), file, "planilha", "xlsx", UPLOAD_FOLDER)
+    except Exception as e:
+        flash(f"Erro ao importar planilha: {str(e)}", "danger")
+        return redirect(url_for("lancar"))
 
-        for _, row in df.iterrows():
-            descricao = str(row.get("descricao", "")).strip()
-            estabelecimento = str(row.get("estabelecimento", "")).strip()
-            try:
-                valor = float(row.get("valor", 0))
-            except ValueError:
-                valor = 0.0
-            tipo = str(row.get("tipo", "")).strip()
-            categoria = classificar_texto(descricao, estabelecimento)
-            competencia = str(row.get("competencia", "")).strip()
-            data = str(row.get("data", ""))[:10] if row.get("data") else ""
-
-            lanc = Lancamento(
-                competencia=competencia,
-                data=data,
-                descricao=descricao,
-                estabelecimento=estabelecimento,
-                valor=valor,
-                tipo=tipo,
-                categoria=categoria
-            )
-            db.session.add(lanc)
+    return responder_importacao(importacao)
 
-        db.session.commit()
-        flash("Planilha Excel importada com sucesso!", "success")
+# 🔹 Tipo e formato de importação conforme a extensão do arquivo
+EXTENSOES_IMPORTACAO = {".csv": ("extrato", "csv"), ".txt": ("extrato", "csv"), ".xlsx": ("planilha", "xlsx")}
+
+# 🔹 Importar vários arquivos de uma vez (extratos e planilhas do mês, em paralelo)
+@app.route("/importar-lote", methods=["GET", "POST"])
+def importar_lote():
+    if request.method == "GET":
+        ids = [int(i) for i in request.args.get("importacoes", "").split(",") if i.isdigit()]
+        return render_template("upload.html", importacoes=ids)
+
+    arquivos = [f for f in request.files.getlist("arquivos") if f and f.filename]
+    tipos = [EXTENSOES_IMPORTACAO.get(os.path.splitext(f.filename.lower())[1]) for f in arquivos]
+    if not arquivos or None in tipos:
+        flash("Arquivo inválido. Use .csv, .txt ou .xlsx.", "danger")
+        return redirect(url_for("importar_lote"))
+
+    try:
+        importacoes = enfileirar_lote(
+            current_app._get_current_object(),
+            [(arquivo, tipo, formato) for arquivo, (tipo, formato) in zip(arquivos, tipos)],
+            UPLOAD_FOLDER
+        )
     except Exception as e:
-        flash(f"Erro ao importar planilha: {str(e)}", "danger")
+        flash(f"Erro ao importar arquivos: {str(e)}", "danger")
+        return redirect(url_for("importar_lote"))
 
-    return redirect(url_for("lancar"))
+    if request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json":
+        return jsonify([progresso(i) for i in importacoes]), 202
+    flash(f"{len(importacoes)} arquivo(s) enfileirado(s). Acompanhe o progresso abaixo.", "info")
+    return redirect(url_for("importar_lote", importacoes=",".join(str(i.id) for i in importacoes)))
+
+# 🔹 API: andamento de uma importação
+@app.route("/api/importacoes/<int:id>")
+def api_importacao(id):
+    importacao = Importacao.query.get_or_404(id)
+    return jsonify(progresso(importacao))
 
 # 🔹 Gerenciar categorias (cadastro e visualização)
 @app.route("/categorias", methods=["GET", "POST"])
@@ -626,7 +641,89 @@ def categorias():
         return redirect(url_for("categorias"))
 
     todas = Categoria.query.order_by(Categoria.tipo.desc(), Categoria.nome).all()
-    return render_template("categorias.html", categorias=todas)
+    regras = RegraCategoria.query.order_by(RegraCategoria.prioridade, RegraCategoria.id).all()
+    metas_pagamento = MetaFormaPagamento.query.order_by(MetaFormaPagamento.forma_pagamento).all()
+    return render_template("categorias.html", categorias=todas, regras=regras, metas_pagamento=metas_pagamento,
+                           modelo=modelo_atual())
+
+# 🔹 Meta mensal de uma forma de pagamento (ex.: Cartão); sem valor, a meta é removida
+@app.route("/categorias/metas-pagamento", methods=["POST"])
+def meta_forma_pagamento():
+    forma = (request.form.get("forma_pagamento") or "").strip()
+    try:
+        meta = float(request.form.get("meta_mensal") or 0)
+    except ValueError:
+        meta = -1
+    if not forma or meta < 0:
+        flash("Informe a forma de pagamento e uma meta válida.", "warning")
+        return redirect(url_for("categorias"))
+
+    registro = db.session.get(MetaFormaPagamento, forma)
+    if meta == 0:
+        if registro is not None:
+            db.session.delete(registro)
+        flash(f"Meta de {forma} removida.", "success")
+    else:
+        if registro is None:
+            db.session.add(MetaFormaPagamento(forma_pagamento=forma, meta_mensal=meta))
+        else:
+            registro.meta_mensal = meta
+        flash(f"Meta de {forma} definida em R$ {meta:.2f}.", "success")
+    db.session.commit()
+    return redirect(url_for("categorias"))
+
+# 🔹 Cadastrar regra de palavra-chave do classificador
+@app.route("/categorias/regras", methods=["POST"])
+def nova_regra_categoria():
+    palavra = (request.form.get("palavra") or "").strip()
+    categoria = (request.form.get("categoria") or "").strip()
+    campo = request.form.get("campo", "qualquer")
+
+    if not palavra or not categoria or campo not in ("descricao", "estabelecimento", "qualquer"):
+        flash("Preencha a palavra-chave, a categoria e o campo.", "warning")
+        return redirect(url_for("categorias"))
+
+    try:
+        db.session.add(RegraCategoria(
+            palavra=palavra,
+            categoria=categoria,
+            campo=campo,
+            prioridade=int(request.form.get("prioridade") or 0)
+        ))
+        db.session.commit()
+        flash("Regra cadastrada! Novas importações já usam a regra.", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Erro ao cadastrar regra: {str(e)}", "danger")
+    return redirect(url_for("categorias"))
+
+# 🔹 Excluir regra de palavra-chave
+@app.route("/categorias/regras/<int:id>/excluir", methods=["POST"])
+def excluir_regra_categoria(id):
+    regra = RegraCategoria.query.get_or_404(id)
+    db.session.delete(regra)
+    db.session.commit()
+    flash("Regra excluída.", "success")
+    return redirect(url_for("categorias"))
+
+# 🔹 Retreinar o modelo de categorias com os lançamentos já categorizados
+@app.route("/categorias/modelo/treinar", methods=["POST"])
+def treinar_modelo_categorias():
+    try:
+        modelo = treinar_modelo()
+        # Estabelecimentos classificados pelo modelo antigo voltam a ser classificados pelo novo
+        descartar_classificados()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Erro ao treinar o modelo: {str(e)}", "danger")
+        return redirect(url_for("categorias"))
+
+    if modelo.utilizavel:
+        flash(f"Modelo treinado com {int(modelo.documentos.sum())} lançamentos em {len(modelo.categorias)} categorias.", "success")
+    else:
+        flash("Ainda há poucos lançamentos categorizados para treinar o modelo; valem só as regras.", "warning")
+    return redirect(url_for("categorias"))
 
 
 # 🔹 Função auxiliar: últimos n meses no formato AAAA-MM
@@ -642,33 +739,27 @@ def get_last_months(n=6):
             y -= 1
     return list(reversed(months))
 
-# 🔹 Reclassificar lançamentos com categoria "Outros"
-@app.route("/reclassificar_antigos")
+# 🔹 Reclassificar lançamentos com categoria "Outros" (em segundo plano; com simular=1 só relata o que mudaria)
+@app.route("/reclassificar_antigos", methods=["GET", "POST"])
 def reclassificar_antigos():
-    lancamentos = Lancamento.query.filter_by(categoria="Outros").all()
-    atualizados = 0
-
-    for l in lancamentos:
-        texto = f"{l.descricao} {l.estabelecimento}"
-        nova_categoria = sugerir_categoria(texto)
-
-        if nova_categoria and nova_categoria != "Outros":
-            categoria_obj = Categoria.query.filter_by(nome=nova_categoria).first()
-            if not categoria_obj:
-                categoria_obj = Categoria(
-                    nome=nova_categoria,
-                    tipo="Despesa",  # ou "Receita", dependendo do contexto
-                    meta_mensal=None
-                )
-                db.session.add(categoria_obj)
-                db.session.commit()
+    simulacao = request.values.get("simular", "").lower() in ("1", "true", "sim")
+    try:
+        reclassificacao = enfileirar_reclassificacao(current_app._get_current_object(), simulacao)
+    except Exception as e:
+        flash(f"Erro ao reclassificar lançamentos: {str(e)}", "danger")
+        return redirect(url_for("lancar"))
 
-            l.categoria = categoria_obj.nome
-            atualizados += 1
+    if request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json":
+        return jsonify(progresso_reclassificacao(reclassificacao)), 202
+    acao = "Simulação da reclassificação" if simulacao else "Reclassificação"
+    flash(f"{acao} #{reclassificacao.id} enfileirada. Acompanhe o progresso abaixo.", "info")
+    return redirect(url_for("lancar", reclassificacao=reclassificacao.id))
 
-    db.session.commit()
-    flash(f"{atualizados} lançamentos reclassificados com sucesso!", "info")
-    return redirect(url_for("lancar"))
+# 🔹 API: andamento (e resultado da simulação) de uma reclassificação
+@app.route("/api/reclassificacoes/<int:id>")
+def api_reclassificacao(id):
+    reclassificacao = Reclassificacao.query.get_or_404(id)
+    return jsonify(progresso_reclassificacao(reclassificacao))
 
 # 🔹 Editar lançamento individual
 @app.route("/editar/<int:id>", methods=["GET", "POST"])
@@ -677,25 +768,46 @@ def editar(id):
 
     if request.method == "POST":
         try:
-            lanc.data = request.form["data"]
+            categoria_anterior = lanc.categoria
+            categoria = (request.form.get("categoria") or "").strip()
+            try:
+                lanc.data = datetime.strptime(request.form["data"], "%Y-%m-%d").date()
+            except ValueError:
+                flash("Data inválida. Use o formato AAAA-MM-DD.", "danger")
+                return redirect(url_for("editar", id=id))
             lanc.descricao = request.form["descricao"]
             lanc.estabelecimento = request.form["estabelecimento"]
             lanc.valor = float(request.form["valor"])
             lanc.tipo = request.form["tipo"]
             lanc.forma_pagamento = request.form["forma_pagamento"]
-            lanc.categoria = classificar_texto(lanc.descricao, lanc.estabelecimento)
+
+            # Categoria trocada à mão vira correção do estabelecimento; senão, reclassifica
+            if categoria and categoria != categoria_anterior:
+                registrar_correcao(lanc.descricao, lanc.estabelecimento, categoria)
+                lanc.categoria = categoria
+            else:
+                lanc.categoria = categoria_de(lanc.descricao, lanc.estabelecimento)
             db.session.commit()
             flash("Lançamento atualizado com sucesso!", "success")
             return redirect(url_for("index"))
         except Exception as e:
+            db.session.rollback()
             flash(f"Erro ao atualizar lançamento: {str(e)}", "danger")
 
-    return render_template("editar.html", lancamento=lanc)
+    categorias = [c.nome for c in Categoria.query.order_by(Categoria.nome).all()]
+    return render_template("editar.html", lancamento=lanc, categorias=categorias)
+
+# 🔹 API: sugestão de categoria enquanto o usuário digita (não grava no cache persistente)
+@app.route("/api/classificar", methods=["POST"])
+def api_classificar():
+    dados = request.get_json(silent=True) or {}
+    categoria = categoria_de(dados.get("descricao", ""), dados.get("estabelecimento", ""), gravar=False)
+    return jsonify({"categoria": categoria})
 
 # 🔹 Excluir compra parcelada e suas parcelas
 @app.route("/cartao/excluir/<int:compra_id>", methods=["POST"])
 def excluir_compra_cartao(compra_id):
-    compra = CompraCartao.query.get_or_404(compra_id)
+    compra = CompraCartao.query.options(selectinload(CompraCartao.parcelas)).get_or_404(compra_id)
 
     for parcela in compra.parcelas:
         db.session.delete(parcela)
@@ -717,24 +829,65 @@ def excluir(id):
     flash("Lançamento excluído com sucesso!", "success")
     return redirect(url_for("index"))
 
+# 🔹 API: previsão de gastos do mês por categoria, forma de pagamento e cartão
+@app.route("/api/previsao")
+def api_previsao():
+    mes = request.args.get("mes") or date.today().strftime("%Y-%m")
+    if not competencia_valida(mes):
+        return jsonify({"erro": "Mês inválido. Use o formato AAAA-MM."}), 400
+    return jsonify(previsao_do_mes(mes))
+
+# 🔹 API: alertas de meta de uma competência
+@app.route("/api/alertas")
+def api_alertas():
+    competencia = request.args.get("competencia") or date.today().strftime("%Y-%m")
+    if not competencia_valida(competencia):
+        return jsonify({"erro": "Competência inválida. Use o formato AAAA-MM."}), 400
+    estouros = alertas_do_mes(competencia)
+    return jsonify({
+        "competencia": competencia,
+        "alertas": mensagens(estouros),
+        "estouros": estouros.round(2).to_dict(orient="records")
+    })
+
+# 🔹 API: backtest das regras de alerta em todo o histórico
+@app.route("/api/alertas/historico")
+def api_alertas_historico():
+    inicio, fim = request.args.get("inicio"), request.args.get("fim")
+    if any(m and not competencia_valida(m) for m in (inicio, fim)):
+        return jsonify({"erro": "Competência inválida. Use o formato AAAA-MM."}), 400
+    meses, estouros = historico_de_alertas(inicio, fim)
+    return jsonify({
+        "meses": meses,
+        "meses_com_estouro": int(estouros["competencia"].nunique()),
+        "resumo": resumo_do_historico(estouros),
+        "estouros": estouros.round(2).to_dict(orient="records")
+    })
+
 # 🔹 API: listar competências disponíveis
 @app.route("/api/competencias")
 def api_competencias():
-    rows = db.session.query(Lancamento.competencia).distinct().all()
+    rows = db.session.query(ResumoMensal.competencia).distinct().all()
     comps = sorted([c[0] for c in rows if c[0]], reverse=True)
     return jsonify({"competencias": comps})
 
+# 🔹 Função auxiliar: totais de receitas e despesas a partir do resumo mensal
+def totais_por_tipo(competencia=None):
+    q = db.session.query(
+        ResumoMensal.tipo,
+        func.coalesce(func.sum(ResumoMensal.total), 0.0)
+    )
+    if competencia:
+        q = q.filter(ResumoMensal.competencia == competencia)
+
+    totais = dict(q.group_by(ResumoMensal.tipo).all())
+    return float(totais.get("Receita", 0.0)), float(totais.get("Despesa", 0.0))
+
 # 🔹 API: métricas ajustadas para o dashboard
 @app.route("/api/metrics-ajustado")
 def api_metrics_ajustado():
     competencia = request.args.get("competencia")
-    filtros = [Lancamento.competencia == competencia] if competencia else []
-
-    total_receitas = db.session.query(func.coalesce(func.sum(Lancamento.valor), 0.0))\
-        .filter(Lancamento.tipo == "Receita", *filtros).scalar() or 0.0
-
-    total_despesas = db.session.query(func.coalesce(func.sum(Lancamento.valor), 0.0))\
-        .filter(Lancamento.tipo == "Despesa", *filtros).scalar() or 0.0
+    total_receitas, total_despesas = totais_por_tipo(competencia)
 
     saldo_real = total_receitas - total_despesas
 
@@ -765,13 +918,7 @@ def api_metrics_ajustado():
 @app.route("/api/metrics")
 def api_metrics():
     competencia = request.args.get("competencia")
-    filtros = [Lancamento.competencia == competencia] if competencia else []
-
-    total_receitas = db.session.query(func.coalesce(func.sum(Lancamento.valor), 0.0))\
-        .filter(Lancamento.tipo == "Receita", *filtros).scalar() or 0.0
-
-    total_despesas = db.session.query(func.coalesce(func.sum(Lancamento.valor), 0.0))\
-        .filter(Lancamento.tipo == "Despesa", *filtros).scalar() or 0.0
+    total_receitas, total_despesas = totais_por_tipo(competencia)
 
     saldo = total_receitas - total_despesas
 
@@ -789,20 +936,24 @@ def api_metrics():
     })
 
 
-# 🔹 API: Despesas por categoria
-@app.route("/api/charts/despesas-por-categoria")
-def api_despesas_por_categoria():
-    competencia = request.args.get("competencia")
+# 🔹 Função auxiliar: despesas agrupadas por categoria (maior total primeiro)
+def despesas_por_categoria(competencia=None):
     q = db.session.query(
-        Lancamento.categoria,
-        func.coalesce(func.sum(Lancamento.valor), 0.0).label("total")
-    ).filter(Lancamento.tipo == "Despesa")
+        ResumoMensal.categoria,
+        func.coalesce(func.sum(ResumoMensal.total), 0.0).label("total")
+    ).filter(ResumoMensal.tipo == "Despesa")
 
     if competencia:
-        q = q.filter(Lancamento.competencia == competencia)
+        q = q.filter(ResumoMensal.competencia == competencia)
 
-    q = q.group_by(Lancamento.categoria).order_by(func.sum(Lancamento.valor).desc())
-    data = [{"categoria": r.categoria, "total": float(r.total or 0)} for r in q.all()]
+    q = q.group_by(ResumoMensal.categoria).order_by(func.sum(ResumoMensal.total).desc())
+    return [(r.categoria, float(r.total or 0)) for r in q.all()]
+
+# 🔹 API: Despesas por categoria
+@app.route("/api/charts/despesas-por-categoria")
+def api_despesas_por_categoria():
+    competencia = request.args.get("competencia")
+    data = [{"categoria": c, "total": t} for c, t in despesas_por_categoria(competencia)]
     return jsonify({"data": data})
 
 # 🔹 API: Fluxo mensal (últimos 6 meses)
@@ -810,11 +961,11 @@ def api_despesas_por_categoria():
 def api_fluxo_mensal():
     months = get_last_months(6)
     rows = db.session.query(
-        Lancamento.competencia,
-        Lancamento.tipo,
-        func.coalesce(func.sum(Lancamento.valor), 0.0).label("total")
-    ).filter(Lancamento.competencia.in_(months))\
-     .group_by(Lancamento.competencia, Lancamento.tipo).all()
+        ResumoMensal.competencia,
+        ResumoMensal.tipo,
+        func.coalesce(func.sum(ResumoMensal.total), 0.0).label("total")
+    ).filter(ResumoMensal.competencia.in_(months))\
+     .group_by(ResumoMensal.competencia, ResumoMensal.tipo).all()
 
     agg = {m: {"Receita": 0.0, "Despesa": 0.0} for m in months}
     for comp, tipo, total in rows:
@@ -827,29 +978,98 @@ def api_fluxo_mensal():
         "despesas": [agg[m]["Despesa"] for m in months]
     })
 
+# 🔧 Comandos de manutenção do resumo mensal (flask resumo reconstruir | verificar)
+@app.cli.group("resumo")
+def resumo_cli():
+    """Manutenção da tabela resumo_mensal."""
+
+@resumo_cli.command("reconstruir")
+def resumo_reconstruir():
+    """Recalcula o resumo mensal a partir de todos os lançamentos."""
+    linhas = reconstruir_resumo()
+    print(f"✅ Resumo mensal reconstruído: {linhas} linhas.")
+
+@resumo_cli.command("verificar")
+def resumo_verificar():
+    """Compara o resumo mensal com a agregação completa dos lançamentos."""
+    divergencias = verificar_resumo()
+    if not divergencias:
+        print("✅ Resumo mensal consistente.")
+        return
+    print(f"⚠️ {len(divergencias)} divergência(s) encontradas:")
+    for d in divergencias:
+        print(f"  {d['chave']} → esperado {d['esperado']}, resumo {d['resumo']}")
+    raise SystemExit(1)
+
+
+# 🔧 Comandos de manutenção das faturas (flask faturas reconstruir | verificar)
+@app.cli.group("faturas")
+def faturas_cli():
+    """Manutenção da tabela fatura."""
+
+@faturas_cli.command("reconstruir")
+def faturas_reconstruir():
+    """Recalcula todas as faturas a partir das parcelas."""
+    linhas = reconstruir_faturas()
+    print(f"✅ Faturas reconstruídas: {linhas} linhas.")
+
+@faturas_cli.command("verificar")
+def faturas_verificar():
+    """Compara as faturas com a agregação completa das parcelas."""
+    divergencias = verificar_faturas()
+    if not divergencias:
+        print("✅ Faturas consistentes.")
+        return
+    print(f"⚠️ {len(divergencias)} divergência(s) encontradas:")
+    for d in divergencias:
+        print(f"  {d['chave']} → esperado {d['esperado']}, fatura {d['fatura']}")
+    raise SystemExit(1)
+
+
+# 🔧 Comando da previsão sazonal (flask previsao atualizar)
+@app.cli.group("previsao")
+def previsao_cli():
+    """Previsão sazonal por categoria (tabela previsao_mensal)."""
+
+@previsao_cli.command("atualizar")
+def previsao_atualizar():
+    """Reajusta o modelo sazonal com todo o histórico e regrava as previsões."""
+    linhas = atualizar_previsoes(forcar=True)
+    print(f"✅ Previsões atualizadas: {linhas} linhas.")
+
+
+# 🔧 Comando do modelo de categorias (flask modelo treinar)
+@app.cli.group("modelo")
+def modelo_cli():
+    """Modelo de categorias treinado com os lançamentos."""
+
+@modelo_cli.command("treinar")
+def modelo_treinar():
+    """Treina o modelo do zero com os lançamentos já categorizados."""
+    modelo = treinar_modelo()
+    descartar_classificados()
+    db.session.commit()
+    situacao = "em uso" if modelo.utilizavel else "poucos exemplos, valem só as regras"
+    print(f"✅ Modelo treinado: {int(modelo.documentos.sum())} lançamentos, {len(modelo.categorias)} categorias ({situacao}).")
+
 
+# 🔧 Verificação dos planos das consultas de parcelas (flask parcelas verificar-planos)
+@app.cli.group("parcelas")
+def parcelas_cli():
+    """Consultas das parcelas de cartão."""
+
+@parcelas_cli.command("verificar-planos")
+def parcelas_verificar_planos():
+    """Confere via EXPLAIN QUERY PLAN que as consultas quentes de parcelas usam índice."""
+    sem_indice = consultas_sem_indice()
+    if not sem_indice:
+        print("✅ Todas as consultas de parcelas usam índice.")
+        return
+    print(f"⚠️ {len(sem_indice)} consulta(s) varrendo parcelas_cartao sem índice:")
+    for nome, plano in sem_indice.items():
+        print(f"  {nome}: {' | '.join(plano)}")
+    raise SystemExit(1)
 
-# 🔧 Função auxiliar
-def carregar_lancamentos():
-    try:
-        lancamentos = Lancamento.query.all()
-        dados = [{
-            "data": l.data,
-            "competencia": l.competencia,
-            "descricao": l.descricao,
-            "estabelecimento": l.estabelecimento,
-            "valor": float(l.valor),
-            "tipo": l.tipo,
-            "categoria": l.categoria,
-            "forma_pagamento": l.forma_pagamento
-        } for l in lancamentos]
-
-        df = pd.DataFrame(dados)
-        df['data'] = pd.to_datetime(df['data'], errors='coerce')
-        return df
-    except Exception as e:
-        print("⚠️ Erro ao carregar lançamentos:", e)
-        return pd.DataFrame()
 
 # 🔹 API: Sugestão de aplicação financeira
 @app.route('/api/sugestao_aplicacao', methods=['POST'])
@@ -868,58 +1088,137 @@ def sugestao_aplicacao():
     else:
         opcoes = ["Fundos multimercado", "ETFs de renda fixa"]
 
-    crescimento = []
-    saldo_simulado = saldo
-    for mes in range(prazo):
-        saldo_simulado += aporte
-        saldo_simulado *= 1.003
-        crescimento.append(round(saldo_simulado, 2))
+    taxa = float(data.get('taxa_mensal', TAXA_PADRAO)) / 100
+    crescimento = [round(v, 2) for v in projecao(saldo, aporte, prazo, taxa).tolist()]
+    saldo_simulado = float(saldo_final(saldo, aporte, prazo, taxa))
 
     meta_atingida = saldo_simulado >= meta
     alerta = "Meta será atingida!" if meta_atingida else "Meta não será atingida com esse aporte."
 
-    if not meta_atingida:
-        saldo_temp = saldo
-        fator = sum([(1.003) ** i for i in range(1, prazo + 1)])
-        try:
-            aporte_ideal = (meta - saldo_temp * (1.003) ** prazo) / fator
-        except ZeroDivisionError:
-            aporte_ideal = aporte
+    if not meta_atingida and prazo > 0:
+        aporte_ideal = float(aporte_necessario(meta, saldo, prazo, taxa))
     else:
         aporte_ideal = aporte
 
-    return jsonify({
+    resposta = {
         "aporte_mensal": round(aporte, 2),
         "opcoes": opcoes,
         "projecao": crescimento,
         "alerta": alerta,
         "aporte_ideal": round(aporte_ideal, 2)
-    })
+    }
+
+    # 🎲 Modo estocástico: retornos sorteados pelo perfil, com a chance de atingir a meta
+    if data.get('simulacao') == 'monte_carlo':
+        try:
+            caminhos = int(data.get('caminhos', CAMINHOS))
+            semente = int(data.get('semente', SEMENTE_PADRAO))
+        except (TypeError, ValueError):
+            return jsonify({"erro": "Caminhos e semente devem ser números inteiros."}), 400
+        try:
+            estocastica = monte_carlo(saldo, meta, aporte, prazo, perfil, caminhos=caminhos, semente=semente)
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        resposta["monte_carlo"] = estocastica
+        resposta["alerta"] = (f"Chance de atingir a meta: {estocastica['probabilidade_meta'] * 100:.0f}% "
+                              f"(perfil {perfil}, {estocastica['caminhos']} simulações).")
+
+    return jsonify(resposta)
+
+# 🔹 API: grade de cenários do simulador (aportes × prazos × taxas)
+@app.route("/api/simulador/cenarios", methods=["POST"])
+def api_simulador_cenarios():
+    dados = request.get_json(silent=True) or {}
+    try:
+        saldo = float(dados.get("saldo_atual") or 0)
+        meta = float(dados.get("meta") or 0)
+    except (TypeError, ValueError):
+        return jsonify({"erro": "Saldo atual e meta devem ser números."}), 400
+
+    try:
+        resultado = grade_cenarios(saldo, meta, dados.get("aportes", [0]), dados.get("prazos", [12]),
+                                   dados.get("taxas", [TAXA_PADRAO]))
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    return jsonify(resultado)
+
+# 🔹 Simulador de reserva (uma simulação no formulário e tabelas de sensibilidade via /api/simulador/cenarios)
+@app.route("/simulador", methods=["GET", "POST"])
+def simulador():
+    resultado = None
+    if request.method == "POST":
+        try:
+            meta = float(request.form["meta"])
+            aporte = float(request.form["aporte"])
+            prazo = int(request.form["prazo"])
+            taxa = float(request.form.get("rendimento") or TAXA_PADRAO) / 100
+            saldo = float(request.form.get("saldo") or 0)
+            if not 1 <= prazo <= MAXIMO_PRAZO:
+                raise ValueError
+        except (ValueError, KeyError):
+            flash("Dados inválidos. Verifique meta, aporte, prazo e rendimento.", "danger")
+            return redirect(url_for("simulador"))
+
+        historico = [round(v, 2) for v in projecao(saldo, aporte, prazo, taxa).tolist()]
+        resultado = {
+            "final": historico[-1],
+            "atingiu_meta": historico[-1] >= meta,
+            "historico": historico,
+            "aporte_necessario": round(float(aporte_necessario(meta, saldo, prazo, taxa)), 2),
+        }
+    return render_template("simulador.html", resultado=resultado, dados=request.form)
 
 # 🔹 Impressão das rotas registradas
 print("Rotas registradas:")
 for rule in app.url_map.iter_rules():
     print(f"{rule.endpoint} → {rule.rule}")
 
-# 🔹 Geração de alertas com IA
-with app.app_context():
-    try:
-        engine = db.engine
-        df = pd.read_sql('SELECT * FROM lancamento', engine)
+# 🔹 Aplica as migrações pendentes (todas as tabelas vêm delas) e garante o resumo mensal e as faturas
+# populados ao iniciar. Só no processo principal: os workers do pool de importação (spawn) reimportam este módulo.
+if multiprocessing.parent_process() is None:
+    with app.app_context():
+        try:
+            upgrade()
+        except Exception as e:
+            print(f"⚠️ Erro ao aplicar migrações: {e}")
 
-        if df.empty:
-            print("⚠️ Nenhum lançamento encontrado.")
-        else:
-            if 'data' in df.columns:
-                df['data'] = pd.to_datetime(df['data'], errors='coerce')
+        try:
+            garantir_resumo()
+            garantir_faturas()
+        except Exception as e:
+            print(f"⚠️ Erro ao preparar resumo mensal e faturas: {e}")
+
+        # 🔹 Previsão sazonal por categoria (reajustada se um mês fechou desde a última vez)
+        try:
+            garantir_previsoes()
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar as previsões: {e}")
+
+        # 🔹 Primeiro treino do modelo de categorias (se ainda não há arquivo)
+        try:
+            garantir_modelo()
+        except Exception as e:
+            print(f"⚠️ Erro ao treinar o modelo de categorias: {e}")
+
+    # 🔹 Pool de processos das importações em lote: criado aqui, na thread principal, e não sob demanda
+    iniciar_processos(app)
+
+    # 🔹 Retoma importações interrompidas por um reinício
+    try:
+        retomar_pendentes(app)
+    except Exception as e:
+        print(f"⚠️ Erro ao retomar importações: {e}")
 
+    # 🔹 Geração de alertas com IA
+    with app.app_context():
+        try:
             saldo = 1200.00
-            alertas = gerar_alertas(df, saldo)
+            alertas = gerar_alertas(date.today().strftime("%Y-%m"), saldo)
             for alerta in alertas:
                 print(alerta)
 
-    except Exception as e:
-        print(f"❌ Erro ao carregar dados: {e}")
+        except Exception as e:
+            print(f"❌ Erro ao carregar dados: {e}")
 
 # 🔹 Função auxiliar para carregar dados ao iniciar
 def carregar_dados_iniciais():
@@ -1046,13 +1345,74 @@ def testar_conexao():
     except Exception as e:
         print(f"❌ Erro ao carregar dados: {e}")
 
+# 🔹 Função auxiliar: uma página de lançamentos, do mais recente para o mais antigo
+LIMITE_PAGINA = 50
+LIMITE_PAGINA_MAXIMO = 200
+
+
+def pagina_de_lancamentos(competencia=None, tipo=None, categoria=None, antes=None, limite=LIMITE_PAGINA):
+    """
+    Paginação por chave (data, id): `antes` é o cursor "AAAA-MM-DD|id" do último item da página
+    anterior, e a consulta busca direto a partir dele pelo índice ix_lancamento_data_id, sem OFFSET.
+    Devolve (lançamentos, cursor da próxima página ou None). Cursor inválido gera ValueError.
+    """
+    limite = max(1, min(int(limite), LIMITE_PAGINA_MAXIMO))
+    q = Lancamento.query
+    if competencia:
+        q = q.filter(Lancamento.competencia == competencia)
+    if tipo:
+        q = q.filter(Lancamento.tipo == tipo)
+    if categoria:
+        q = q.filter(Lancamento.categoria == categoria)
+    if antes:
+        data_cursor, _, id_cursor = antes.partition("|")
+        data_cursor = datetime.strptime(data_cursor, "%Y-%m-%d").date()
+        q = q.filter(tuple_(Lancamento.data, Lancamento.id) < (data_cursor, int(id_cursor)))
+
+    # Um item a mais só para saber se existe próxima página
+    lancamentos = q.order_by(Lancamento.data.desc(), Lancamento.id.desc()).limit(limite + 1).all()
+    if len(lancamentos) <= limite:
+        return lancamentos, None
+    lancamentos = lancamentos[:limite]
+    return lancamentos, f"{lancamentos[-1].data.isoformat()}|{lancamentos[-1].id}"
+
+
+def filtros_da_listagem():
+    """Filtros da listagem vindos da query string (vazios são ignorados)."""
+    return {campo: request.args.get(campo, "").strip() or None for campo in ("competencia", "tipo", "categoria")}
+
+
+# 🔹 API: lançamentos paginados (rolagem infinita do dashboard)
+@app.route("/api/lancamentos")
+def api_lancamentos():
+    try:
+        lancamentos, proximo = pagina_de_lancamentos(
+            **filtros_da_listagem(),
+            antes=request.args.get("antes") or None,
+            limite=request.args.get("limite", LIMITE_PAGINA)
+        )
+    except ValueError:
+        return jsonify({"erro": "Cursor ou limite inválido."}), 400
+
+    return jsonify({
+        "lancamentos": [
+            {"id": l.id, "data": l.data.isoformat(), "competencia": l.competencia, "descricao": l.descricao,
+             "valor": l.valor, "tipo": l.tipo, "categoria": l.categoria}
+            for l in lancamentos
+        ],
+        "proximo": proximo
+    })
+
+
 @app.route("/")
 def index():
     try:
-        lancamentos = Lancamento.query.order_by(Lancamento.data.desc()).all()
-        categorias = Categoria.query.all()
+        filtros = filtros_da_listagem()
+        lancamentos, proximo = pagina_de_lancamentos(**filtros)
+        categorias = Categoria.query.order_by(Categoria.nome).all()
         dica = Insights().dica_aleatoria()
-        return render_template("index.html", lancamentos=lancamentos, categorias=categorias, dica=dica, now=datetime.now())
+        return render_template("index.html", lancamentos=lancamentos, proximo=proximo, filtros=filtros,
+                               categorias=categorias, dica=dica, now=datetime.now())
     except Exception as e:
         return f"<h1>Erro na rota /</h1><p>{e}</p>"
 
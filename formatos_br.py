@@ -0,0 +1,187 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Layouts de data aceitos, na ordem em que são tentados
+FORMATOS_DATA = ["%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d"]
+
+# Origem das datas seriais do Excel (número de dias)
+ORIGEM_EXCEL = pd.Timestamp("1899-12-30")
+
+_MILHAR_BR = r"^\d{1,3}(?:\.\d{3})+$"  # ex.: 1.234 ou 1.234.567 (sem vírgula decimal)
+_MILHAR_US = r"^\d{1,3}(?:,\d{3})+\.\d+$"  # ex.: 1,234.56 ou 1,234,567.8
+_COMPETENCIA = r"^\d{4}-(?:0[1-9]|1[0-2])$"  # AAAA-MM
+_COMPETENCIA_BR = r"^(0[1-9]|1[0-2])/(\d{4})$"  # MM/AAAA
+
+
+# ============================
+# 🔹 Valores monetários
+# ============================
+def converter_valores(serie):
+    """
+    Converte uma coluna de valores em float, aceitando formatos brasileiros e internacionais:
+    "1.234,56", "-1.234,56", "R$ 1.234,56", "(1.234,56)", "1.234,56-", "1234.56", "1,234.56", "123,45 D" / "123,45 C".
+    Com vírgula e ponto, o separador que vem por último é o decimal; no padrão internacional os grupos
+    de milhar precisam estar bem formados ("1,23.45" é inválido).
+    Devolve (valores, inválidos) — `inválidos` marca células preenchidas que não puderam ser lidas.
+    Células vazias viram NaN sem serem consideradas inválidas.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        valores = serie.astype(float)
+        return valores, pd.Series(False, index=serie.index)
+
+    # Colunas mistas (ex.: Excel com números e textos): números nativos não passam pelo texto
+    numericos = None
+    if pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "empty"):
+        eh_numero = serie.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool))
+        numericos = pd.to_numeric(serie.where(eh_numero), errors="coerce")
+        serie = serie.where(~eh_numero)
+
+    # Extratos repetem muito os mesmos textos: converte só os distintos e espalha o resultado
+    codigos, unicos = pd.factorize(serie)
+    texto = pd.Series(unicos, dtype="string").str.strip().str.upper()
+
+    limpo = texto.str.replace(r"R\$|\s", "", regex=True)
+    negativo = (
+        limpo.str.startswith("-") | limpo.str.endswith("-") |
+        (limpo.str.startswith("(") & limpo.str.endswith(")")) |
+        limpo.str.endswith("D")
+    ).fillna(False)
+
+    limpo = limpo.str.replace(r"[()+\-]|[DC]$", "", regex=True)
+    tem_virgula = limpo.str.contains(",", regex=False).fillna(False)
+    so_milhar = limpo.str.match(_MILHAR_BR).fillna(False)
+    internacional = (tem_virgula & (limpo.str.rfind(",") < limpo.str.rfind("."))).fillna(False)
+
+    # Vírgula depois do último ponto (ou sem ponto) → padrão brasileiro (ponto é milhar); "1.234" sem
+    # vírgula também é milhar. Vírgula antes do último ponto → internacional (vírgula é milhar)
+    brasileiro = (tem_virgula & ~internacional) | so_milhar
+    limpo = limpo.where(~brasileiro, limpo.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    limpo = limpo.where(~internacional, limpo.str.replace(",", "", regex=False).where(limpo.str.match(_MILHAR_US)))
+
+    convertidos = pd.to_numeric(limpo, errors="coerce").astype(float)
+    convertidos = convertidos.where(~negativo, -convertidos.abs()).to_numpy()
+    ilegiveis = np.isnan(convertidos) & (texto.fillna("") != "").to_numpy()
+
+    # Código -1 (célula vazia) cai na última posição: NaN e não inválido
+    valores = pd.Series(np.append(convertidos, np.nan)[codigos], index=serie.index)
+    invalidos = pd.Series(np.append(ilegiveis, False)[codigos], index=serie.index)
+    if numericos is not None:
+        valores = valores.where(numericos.isna(), numericos)
+    return valores, invalidos
+
+
+def valor_assinado(df):
+    """
+    Valor com sinal a partir das colunas do extrato (já normalizadas em minúsculas):
+    - "valor", opcionalmente com "d/c"/"natureza" indicando débito (D) ou crédito (C);
+    - ou colunas separadas "débito"/"debito" e "crédito"/"credito" (valor = crédito − débito).
+    Devolve (valores, inválidos).
+    """
+    if "valor" in df.columns:
+        valores, invalidos = converter_valores(df["valor"])
+        for coluna in ("d/c", "natureza"):
+            if coluna in df.columns:
+                debito = df[coluna].astype("string").str.strip().str.upper().str.startswith("D").fillna(False)
+                valores = valores.abs().where(~debito, -valores.abs())
+                break
+        return valores, invalidos
+
+    debito_col = next((c for c in ("débito", "debito") if c in df.columns), None)
+    credito_col = next((c for c in ("crédito", "credito") if c in df.columns), None)
+    if debito_col is None and credito_col is None:
+        return pd.Series(np.nan, index=df.index), pd.Series(True, index=df.index)
+
+    zeros = (pd.Series(np.nan, index=df.index), pd.Series(False, index=df.index))
+    debito, inv_debito = converter_valores(df[debito_col]) if debito_col else zeros
+    credito, inv_credito = converter_valores(df[credito_col]) if credito_col else zeros
+
+    valores = credito.abs().fillna(0.0) - debito.abs().fillna(0.0)
+    valores = valores.where(debito.notna() | credito.notna())
+    return valores, inv_debito | inv_credito
+
+
+# ============================
+# 🔹 Datas
+# ============================
+def converter_datas(serie):
+    """
+    Converte uma coluna de datas testando os layouts de FORMATOS_DATA, cada um aplicado de uma vez
+    só aos textos distintos ainda não reconhecidos. Aceita também datetimes nativos e datas seriais do Excel.
+    Devolve (datas datetime64, inválidas).
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        datas = serie.dt.normalize()
+        return datas, datas.isna() & serie.notna()
+
+    if pd.api.types.is_numeric_dtype(serie):
+        datas = ORIGEM_EXCEL + pd.to_timedelta(serie, unit="D", errors="coerce")
+        return datas.dt.normalize(), datas.isna() & serie.notna()
+
+    # Objetos mistos (ex.: datetime vindo do openpyxl misturado com texto)
+    if pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "empty"):
+        serie = serie.map(lambda v: v.strftime("%Y-%m-%d") if hasattr(v, "strftime") else v)
+    codigos, unicos = pd.factorize(serie)
+    texto = pd.Series(unicos, dtype="string").str.strip().str.slice(0, 10)
+    vazio = texto.isna() | (texto == "")
+
+    convertidas = pd.Series(pd.NaT, index=texto.index, dtype="datetime64[ns]")
+    for formato in FORMATOS_DATA:
+        faltando = convertidas.isna() & ~vazio
+        if not faltando.any():
+            break
+        convertidas[faltando] = pd.to_datetime(texto[faltando], format=formato, errors="coerce")
+
+    # Código -1 (célula vazia) cai na última posição: NaT e não inválida
+    ilegiveis = (convertidas.isna() & ~vazio).to_numpy()
+    datas = pd.Series(np.append(convertidas.to_numpy(), np.datetime64("NaT", "ns"))[codigos], index=serie.index)
+    return datas, pd.Series(np.append(ilegiveis, False)[codigos], index=serie.index)
+
+
+def formatar_datas(datas, formato="%Y-%m-%d"):
+    """strftime aplicado só às datas distintas (extratos repetem poucas datas em muitas linhas)."""
+    codigos, unicas = pd.factorize(datas)
+    textos = np.asarray(unicas.strftime(formato), dtype=object)
+    return pd.Series(textos[codigos] if len(codigos) else [], index=datas.index, dtype=object)
+
+
+# ============================
+# 🔹 Competências
+# ============================
+def competencia_valida(texto):
+    """Se o texto é uma competência no formato AAAA-MM (mês de 01 a 12)."""
+    return bool(re.fullmatch(_COMPETENCIA, texto or ""))
+
+
+def converter_competencias(serie):
+    """
+    Normaliza uma coluna de competências para AAAA-MM, aceitando também "MM/AAAA" e datas nativas.
+    Devolve (competências, inválidas); células vazias viram "" sem serem inválidas (quem chama usa o mês da data).
+    """
+    if pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "empty"):
+        serie = serie.map(lambda v: v.strftime("%Y-%m") if hasattr(v, "strftime") else v)
+    texto = serie.fillna("").astype(str).str.strip()
+    brasileiro = texto.str.extract(_COMPETENCIA_BR)
+    texto = texto.where(brasileiro[0].isna(), brasileiro[1] + "-" + brasileiro[0])
+    invalidas = (texto != "") & ~texto.str.fullmatch(_COMPETENCIA)
+    return texto.where(~invalidas, ""), invalidas
+
+
+# ============================
+# 🔹 Linhas rejeitadas
+# ============================
+def separar_rejeitadas(df, motivos):
+    """
+    Recebe as máscaras de erro por motivo e devolve (máscara das linhas válidas, DataFrame rejeitadas).
+    `rejeitadas` traz as colunas originais mais a coluna "motivo".
+    """
+    rejeitada = pd.Series(False, index=df.index)
+    motivo = pd.Series("", index=df.index, dtype=object)
+    for descricao, mascara in motivos.items():
+        mascara = mascara.fillna(True).astype(bool)
+        motivo = motivo.where(~(mascara & ~rejeitada), descricao)
+        rejeitada |= mascara
+
+    rejeitadas = df[rejeitada].assign(motivo=motivo[rejeitada])
+    return ~rejeitada, rejeitadas
@@ -0,0 +1,493 @@
+import csv
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, MetaData, String, Table, delete, insert, select
+
+from models import db, Lancamento, Importacao
+from classificador import classificador_atual, usar_regras
+from cache_categorias import categorias_serie, correcoes_do_usuario, usar_correcoes
+from modelo_categorias import caminho_modelo, modelo_atual, usar_modelo
+from formatos_br import (converter_competencias, converter_datas, converter_valores, formatar_datas,
+                         separar_rejeitadas, valor_assinado)
+from resumo_mensal import aplicar_deltas, deltas_de_dataframe
+
+TAMANHO_LOTE = 5000
+TAMANHO_BLOCO = 20000  # linhas lidas, classificadas e confirmadas por vez no modo em blocos
+
+# Uma gravação por vez entre os jobs em segundo plano do processo: no SQLite, a transação que lê (anti-join
+# de hashes) antes de escrever falha com "database is locked" se outro job confirmar no meio dela.
+# Leitura, conversão e classificação continuam em paralelo; só as gravações + commit são serializadas.
+trava_gravacao = threading.Lock()
+
+
+def confirmar_gravacao():
+    """Commit das mudanças de status de um job, na vez da trava de gravação."""
+    with trava_gravacao:
+        db.session.commit()
+
+COLUNAS = ["competencia", "data", "descricao", "estabelecimento", "valor", "tipo", "categoria", "forma_pagamento",
+           "hash_conteudo"]
+
+
+# ============================
+# 🔹 Normalização
+# ============================
+def normalizar_colunas(df):
+    """Padroniza os nomes das colunas (minúsculas, sem espaços nas pontas)."""
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    return df
+
+
+def _texto(df, coluna):
+    if coluna not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[coluna].fillna("").astype(str).str.strip()
+
+
+def _datas(df, coluna):
+    if coluna not in df.columns:
+        vazia = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+        return vazia, pd.Series(False, index=df.index)
+    return converter_datas(df[coluna])
+
+
+def classificar_colunas(descricoes, estabelecimentos):
+    """Categoria de cada linha via cache por estabelecimento; só os estabelecimentos novos vão ao classificador."""
+    return categorias_serie(descricoes, estabelecimentos)
+
+
+# ============================
+# 🔹 Preparação por tipo de arquivo
+# ============================
+# Cada preparador devolve (linhas prontas para gravar, linhas rejeitadas com a coluna "motivo").
+# As linhas prontas mantêm o índice do DataFrame de origem. Com classificar=False a categoria fica
+# vazia: basta para calcular os hashes (retomada de uma importação) sem passar pelo classificador.
+
+def preparar_extrato(df, classificar=True):
+    """Extrato bancário: coluna 'lançamentos' como descrição e sinal do valor definindo o tipo."""
+    normalizar_colunas(df)
+    valor, valor_invalido = valor_assinado(df)
+    datas, data_invalida = _datas(df, "data")
+
+    validas, rejeitadas = separar_rejeitadas(df, {
+        "data inválida": data_invalida,
+        "data ausente": datas.isna(),
+        "valor inválido": valor_invalido,
+        "valor ausente": valor.isna(),
+    })
+    df, valor, datas = df[validas], valor[validas], datas[validas]
+
+    descricao = _texto(df, "lançamentos")
+    estabelecimento = pd.Series("", index=df.index)
+    data = formatar_datas(datas)
+
+    linhas = pd.DataFrame({
+        "competencia": data.str[:7],
+        "data": data,
+        "descricao": descricao,
+        "estabelecimento": estabelecimento,
+        "valor": valor.abs(),
+        "tipo": valor.lt(0).map({True: "Despesa", False: "Receita"}),
+        "categoria": classificar_colunas(descricao, estabelecimento) if classificar else None,
+        "forma_pagamento": None,
+        "conta": _texto(df, "conta"),
+    }, columns=COLUNAS[:-1] + ["conta"])
+    return linhas, rejeitadas
+
+
+def preparar_planilha(df, classificar=True):
+    """Planilha Excel: colunas já nomeadas como no lançamento; competência vazia vem da data."""
+    normalizar_colunas(df)
+    if "valor" in df.columns:
+        valor, valor_invalido = converter_valores(df["valor"])
+    else:
+        valor, valor_invalido = pd.Series(np.nan, index=df.index), pd.Series(False, index=df.index)
+    datas, data_invalida = _datas(df, "data")
+    if "competencia" in df.columns:
+        competencia, competencia_invalida = converter_competencias(df["competencia"])
+    else:
+        competencia, competencia_invalida = pd.Series("", index=df.index), pd.Series(False, index=df.index)
+
+    validas, rejeitadas = separar_rejeitadas(df, {
+        "data inválida": data_invalida,
+        "data ausente": datas.isna(),
+        "competência inválida": competencia_invalida,
+        "valor inválido": valor_invalido,
+        "valor ausente": valor.isna(),
+    })
+    df, valor, datas, competencia = df[validas], valor[validas], datas[validas], competencia[validas]
+
+    descricao = _texto(df, "descricao")
+    estabelecimento = _texto(df, "estabelecimento")
+    data = formatar_datas(datas)
+
+    linhas = pd.DataFrame({
+        "competencia": competencia.where(competencia != "", data.str[:7]),
+        "data": data,
+        "descricao": descricao,
+        "estabelecimento": estabelecimento,
+        "valor": valor,
+        "tipo": _texto(df, "tipo"),
+        "categoria": classificar_colunas(descricao, estabelecimento) if classificar else None,
+        "forma_pagamento": None,
+        "conta": _texto(df, "conta"),
+    }, columns=COLUNAS[:-1] + ["conta"])
+    return linhas, rejeitadas
+
+
+# ============================
+# 🔹 Deduplicação por hash de conteúdo
+# ============================
+def calcular_hashes(linhas, ocorrencias=None):
+    """
+    Hash sha256 de (data, tipo, valor, descrição normalizada, conta de origem, ocorrência).
+    A ocorrência numera linhas idênticas dentro do arquivo, para que compras repetidas no
+    mesmo dia não sejam tratadas como duplicatas; `ocorrencias` carrega essa contagem entre blocos,
+    indexada por um digest blake2b de 16 bytes da linha (e não pelo texto dela), para que a memória
+    da importação em blocos não cresça com o tamanho das descrições.
+    """
+    descricoes = [" ".join(d.lower().split()) for d in linhas["descricao"].tolist()]
+    chaves = [
+        "|".join(partes) for partes in zip(
+            linhas["data"].tolist(),
+            linhas["tipo"].tolist(),
+            [f"{v:.2f}" for v in linhas["valor"].tolist()],
+            descricoes,
+            [c.lower() for c in linhas["conta"].tolist()]
+        )
+    ]
+
+    codigos, unicas = pd.factorize(pd.Series(chaves, dtype=object))
+    ordem = pd.Series(codigos).groupby(codigos).cumcount().to_numpy()
+    if ocorrencias is not None:
+        digests = [hashlib.blake2b(c.encode("utf-8"), digest_size=16).digest() for c in unicas]
+        anteriores = np.array([ocorrencias.get(d, 0) for d in digests], dtype=np.int64)
+        ordem = ordem + anteriores[codigos]
+        for digest, quantidade in zip(digests, np.bincount(codigos, minlength=len(unicas)).tolist()):
+            ocorrencias[digest] = ocorrencias.get(digest, 0) + quantidade
+
+    return [hashlib.sha256(f"{c}|{o}".encode("utf-8")).hexdigest() for c, o in zip(chaves, ordem.tolist())]
+
+
+# Tabela temporária (por conexão) com os hashes do lote, para o anti-join no banco
+HASHES_LOTE = Table(
+    "hashes_lote_importacao", MetaData(),
+    Column("hash", String(64), nullable=False),
+    prefixes=["TEMPORARY"]
+)
+
+
+def hashes_existentes(conn, hashes):
+    """Quais dos hashes já estão gravados: carga em tabela temporária + um único JOIN no índice único."""
+    HASHES_LOTE.create(conn, checkfirst=True)
+    conn.execute(delete(HASHES_LOTE))
+    executemany_insert(conn, HASHES_LOTE, {"hash": hashes}, TAMANHO_LOTE)
+
+    coluna = Lancamento.__table__.c.hash_conteudo
+    consulta = select(HASHES_LOTE.c.hash).join(Lancamento.__table__, coluna == HASHES_LOTE.c.hash)
+    return set(conn.execute(consulta).scalars())
+
+
+def remover_duplicadas(linhas, conn, ocorrencias=None):
+    """
+    Anti-join em lote contra os hashes existentes. Devolve (linhas novas, quantidade ignorada).
+    Usa a coluna hash_conteudo quando já calculada; hashes repetidos dentro do próprio lote
+    (o mesmo arquivo enviado duas vezes num lote) ficam só na primeira ocorrência.
+    """
+    if "hash_conteudo" not in linhas.columns:
+        linhas = linhas.assign(hash_conteudo=calcular_hashes(linhas, ocorrencias))
+    existentes = hashes_existentes(conn, linhas["hash_conteudo"].tolist())
+    novas = linhas[~linhas["hash_conteudo"].isin(existentes) & ~linhas["hash_conteudo"].duplicated()]
+    return novas, len(linhas) - len(novas)
+
+
+# ============================
+# 🔹 Gravação em lote
+# ============================
+def executemany_insert(conn, tabela, valores, tamanho_lote):
+    """
+    INSERT compilado uma vez pelo dialeto e enviado ao driver com executemany, em lotes.
+    Evita o processamento de parâmetros linha a linha do SQLAlchemy, que domina o custo em lotes grandes.
+    `valores` mapeia coluna → lista de valores. Devolve a quantidade de linhas gravadas.
+    """
+    compilado = insert(tabela).compile(dialect=conn.dialect, column_keys=list(valores))
+    if conn.dialect.positional:
+        parametros = list(zip(*[valores[nome] for nome in compilado.positiontup]))
+    else:
+        nomes = list(valores)
+        parametros = [dict(zip(nomes, linha)) for linha in zip(*valores.values())]
+
+    for inicio in range(0, len(parametros), tamanho_lote):
+        conn.exec_driver_sql(str(compilado), parametros[inicio:inicio + tamanho_lote])
+    return len(parametros)
+
+
+def gravar_linhas(linhas, conn, tamanho_lote=TAMANHO_LOTE):
+    """INSERT em lote de linhas já deduplicadas + atualização do resumo mensal na mesma transação."""
+    if linhas.empty:
+        return 0
+
+    # "data" segue como texto AAAA-MM-DD: é o formato em que a coluna Date é gravada no SQLite
+    valores = {c: linhas[c].astype(object).where(linhas[c].notna(), None).tolist() for c in COLUNAS}
+    registros = executemany_insert(conn, Lancamento.__table__, valores, tamanho_lote)
+
+    aplicar_deltas(conn, deltas_de_dataframe(linhas))
+    return registros
+
+
+def inserir_em_lote(linhas, tamanho_lote=TAMANHO_LOTE, conn=None, ocorrencias=None):
+    """
+    Descarta as linhas já importadas, insere o restante em lotes (executemany no driver) e
+    atualiza o resumo mensal na mesma transação. Não faz commit: quem chama decide quando confirmar.
+    Devolve (linhas inseridas, linhas duplicadas ignoradas).
+    """
+    if linhas.empty:
+        return 0, 0
+
+    conn = conn or db.session.connection()
+    linhas, duplicadas = remover_duplicadas(linhas, conn, ocorrencias)
+    return gravar_linhas(linhas, conn, tamanho_lote), duplicadas
+
+
+def importar_dataframe(df, preparar, tamanho_lote=TAMANHO_LOTE):
+    """
+    Prepara, grava e confirma um DataFrame inteiro.
+    Devolve (linhas inseridas, linhas por segundo, DataFrame das linhas rejeitadas).
+    """
+    inicio = time.perf_counter()
+    try:
+        linhas, rejeitadas = preparar(df)
+        with trava_gravacao:
+            inseridas, _ = inserir_em_lote(linhas, tamanho_lote)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    duracao = time.perf_counter() - inicio
+    return inseridas, (inseridas / duracao if duracao > 0 else float(inseridas)), rejeitadas
+
+
+# ============================
+# 🔹 Importação em blocos (memória limitada e retomável)
+# ============================
+def assinatura_arquivo(arquivo, bloco=1024 * 1024):
+    """sha256 do conteúdo lido em pedaços de 1 MB; volta o arquivo para o início."""
+    sha = hashlib.sha256()
+    arquivo.seek(0)
+    for pedaco in iter(lambda: arquivo.read(bloco), b""):
+        sha.update(pedaco)
+    arquivo.seek(0)
+    return sha.hexdigest()
+
+
+def detectar_separador(arquivo):
+    """
+    Separador do CSV ("," ";" tab ou "|") farejado no cabeçalho pelo csv.Sniffer, como o sep=None do
+    pandas usado no cadastro de compras em lote; "," se não der para decidir. Volta o arquivo ao início.
+    """
+    arquivo.seek(0)
+    cabecalho = arquivo.readline()
+    arquivo.seek(0)
+    if isinstance(cabecalho, bytes):
+        cabecalho = cabecalho.decode("utf-8", errors="ignore")
+    try:
+        return csv.Sniffer().sniff(cabecalho, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def ler_csv_em_blocos(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera DataFrames de até `tamanho_bloco` linhas com todas as células como texto: quem converte é o
+    formatos_br (o pandas leria "1.500" como 1,5 e poderia inferir tipos diferentes em cada bloco).
+    """
+    yield from pd.read_csv(arquivo, sep=detectar_separador(arquivo), dtype=str, keep_default_na=False,
+                           chunksize=tamanho_bloco)
+
+
+def ler_xlsx_em_blocos(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """Mesmo contrato de `ler_csv_em_blocos`, usando o iterador somente leitura do openpyxl."""
+    from openpyxl import load_workbook
+
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = livro.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+
+        bloco = []
+        for linha in linhas:
+            bloco.append(linha)
+            if len(bloco) == tamanho_bloco:
+                yield pd.DataFrame(bloco, columns=cabecalho)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        livro.close()
+
+
+LEITORES = {"csv": ler_csv_em_blocos, "xlsx": ler_xlsx_em_blocos}
+PREPARADORES = {"extrato": preparar_extrato, "planilha": preparar_planilha}
+
+
+def iniciar_importacao(arquivo, nome_arquivo, formato, tipo):
+    """Reaproveita a importação inacabada do mesmo conteúdo ou registra uma nova na fila."""
+    assinatura = assinatura_arquivo(arquivo)
+    importacao = Importacao.query.filter(
+        Importacao.assinatura == assinatura,
+        Importacao.tipo == tipo,
+        Importacao.status != "concluida"
+    ).order_by(Importacao.id.desc()).first()
+
+    if importacao is None:
+        importacao = Importacao(nome_arquivo=nome_arquivo, assinatura=assinatura, formato=formato, tipo=tipo)
+        db.session.add(importacao)
+    importacao.status = "na_fila"
+    importacao.mensagem = None
+    confirmar_gravacao()
+    return importacao
+
+
+def processar_importacao(importacao, arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê, classifica e grava o arquivo bloco a bloco, com um commit por bloco.
+    O progresso (e o ponto de retomada `linhas_processadas`) é gravado na mesma transação
+    de cada bloco, então uma nova execução só grava o que vem depois do último bloco confirmado.
+    As linhas já confirmadas ainda são lidas e convertidas, sem classificar, apenas para manter a
+    numeração de ocorrências do hash.
+    Devolve (linhas inseridas nesta execução, linhas por segundo, linhas já importadas antes).
+    """
+    preparar = PREPARADORES[importacao.tipo]
+    retomadas = importacao.linhas_processadas
+    inseridas = 0
+    posicao = 0
+    ocorrencias = {}
+    inicio = time.perf_counter()
+
+    importacao.status = "em_andamento"
+    confirmar_gravacao()
+
+    try:
+        for bloco in LEITORES[importacao.formato](arquivo, tamanho_bloco):
+            ja_gravadas = min(len(bloco), max(0, retomadas - posicao))
+            posicao += len(bloco)
+            if ja_gravadas:
+                anteriores, _ = preparar(bloco.iloc[:ja_gravadas].copy(), classificar=False)
+                calcular_hashes(anteriores, ocorrencias)
+                if ja_gravadas == len(bloco):
+                    continue
+                bloco = bloco.iloc[ja_gravadas:].copy()
+            linhas, rejeitadas = preparar(bloco)
+
+            with trava_gravacao:
+                gravadas, duplicadas = inserir_em_lote(linhas, ocorrencias=ocorrencias)
+                inseridas += gravadas
+                importacao.linhas_processadas += len(bloco)
+                importacao.linhas_inseridas += gravadas
+                importacao.linhas_duplicadas += duplicadas
+                importacao.linhas_rejeitadas += len(rejeitadas)
+                duracao = time.perf_counter() - inicio
+                importacao.linhas_por_segundo = (
+                    (importacao.linhas_processadas - retomadas) / duracao if duracao > 0 else None
+                )
+                db.session.commit()
+
+        importacao.status = "concluida"
+        confirmar_gravacao()
+    except Exception as e:
+        db.session.rollback()
+        importacao.status = "erro"
+        importacao.mensagem = str(e)[:500]
+        confirmar_gravacao()
+        raise
+
+    duracao = time.perf_counter() - inicio
+    return inseridas, (inseridas / duracao if duracao > 0 else float(inseridas)), retomadas
+
+
+def importar_em_blocos(arquivo, nome_arquivo, formato, tipo, tamanho_bloco=TAMANHO_BLOCO):
+    """Importação em blocos síncrona (sem fila): registra ou retoma e processa na hora."""
+    importacao = iniciar_importacao(arquivo, nome_arquivo, formato, tipo)
+    return processar_importacao(importacao, arquivo, tamanho_bloco)
+
+
+# ============================
+# 🔹 Vários arquivos em paralelo
+# ============================
+def preparar_arquivo(caminho, tipo, formato, regras=None, correcoes=None, modelo=None):
+    """
+    Lê o arquivo inteiro, prepara as linhas e calcula os hashes. Roda nos processos do pool de
+    importação: não acessa o banco e só recebe/devolve dados serializáveis — por isso as regras
+    de classificação, as correções do usuário por estabelecimento e o arquivo do modelo de
+    categorias vêm do processo principal.
+    Devolve (linhas prontas com hash_conteudo, linhas lidas, linhas rejeitadas).
+    """
+    if regras is not None:
+        usar_regras(regras)
+    if correcoes is not None:
+        usar_correcoes(correcoes)
+    usar_modelo(modelo)
+    with open(caminho, "rb") as arquivo:
+        blocos = list(LEITORES[formato](arquivo))
+    df = pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame()
+    linhas, rejeitadas = PREPARADORES[tipo](df)
+    return linhas.assign(hash_conteudo=calcular_hashes(linhas)), len(df), len(rejeitadas)
+
+
+def processar_lote(importacoes, executor):
+    """
+    Prepara os arquivos das importações em paralelo no `executor` (um ProcessPoolExecutor) e grava
+    tudo numa única transação: um anti-join de hashes, um INSERT em lote e um ajuste do resumo mensal.
+    Cada arquivo é lido por inteiro, então os contadores de cada importação recomeçam do zero.
+    Devolve (linhas inseridas, linhas por segundo).
+    """
+    inicio = time.perf_counter()
+    for importacao in importacoes:
+        importacao.status = "em_andamento"
+    confirmar_gravacao()
+
+    try:
+        regras, correcoes = classificador_atual().regras, correcoes_do_usuario()
+        modelo = caminho_modelo() if modelo_atual() is not None else None
+        futuros = [
+            executor.submit(preparar_arquivo, i.caminho_arquivo, i.tipo, i.formato, regras, correcoes, modelo)
+            for i in importacoes
+        ]
+        preparados = [futuro.result() for futuro in futuros]
+
+        linhas = pd.concat(
+            [prontas.assign(importacao_id=i.id) for i, (prontas, _, _) in zip(importacoes, preparados)],
+            ignore_index=True
+        )
+        with trava_gravacao:
+            conn = db.session.connection()
+            novas, _ = remover_duplicadas(linhas, conn)
+            inseridas = gravar_linhas(novas, conn)
+
+            por_importacao = novas["importacao_id"].value_counts()
+            duracao = time.perf_counter() - inicio
+            for importacao, (prontas, lidas, rejeitadas) in zip(importacoes, preparados):
+                gravadas = int(por_importacao.get(importacao.id, 0))
+                importacao.linhas_processadas = lidas
+                importacao.linhas_inseridas = gravadas
+                importacao.linhas_duplicadas = len(prontas) - gravadas
+                importacao.linhas_rejeitadas = rejeitadas
+                importacao.linhas_por_segundo = lidas / duracao if duracao > 0 else None
+                importacao.status = "concluida"
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for importacao in importacoes:
+            importacao.status = "erro"
+            importacao.mensagem = str(e)[:500]
+        confirmar_gravacao()
+        raise
+
+    duracao = time.perf_counter() - inicio
+    return inseridas, (inseridas / duracao if duracao > 0 else float(inseridas))
@@ -0,0 +1,37 @@
+"""tabela meta_forma_pagamento (limite mensal por forma de pagamento)
+
+Revision ID: 0c1786e58a89
+Revises: 1defe7149ee7
+Create Date: 2026-10-17 21:00:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam com ela. Se estiver vazia, a
+tabela recebe a meta do cartão de R$ 1.500,00 (o valor que era fixo em analisador_financeiro),
+para os alertas continuarem iguais após a atualização.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c1786e58a89'
+down_revision = '1defe7149ee7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    if 'meta_forma_pagamento' not in sa.inspect(conn).get_table_names():
+        op.create_table(
+            'meta_forma_pagamento',
+            sa.Column('forma_pagamento', sa.String(length=50), nullable=False),
+            sa.Column('meta_mensal', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('forma_pagamento')
+        )
+    tabela = sa.table('meta_forma_pagamento', sa.column('forma_pagamento', sa.String), sa.column('meta_mensal', sa.Float))
+    if conn.execute(sa.select(sa.func.count()).select_from(tabela)).scalar() == 0:
+        op.bulk_insert(tabela, [{'forma_pagamento': 'Cartão', 'meta_mensal': 1500.0}])
+
+
+def downgrade():
+    op.drop_table('meta_forma_pagamento')
@@ -0,0 +1,36 @@
+"""tabela regras_categoria (palavras-chave editáveis do classificador)
+
+Revision ID: 1107e0b4ea8e
+Revises: 671ebdcf381c
+Create Date: 2026-10-17 19:20:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam como estão.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1107e0b4ea8e'
+down_revision = '671ebdcf381c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'regras_categoria' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'regras_categoria',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('palavra', sa.String(length=100), nullable=False),
+        sa.Column('categoria', sa.String(length=50), nullable=False),
+        sa.Column('campo', sa.String(length=20), nullable=False),
+        sa.Column('prioridade', sa.Integer(), nullable=False),
+        sa.Column('ativa', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('regras_categoria')
@@ -0,0 +1,38 @@
+"""tabela previsao_mensal (previsão sazonal por categoria)
+
+Revision ID: 1defe7149ee7
+Revises: c90231cef6e1
+Create Date: 2026-10-17 20:00:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam como estão. O conteúdo é
+preenchido na inicialização (garantir_previsoes).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1defe7149ee7'
+down_revision = 'c90231cef6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'previsao_mensal' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'previsao_mensal',
+        sa.Column('mes', sa.String(length=7), nullable=False),
+        sa.Column('tipo', sa.String(length=10), nullable=False),
+        sa.Column('categoria', sa.String(length=50), nullable=False),
+        sa.Column('valor', sa.Float(), nullable=False),
+        sa.Column('base', sa.String(length=7), nullable=False),
+        sa.Column('assinatura', sa.String(length=40), nullable=False),
+        sa.Column('calculado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('mes', 'tipo', 'categoria')
+    )
+
+
+def downgrade():
+    op.drop_table('previsao_mensal')
@@ -0,0 +1,53 @@
+"""hash de conteúdo dos lançamentos importados (deduplicação)
+
+Revision ID: 3f2a9c1d7e40
+Revises: b6ed716a16e6
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e40'
+down_revision = 'b6ed716a16e6'
+branch_labels = None
+depends_on = None
+
+
+def _colunas(tabela):
+    inspetor = sa.inspect(op.get_bind())
+    if tabela not in inspetor.get_table_names():
+        return None
+    return {c['name'] for c in inspetor.get_columns(tabela)}
+
+
+def _indices(tabela):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def upgrade():
+    colunas = _colunas('lancamento')
+    if 'hash_conteudo' not in colunas:
+        with op.batch_alter_table('lancamento') as batch_op:
+            batch_op.add_column(sa.Column('hash_conteudo', sa.String(length=64), nullable=True))
+    if 'ix_lancamento_hash_conteudo' not in _indices('lancamento'):
+        op.create_index('ix_lancamento_hash_conteudo', 'lancamento', ['hash_conteudo'], unique=True)
+
+    # importacoes é criada por db.create_all(); se já existir, ganha a contagem de duplicadas
+    colunas = _colunas('importacoes')
+    if colunas is not None and 'linhas_duplicadas' not in colunas:
+        with op.batch_alter_table('importacoes') as batch_op:
+            batch_op.add_column(sa.Column('linhas_duplicadas', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    colunas = _colunas('importacoes')
+    if colunas is not None and 'linhas_duplicadas' in colunas:
+        with op.batch_alter_table('importacoes') as batch_op:
+            batch_op.drop_column('linhas_duplicadas')
+
+    op.drop_index('ix_lancamento_hash_conteudo', table_name='lancamento')
+    with op.batch_alter_table('lancamento') as batch_op:
+        batch_op.drop_column('hash_conteudo')
@@ -0,0 +1,48 @@
+"""tabela importacoes (andamento das importações em blocos)
+
+Revision ID: 671ebdcf381c
+Revises: a38243e75319
+Create Date: 2026-10-17 19:10:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam como estão (a coluna
+linhas_duplicadas já foi acrescentada pela revisão 3f2a9c1d7e40).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '671ebdcf381c'
+down_revision = 'a38243e75319'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'importacoes' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'importacoes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nome_arquivo', sa.String(length=200), nullable=False),
+        sa.Column('caminho_arquivo', sa.String(length=300), nullable=True),
+        sa.Column('assinatura', sa.String(length=64), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('formato', sa.String(length=10), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('linhas_processadas', sa.Integer(), nullable=False),
+        sa.Column('linhas_inseridas', sa.Integer(), nullable=False),
+        sa.Column('linhas_rejeitadas', sa.Integer(), nullable=False),
+        sa.Column('linhas_duplicadas', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('linhas_por_segundo', sa.Float(), nullable=True),
+        sa.Column('mensagem', sa.String(length=500), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=False),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_importacoes_assinatura', 'importacoes', ['assinatura'])
+
+
+def downgrade():
+    op.drop_index('ix_importacoes_assinatura', table_name='importacoes')
+    op.drop_table('importacoes')
@@ -0,0 +1,30 @@
+"""índice (data, id) dos lançamentos para a listagem paginada
+
+Revision ID: 8c41e2b7d9a5
+Revises: 3f2a9c1d7e40
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e2b7d9a5'
+down_revision = '3f2a9c1d7e40'
+branch_labels = None
+depends_on = None
+
+
+def _indices(tabela):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def upgrade():
+    if 'ix_lancamento_data_id' not in _indices('lancamento'):
+        op.create_index('ix_lancamento_data_id', 'lancamento', ['data', 'id'])
+
+
+def downgrade():
+    if 'ix_lancamento_data_id' in _indices('lancamento'):
+        op.drop_index('ix_lancamento_data_id', table_name='lancamento')
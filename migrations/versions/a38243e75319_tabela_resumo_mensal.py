@@ -0,0 +1,37 @@
+"""tabela resumo_mensal (agregado de lançamentos por competência, tipo, categoria e forma de pagamento)
+
+Revision ID: a38243e75319
+Revises: a7e3c5f81b64
+Create Date: 2026-10-17 19:00:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam como estão. O conteúdo é
+preenchido na inicialização (garantir_resumo) quando a tabela está vazia e há lançamentos.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a38243e75319'
+down_revision = 'a7e3c5f81b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'resumo_mensal' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'resumo_mensal',
+        sa.Column('competencia', sa.String(length=7), nullable=False),
+        sa.Column('tipo', sa.String(length=10), nullable=False),
+        sa.Column('categoria', sa.String(length=50), nullable=False),
+        sa.Column('forma_pagamento', sa.String(length=50), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('competencia', 'tipo', 'categoria', 'forma_pagamento')
+    )
+
+
+def downgrade():
+    op.drop_table('resumo_mensal')
@@ -0,0 +1,40 @@
+"""índices (vencimento, paga) e (compra_id, vencimento) das parcelas de cartão
+
+Revision ID: a7e3c5f81b64
+Revises: d5b9f03a6c12
+Create Date: 2026-10-17 18:00:00.000000
+
+O índice simples em compra_id é substituído pelo composto, que começa pela mesma coluna.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7e3c5f81b64'
+down_revision = 'd5b9f03a6c12'
+branch_labels = None
+depends_on = None
+
+
+def _indices(tabela):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def upgrade():
+    indices = _indices('parcelas_cartao')
+    if 'ix_parcelas_cartao_vencimento_paga' not in indices:
+        op.create_index('ix_parcelas_cartao_vencimento_paga', 'parcelas_cartao', ['vencimento', 'paga'])
+    if 'ix_parcelas_cartao_compra_id_vencimento' not in indices:
+        op.create_index('ix_parcelas_cartao_compra_id_vencimento', 'parcelas_cartao', ['compra_id', 'vencimento'])
+    if 'ix_parcelas_cartao_compra_id' in indices:
+        op.drop_index('ix_parcelas_cartao_compra_id', table_name='parcelas_cartao')
+
+
+def downgrade():
+    indices = _indices('parcelas_cartao')
+    if 'ix_parcelas_cartao_compra_id' not in indices:
+        op.create_index('ix_parcelas_cartao_compra_id', 'parcelas_cartao', ['compra_id'])
+    for nome in ('ix_parcelas_cartao_compra_id_vencimento', 'ix_parcelas_cartao_vencimento_paga'):
+        if nome in indices:
+            op.drop_index(nome, table_name='parcelas_cartao')
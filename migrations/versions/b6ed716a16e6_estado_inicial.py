@@ -0,0 +1,86 @@
+"""estado inicial do banco (lancamento, categoria, compras e parcelas de cartão)
+
+Revision ID: b6ed716a16e6
+Revises: 
+Create Date: 2025-09-20 10:00:00.000000
+
+Bancos já existentes estão marcados com esta revisão; ela só cria o que faltar,
+então também pode ser aplicada sobre um banco gerado por db.create_all().
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6ed716a16e6'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _tabelas():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    existentes = _tabelas()
+
+    if 'categoria' not in existentes:
+        op.create_table(
+            'categoria',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('nome', sa.String(length=50), nullable=False),
+            sa.Column('tipo', sa.String(length=10), nullable=False),
+            sa.Column('meta_mensal', sa.Float(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'lancamento' not in existentes:
+        op.create_table(
+            'lancamento',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('competencia', sa.String(length=7), nullable=False),
+            sa.Column('data', sa.String(length=10), nullable=False),
+            sa.Column('descricao', sa.String(length=100), nullable=False),
+            sa.Column('estabelecimento', sa.String(length=100), nullable=True),
+            sa.Column('valor', sa.Float(), nullable=False),
+            sa.Column('tipo', sa.String(length=10), nullable=False),
+            sa.Column('categoria', sa.String(length=50), nullable=False),
+            sa.Column('forma_pagamento', sa.String(length=50), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'compras_cartao' not in existentes:
+        op.create_table(
+            'compras_cartao',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('descricao', sa.String(length=200), nullable=False),
+            sa.Column('cartao', sa.String(length=100), nullable=True),
+            sa.Column('valor_total', sa.Numeric(precision=12, scale=2), nullable=False),
+            sa.Column('total_parcelas', sa.Integer(), nullable=False),
+            sa.Column('data_primeira_fatura', sa.Date(), nullable=False),
+            sa.Column('criado_em', sa.Date(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'parcelas_cartao' not in existentes:
+        op.create_table(
+            'parcelas_cartao',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('compra_id', sa.Integer(), nullable=False),
+            sa.Column('numero', sa.Integer(), nullable=False),
+            sa.Column('valor', sa.Numeric(precision=12, scale=2), nullable=False),
+            sa.Column('vencimento', sa.Date(), nullable=False),
+            sa.Column('paga', sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(['compra_id'], ['compras_cartao.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_parcelas_cartao_compra_id', 'parcelas_cartao', ['compra_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_parcelas_cartao_compra_id', table_name='parcelas_cartao')
+    op.drop_table('parcelas_cartao')
+    op.drop_table('compras_cartao')
+    op.drop_table('lancamento')
+    op.drop_table('categoria')
@@ -0,0 +1,37 @@
+"""tabela fatura (agregado de parcelas por cartão e mês de vencimento)
+
+Revision ID: c90231cef6e1
+Revises: cc5d69d2bbcb
+Create Date: 2026-10-17 19:50:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam como estão. O conteúdo é
+preenchido na inicialização (garantir_faturas) quando a tabela está vazia e há parcelas.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c90231cef6e1'
+down_revision = 'cc5d69d2bbcb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'fatura' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'fatura',
+        sa.Column('mes', sa.String(length=7), nullable=False),
+        sa.Column('cartao', sa.String(length=100), nullable=False),
+        sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('total_pago', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('parcelas', sa.Integer(), nullable=False),
+        sa.Column('abertas', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('mes', 'cartao')
+    )
+
+
+def downgrade():
+    op.drop_table('fatura')
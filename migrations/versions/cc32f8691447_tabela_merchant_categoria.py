@@ -0,0 +1,34 @@
+"""tabela merchant_categoria (cache persistente estabelecimento → categoria)
+
+Revision ID: cc32f8691447
+Revises: 1107e0b4ea8e
+Create Date: 2026-10-17 19:30:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam como estão.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cc32f8691447'
+down_revision = '1107e0b4ea8e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'merchant_categoria' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'merchant_categoria',
+        sa.Column('chave', sa.String(length=100), nullable=False),
+        sa.Column('categoria', sa.String(length=50), nullable=False),
+        sa.Column('origem', sa.String(length=20), nullable=False),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('chave')
+    )
+
+
+def downgrade():
+    op.drop_table('merchant_categoria')
@@ -0,0 +1,40 @@
+"""tabela reclassificacoes (jobs de reclassificação em lote)
+
+Revision ID: cc5d69d2bbcb
+Revises: cc32f8691447
+Create Date: 2026-10-17 19:40:00.000000
+
+Bancos em que a tabela já foi criada por db.create_all() ficam como estão.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cc5d69d2bbcb'
+down_revision = 'cc32f8691447'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'reclassificacoes' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'reclassificacoes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('simulacao', sa.Boolean(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('linhas_analisadas', sa.Integer(), nullable=False),
+        sa.Column('linhas_a_alterar', sa.Integer(), nullable=False),
+        sa.Column('linhas_alteradas', sa.Integer(), nullable=False),
+        sa.Column('resumo', sa.Text(), nullable=True),
+        sa.Column('mensagem', sa.String(length=500), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=False),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('reclassificacoes')
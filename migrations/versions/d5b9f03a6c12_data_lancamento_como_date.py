@@ -0,0 +1,84 @@
+"""data dos lançamentos como Date, competência validada e índice (competencia, tipo)
+
+Revision ID: d5b9f03a6c12
+Revises: 8c41e2b7d9a5
+Create Date: 2026-10-17 16:00:00.000000
+
+Datas gravadas fora do padrão AAAA-MM-DD (ex.: "05/09/2025" ou com hora) são convertidas;
+competências vazias ou malformadas passam a ser o mês da data. Se alguma competência mudar,
+o resumo mensal é esvaziado para ser reconstruído na inicialização (garantir_resumo).
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b9f03a6c12'
+down_revision = '8c41e2b7d9a5'
+branch_labels = None
+depends_on = None
+
+FORMATOS_DATA = ["%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d"]
+DATA_ISO = "[0-9][0-9][0-9][0-9]-[0-1][0-9]-[0-3][0-9]"
+COMPETENCIA_VALIDA = ("(competencia GLOB '[0-9][0-9][0-9][0-9]-0[1-9]' "
+                      "OR competencia GLOB '[0-9][0-9][0-9][0-9]-1[0-2]')")
+
+
+def _indices(tabela):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def _converter(texto):
+    texto = (texto or "").strip()[:10]  # descarta a hora, se houver
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _normalizar_datas(conn):
+    linhas = conn.execute(sa.text(
+        f"SELECT id, data FROM lancamento WHERE data IS NULL OR length(data) != 10 OR data NOT GLOB '{DATA_ISO}'"
+    )).all()
+    ilegiveis = []
+    for id_, texto in linhas:
+        convertida = _converter(texto)
+        if convertida is None:
+            ilegiveis.append(id_)
+        else:
+            conn.execute(sa.text("UPDATE lancamento SET data = :data WHERE id = :id"), {"data": convertida, "id": id_})
+    if ilegiveis:
+        raise RuntimeError(f"Lançamentos com data ilegível (corrija antes de migrar): ids {ilegiveis[:20]}")
+
+
+def upgrade():
+    conn = op.get_bind()
+    _normalizar_datas(conn)
+
+    competencias = conn.execute(sa.text(
+        f"UPDATE lancamento SET competencia = substr(data, 1, 7) WHERE competencia IS NULL OR NOT {COMPETENCIA_VALIDA}"
+    )).rowcount
+    if competencias and 'resumo_mensal' in sa.inspect(conn).get_table_names():
+        conn.execute(sa.text("DELETE FROM resumo_mensal"))
+
+    # A coluna é refletida já como Date para a cópia da tabela não usar CAST(data AS DATE):
+    # no SQLite esse CAST é numérico e transformaria "2025-09-05" em 2025. O texto é mantido como está.
+    with op.batch_alter_table('lancamento', reflect_args=[sa.Column('data', sa.Date(), nullable=False)]) as batch_op:
+        batch_op.alter_column('data', existing_type=sa.String(length=10), type_=sa.Date(), existing_nullable=False)
+
+    indices = _indices('lancamento')
+    if 'ix_lancamento_data_id' not in indices:
+        op.create_index('ix_lancamento_data_id', 'lancamento', ['data', 'id'])
+    if 'ix_lancamento_competencia_tipo' not in indices:
+        op.create_index('ix_lancamento_competencia_tipo', 'lancamento', ['competencia', 'tipo'])
+
+
+def downgrade():
+    if 'ix_lancamento_competencia_tipo' in _indices('lancamento'):
+        op.drop_index('ix_lancamento_competencia_tipo', table_name='lancamento')
+    with op.batch_alter_table('lancamento') as batch_op:
+        batch_op.alter_column('data', existing_type=sa.Date(), type_=sa.String(length=10), existing_nullable=False)
@@ -0,0 +1,334 @@
+import atexit
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, Lancamento
+from classificador import CATEGORIA_PADRAO, classificador_atual, limpar, normalizar_juntos
+
+DIMENSAO = 2 ** 18  # buckets do hashing de n-gramas
+NGRAMAS = (2, 3, 4)  # tamanhos dos n-gramas de caracteres
+ALFA = 0.1  # suavização de Laplace
+CONFIANCA_MINIMA = 0.8  # abaixo disso, valem as regras de palavras-chave
+NITIDEZ = 3.0  # escala da log-verossimilhança média por n-grama usada na confiança
+MINIMO_EXEMPLOS = 30  # lançamentos categorizados necessários para treinar
+MINIMO_CATEGORIAS = 2
+TAMANHO_BLOCO = 20_000  # textos distintos por rodada de previsão (limita a memória)
+ARQUIVO = "modelo_categorias.npz"
+ATRASO_GRAVACAO = 5.0  # segundos entre a primeira correção e a regravação do arquivo (junta as seguintes)
+
+_PRIMO = np.uint64(1_099_511_628_211)
+_MISTURA = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ============================
+# 🔹 Texto → n-gramas com hashing
+# ============================
+def _textos(descricoes, estabelecimentos=None):
+    """Descrição + estabelecimento de cada linha, como Series de texto alinhada com `descricoes`."""
+    descricoes = pd.Series(descricoes).fillna("").astype(str)
+    if estabelecimentos is None:
+        return descricoes
+    estabelecimentos = pd.Series(estabelecimentos, index=descricoes.index).fillna("").astype(str)
+    return descricoes + " " + estabelecimentos
+
+
+def _ngramas(textos):
+    """
+    Extrai os n-gramas de caracteres de vários textos de uma vez: os textos (normalizados, sem códigos)
+    viram um único buffer de bytes e cada tamanho de n-grama é um hash rolante vetorizado sobre ele.
+    Devolve (índice do texto, bucket) de cada n-grama.
+    """
+    if not len(textos):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    textos = [t.replace("\n", " ").replace("\r", " ") for t in textos]
+    junto, _ = normalizar_juntos(textos)
+    junto = "\n".join(" " + " ".join(t.split()) + " " for t in limpar(junto).split("\n"))
+
+    buffer = np.frombuffer(junto.encode("ascii"), dtype=np.uint8)
+    quebras = np.flatnonzero(buffer == ord("\n"))
+    inicios = np.concatenate(([0], quebras + 1))
+    bytes_ = buffer.astype(np.uint64)
+    acumulado = np.concatenate(([0], np.cumsum(buffer == ord("\n"))))
+
+    documentos, buckets = [], []
+    for n in NGRAMAS:
+        posicoes = len(bytes_) - n + 1
+        if posicoes <= 0:
+            continue
+        h = np.full(posicoes, n, dtype=np.uint64)
+        for k in range(n):
+            h = h * _PRIMO + bytes_[k:k + posicoes]
+        validos = acumulado[n:n + posicoes] == acumulado[:posicoes]  # n-grama sem quebra de linha no meio
+        h = (h[validos] * _MISTURA) >> np.uint64(40)
+        documentos.append(np.searchsorted(inicios, np.flatnonzero(validos), side="right") - 1)
+        buckets.append((h % np.uint64(DIMENSAO)).astype(np.int64))
+    if not documentos:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(documentos), np.concatenate(buckets)
+
+
+# ============================
+# 🔹 Naive Bayes multinomial
+# ============================
+class ModeloBayes:
+    """
+    Naive Bayes multinomial sobre n-gramas de caracteres com hashing. Guarda só as contagens
+    (categoria × bucket), então aprender um exemplo novo é somar uma linha; as log-probabilidades
+    são recalculadas sob demanda.
+    """
+
+    def __init__(self, categorias=(), contagens=None, documentos=None):
+        self.categorias = list(categorias)
+        self.contagens = (np.zeros((len(self.categorias), DIMENSAO), dtype=np.float64)
+                          if contagens is None else np.asarray(contagens, dtype=np.float64))
+        self.documentos = (np.zeros(len(self.categorias), dtype=np.float64)
+                           if documentos is None else np.asarray(documentos, dtype=np.float64))
+        self._log_theta = None
+        self.sujo = False  # aprendeu exemplos que ainda não estão no arquivo
+        self._trava = threading.Lock()
+
+    @classmethod
+    def treinar(cls, textos, categorias):
+        categorias = pd.Series(categorias, dtype=object).reset_index(drop=True)
+        codigos, nomes = pd.factorize(categorias, sort=True)
+        modelo = cls(nomes)
+        documento, bucket = _ngramas(list(textos))
+        modelo.contagens += np.bincount(
+            codigos[documento] * DIMENSAO + bucket, minlength=len(nomes) * DIMENSAO
+        ).reshape(len(nomes), DIMENSAO)
+        modelo.documentos += np.bincount(codigos, minlength=len(nomes))
+        return modelo
+
+    @property
+    def utilizavel(self):
+        return len(self.categorias) >= MINIMO_CATEGORIAS and self.documentos.sum() >= MINIMO_EXEMPLOS
+
+    def aprender(self, textos, categorias):
+        """Soma exemplos ao modelo (ex.: correções do usuário), criando categorias novas se preciso."""
+        documento, bucket = _ngramas(list(textos))
+        with self._trava:
+            for categoria in dict.fromkeys(categorias):
+                if categoria not in self.categorias:
+                    self.categorias.append(categoria)
+                    self.contagens = np.vstack([self.contagens, np.zeros(DIMENSAO)])
+                    self.documentos = np.append(self.documentos, 0.0)
+            linhas = np.array([self.categorias.index(c) for c in categorias], dtype=np.int64)
+            np.add.at(self.contagens, (linhas[documento], bucket), 1.0)
+            np.add.at(self.documentos, linhas, 1.0)
+            self._log_theta = None
+            self.sujo = True
+
+    def _parametros(self):
+        with self._trava:
+            if self._log_theta is None:
+                totais = self.contagens.sum(axis=1, keepdims=True)
+                self._log_theta = np.log((self.contagens + ALFA) / (totais + ALFA * DIMENSAO)).astype(np.float32)
+                self._log_prior = np.log(self.documentos / self.documentos.sum())
+            return self._log_theta, self._log_prior
+
+    def prever(self, textos):
+        """
+        Categoria mais provável e sua confiança para cada texto (lista/Series). Cada texto distinto
+        é pontuado uma vez; a soma das log-probabilidades por texto é um bincount por categoria.
+        """
+        textos = pd.Series(textos, dtype=object).fillna("").astype(str)
+        codigos, unicos = pd.factorize(textos)
+        log_theta, log_prior = self._parametros()
+        melhores = np.zeros(len(unicos), dtype=np.int64)
+        confiancas = np.zeros(len(unicos), dtype=np.float64)
+
+        for inicio in range(0, len(unicos), TAMANHO_BLOCO):
+            bloco = list(unicos[inicio:inicio + TAMANHO_BLOCO])
+            documento, bucket = _ngramas(bloco)
+            # Média por n-grama em vez da soma: a soma do naive Bayes dá ~100% de confiança até para
+            # estabelecimentos nunca vistos; a média (× NITIDEZ) deixa esses casos para as regras
+            quantidades = np.maximum(np.bincount(documento, minlength=len(bloco)), 1)[:, None]
+            pontos = np.stack([
+                np.bincount(documento, weights=linha[bucket], minlength=len(bloco)) for linha in log_theta
+            ], axis=1) / quantidades * NITIDEZ + log_prior
+            pontos -= pontos.max(axis=1, keepdims=True)
+            probabilidades = np.exp(pontos)
+            probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+            melhores[inicio:inicio + len(bloco)] = probabilidades.argmax(axis=1)
+            confiancas[inicio:inicio + len(bloco)] = probabilidades.max(axis=1)
+
+        nomes = np.array(self.categorias, dtype=object)
+        return nomes[melhores][codigos], confiancas[codigos]
+
+    def salvar(self, caminho):
+        """
+        Grava as contagens num .npz. Copia o estado sob a trava e comprime fora dela; a escrita é
+        atômica (temporário exclusivo na mesma pasta + os.replace), então quem lê nunca vê o arquivo pela metade.
+        """
+        with self._trava:
+            categorias = np.array(self.categorias, dtype=str)
+            contagens, documentos = self.contagens.astype(np.float32), self.documentos.copy()
+            self.sujo = False
+        descritor, temporario = tempfile.mkstemp(
+            prefix=f"{os.path.basename(caminho)}.", suffix=".tmp", dir=os.path.dirname(caminho) or "."
+        )
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                np.savez_compressed(arquivo, categorias=categorias, contagens=contagens, documentos=documentos)
+            os.replace(temporario, caminho)
+        except BaseException:
+            with self._trava:
+                self.sujo = True
+            os.remove(temporario)
+            raise
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            if dados["contagens"].shape[1] != DIMENSAO:
+                return None  # gravado com outro hashing: precisa retreinar
+            return cls(dados["categorias"].tolist(), dados["contagens"], dados["documentos"])
+
+
+# ============================
+# 🔹 Modelo em uso (arquivo em instance/)
+# ============================
+_atual = None
+_caminho_atual = None
+_versao_atual = None  # mtime do arquivo carregado pelo pool de importação
+_trava = threading.Lock()
+
+
+def caminho_modelo():
+    """Arquivo do modelo: config MODELO_CATEGORIAS ou instance/modelo_categorias.npz (fora do app: nenhum)."""
+    if not has_app_context():
+        return _caminho_atual
+    return current_app.config.get("MODELO_CATEGORIAS") or os.path.join(current_app.instance_path, ARQUIVO)
+
+
+def exemplos_do_banco():
+    """Lançamentos já categorizados (exceto "Outros"): (textos, categorias) para o treino."""
+    tabela = Lancamento.__table__
+    linhas = db.session.execute(
+        select(tabela.c.descricao, tabela.c.estabelecimento, tabela.c.categoria)
+        .where(tabela.c.categoria.is_not(None), tabela.c.categoria != "", tabela.c.categoria != CATEGORIA_PADRAO)
+    ).all()
+    df = pd.DataFrame(linhas, columns=["descricao", "estabelecimento", "categoria"])
+    return _textos(df["descricao"], df["estabelecimento"]).tolist(), df["categoria"].tolist()
+
+
+def treinar_modelo():
+    """Treina do zero com os lançamentos do banco, grava o arquivo e passa a usá-lo. Devolve o modelo."""
+    global _atual, _caminho_atual
+    textos, categorias = exemplos_do_banco()
+    modelo = ModeloBayes.treinar(textos, categorias)
+    caminho = caminho_modelo()
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    modelo.salvar(caminho)
+    with _trava:
+        _atual, _caminho_atual = modelo, caminho
+    return modelo
+
+
+def modelo_atual():
+    """Modelo gravado no arquivo (carregado uma vez por processo); None se não existe ou tem poucos exemplos."""
+    global _atual, _caminho_atual
+    caminho = caminho_modelo()
+    with _trava:
+        modelo = _atual if caminho == _caminho_atual else None
+    if modelo is None and caminho and os.path.exists(caminho):
+        modelo = ModeloBayes.carregar(caminho)
+        if modelo is not None:
+            with _trava:
+                _atual, _caminho_atual = modelo, caminho
+    return modelo if modelo is not None and modelo.utilizavel else None
+
+
+def garantir_modelo():
+    """Treina o primeiro modelo na subida do app, se ainda não há arquivo e já há lançamentos suficientes."""
+    caminho = caminho_modelo()
+    if os.path.exists(caminho):
+        return modelo_atual()
+    categorizados = db.session.query(Lancamento.id).filter(
+        Lancamento.categoria.is_not(None), Lancamento.categoria != CATEGORIA_PADRAO
+    ).limit(MINIMO_EXEMPLOS).count()
+    return treinar_modelo() if categorizados >= MINIMO_EXEMPLOS else None
+
+
+def usar_modelo(caminho):
+    """
+    Passa a usar o modelo gravado em `caminho` (processos do pool de importação, que não acessam o
+    banco); só relê o arquivo se ele mudou desde a última vez. Com None, fica só com as regras.
+    """
+    global _atual, _caminho_atual, _versao_atual
+    versao = os.path.getmtime(caminho) if caminho and os.path.exists(caminho) else None
+    with _trava:
+        if caminho == _caminho_atual and versao == _versao_atual:
+            return
+    modelo = ModeloBayes.carregar(caminho) if versao is not None else None
+    with _trava:
+        _atual, _caminho_atual, _versao_atual = modelo, caminho, versao
+
+
+# ============================
+# 🔹 Classificação: modelo com volta às regras
+# ============================
+def classificar_serie(descricoes, estabelecimentos=None):
+    """
+    Categoriza Series inteiras: o modelo responde quando a confiança passa de CONFIANCA_MINIMA;
+    o resto (ou tudo, sem modelo treinado) fica com as regras de palavras-chave.
+    """
+    descricoes = pd.Series(descricoes).fillna("").astype(str)
+    regras = classificador_atual().classificar_serie(descricoes, estabelecimentos)
+    modelo = modelo_atual()
+    if modelo is None or descricoes.empty:
+        return regras
+    previstas, confiancas = modelo.prever(_textos(descricoes, estabelecimentos))
+    return regras.where(confiancas < CONFIANCA_MINIMA, previstas)
+
+
+def classificar(descricao, estabelecimento=""):
+    modelo = modelo_atual()
+    if modelo is not None:
+        previstas, confiancas = modelo.prever([f"{descricao or ''} {estabelecimento or ''}"])
+        if confiancas[0] >= CONFIANCA_MINIMA:
+            return previstas[0]
+    return classificador_atual().classificar(descricao, estabelecimento)
+
+
+# ============================
+# 🔹 Aprendizado incremental: correções do usuário
+# ============================
+def aprender(descricao, estabelecimento, categoria):
+    """Agenda o exemplo para o modelo; ele só aprende (e o arquivo só é regravado) se a transação confirmar."""
+    db.session.info.setdefault("exemplos_modelo", []).append((f"{descricao or ''} {estabelecimento or ''}", categoria))
+
+
+@event.listens_for(Session, "after_commit")
+def _aprender_exemplos(session):
+    exemplos = session.info.pop("exemplos_modelo", None)
+    if not exemplos:
+        return
+    modelo = _atual
+    if modelo is None:
+        return  # ainda sem modelo: o primeiro treino já vai ler essas correções do banco
+    textos, categorias = zip(*exemplos)
+    modelo.aprender(textos, categorias)
+    # O commit não espera o disco: o arquivo é regravado em segundo plano, uma vez por rajada de correções
+    from tarefas import agendar_gravacao_modelo  # import local: tarefas depende deste módulo
+    agendar_gravacao_modelo()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_exemplos(session):
+    session.info.pop("exemplos_modelo", None)
+
+
+@atexit.register
+def gravar_modelo():
+    """Regrava o arquivo do modelo em uso se ele aprendeu algo desde a última gravação (e ao encerrar)."""
+    modelo, caminho = _atual, _caminho_atual
+    if modelo is not None and caminho and modelo.sujo:
+        modelo.salvar(caminho)
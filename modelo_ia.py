@@ -1,24 +1,18 @@
 # modelo_ia.py
+import pandas as pd
+
+from modelo_categorias import classificar, classificar_serie
 
 def classificar_texto(descricao: str, estabelecimento: str = "") -> str:
     """
     Classifica o texto em uma categoria financeira com base na descrição e no nome do estabelecimento.
+    Usa o modelo treinado com os lançamentos já categorizados quando ele está confiante e,
+    nos demais casos, o classificador compilado (regras do banco + regras embutidas).
+    Com uma Series de descrições (e de estabelecimentos), classifica tudo de uma vez e devolve uma Series.
     """
-    descricao = descricao.lower()
-    estabelecimento = estabelecimento.lower()
-
-    if "mercado" in descricao or "supermercado" in estabelecimento:
-        return "Alimentação"
-    elif "uber" in descricao or "99" in estabelecimento:
-        return "Transporte"
-    elif "farmácia" in descricao or "remédio" in descricao:
-        return "Saúde"
-    elif "academia" in descricao:
-        return "Bem-estar"
-    elif "cinema" in descricao or "netflix" in estabelecimento:
-        return "Lazer"
-    else:
-        return "Outros"
+    if isinstance(descricao, pd.Series):
+        return classificar_serie(descricao, estabelecimento)
+    return classificar(descricao, estabelecimento)
 
 def gerar_insights(df, categorias) -> dict:
     """
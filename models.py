@@ -1,4 +1,5 @@
-from datetime import date
+from datetime import date, datetime
+from decimal import Decimal
 from calendar import monthrange
 from flask_sqlalchemy import SQLAlchemy
 
@@ -12,21 +13,83 @@ class Lancamento(db.Model):
     __tablename__ = "lancamento"
 
     id = db.Column(db.Integer, primary_key=True)
-    descricao = db.Column(db.String(200), nullable=False)
-    valor = db.Column(db.Numeric(12, 2), nullable=False)
+    competencia = db.Column(db.String(7), nullable=False)  # AAAA-MM
     data = db.Column(db.Date, nullable=False)
-    tipo = db.Column(db.String(50), nullable=False)  # Receita ou Despesa
-    categoria = db.Column(db.String(100), nullable=False)
-    forma_pagamento = db.Column(db.String(50), nullable=False)
+    descricao = db.Column(db.String(100), nullable=False)
+    estabelecimento = db.Column(db.String(100), nullable=True)
+    valor = db.Column(db.Float, nullable=False)
+    tipo = db.Column(db.String(10), nullable=False)  # Receita ou Despesa
+    categoria = db.Column(db.String(50), nullable=False)
+    forma_pagamento = db.Column(db.String(50), nullable=True)
+    hash_conteudo = db.Column(db.String(64), nullable=True, unique=True, index=True)  # só lançamentos importados
+
+    __table_args__ = (
+        # Listagem paginada por (data, id) decrescente: a página seguinte começa logo após o último item visto
+        db.Index("ix_lancamento_data_id", "data", "id"),
+        # Filtros e totais por competência (e tipo) sem varrer a tabela
+        db.Index("ix_lancamento_competencia_tipo", "competencia", "tipo"),
+    )
+
+# ============================
+# 🔹 Modelo: Resumo Mensal (agregado de lançamentos)
+# ============================
+class ResumoMensal(db.Model):
+    """Soma e quantidade de lançamentos por competência, tipo, categoria e forma de pagamento."""
+    __tablename__ = "resumo_mensal"
+
+    competencia = db.Column(db.String(7), primary_key=True)
+    tipo = db.Column(db.String(10), primary_key=True)
+    categoria = db.Column(db.String(50), primary_key=True)
+    forma_pagamento = db.Column(db.String(50), primary_key=True, default="")
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
 
 # ============================
 # 🔹 Modelo: Categoria
 # ============================
 class Categoria(db.Model):
-    __tablename__ = "categorias"
+    __tablename__ = "categoria"
+
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(50), nullable=False)
+    tipo = db.Column(db.String(10), nullable=False)  # Receita ou Despesa
+    meta_mensal = db.Column(db.Float, nullable=True)
+
+# ============================
+# 🔹 Modelo: Meta por Forma de Pagamento
+# ============================
+class MetaFormaPagamento(db.Model):
+    """Limite mensal de despesas numa forma de pagamento (ex.: Cartão), avaliado pelos alertas de meta."""
+    __tablename__ = "meta_forma_pagamento"
+
+    forma_pagamento = db.Column(db.String(50), primary_key=True)
+    meta_mensal = db.Column(db.Float, nullable=False)
+
+# ============================
+# 🔹 Modelo: Regra de Categoria (palavra-chave editável)
+# ============================
+class RegraCategoria(db.Model):
+    """Palavra-chave que leva à categoria; vale antes das regras embutidas do classificador."""
+    __tablename__ = "regras_categoria"
 
     id = db.Column(db.Integer, primary_key=True)
-    nome = db.Column(db.String(100), nullable=False)
+    palavra = db.Column(db.String(100), nullable=False)
+    categoria = db.Column(db.String(50), nullable=False)
+    campo = db.Column(db.String(20), nullable=False, default="qualquer")  # descricao, estabelecimento ou qualquer
+    prioridade = db.Column(db.Integer, nullable=False, default=0)  # menor vale primeiro
+    ativa = db.Column(db.Boolean, nullable=False, default=True)
+
+# ============================
+# 🔹 Modelo: Categoria por Estabelecimento (cache persistente)
+# ============================
+class EstabelecimentoCategoria(db.Model):
+    """Estabelecimento normalizado → categoria: resultado do classificador ou correção do usuário."""
+    __tablename__ = "merchant_categoria"
+
+    chave = db.Column(db.String(100), primary_key=True)
+    categoria = db.Column(db.String(50), nullable=False)
+    origem = db.Column(db.String(20), nullable=False, default="classificador")  # classificador ou usuario
+    atualizado_em = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
 
 # ============================
 # 🔹 Modelo: Compra com Cartão
@@ -42,11 +105,13 @@ class CompraCartao(db.Model):
     data_primeira_fatura = db.Column(db.Date, nullable=False)
     criado_em = db.Column(db.Date, default=date.today, nullable=False)
 
+    # Carregamento escolhido por consulta (selectinload nas telas de edição, projeções nas listagens):
+    # um JOIN fixo aqui repetiria a compra em uma linha por parcela em toda busca de compra.
     parcelas = db.relationship(
         "ParcelaCartao",
         back_populates="compra",
         cascade="all, delete-orphan",
-        lazy="joined"
+        order_by="ParcelaCartao.numero"
     )
 
 # ============================
@@ -61,40 +126,122 @@ class ParcelaCartao(db.Model):
     vencimento = db.Column(db.Date, nullable=False)
     paga = db.Column(db.Boolean, default=False, nullable=False)
 
-    compra_id = db.Column(db.Integer, db.ForeignKey("compras_cartao.id"), nullable=False, index=True)
+    compra_id = db.Column(db.Integer, db.ForeignKey("compras_cartao.id"), nullable=False)
     compra = db.relationship("CompraCartao", back_populates="parcelas")
 
+    __table_args__ = (
+        # Filtros por mês (intervalo de vencimento) e parcelas em aberto a partir de hoje
+        db.Index("ix_parcelas_cartao_vencimento_paga", "vencimento", "paga"),
+        # Parcelas de uma compra já na ordem de vencimento (também serve às buscas só por compra_id)
+        db.Index("ix_parcelas_cartao_compra_id_vencimento", "compra_id", "vencimento"),
+    )
+
+# ============================
+# 🔹 Modelo: Fatura (agregado de parcelas por cartão e mês)
+# ============================
+class Fatura(db.Model):
+    """Total, total pago, parcelas e parcelas em aberto de um cartão no mês de vencimento (ver faturas.py)."""
+    __tablename__ = "fatura"
+
+    mes = db.Column(db.String(7), primary_key=True)  # AAAA-MM do vencimento
+    cartao = db.Column(db.String(100), primary_key=True, default="")  # "" = compra sem cartão
+    total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_pago = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    parcelas = db.Column(db.Integer, nullable=False, default=0)
+    abertas = db.Column(db.Integer, nullable=False, default=0)
+
+# ============================
+# 🔹 Modelo: Previsão Mensal (modelo sazonal por categoria)
+# ============================
+class PrevisaoMensal(db.Model):
+    """Valor previsto de uma categoria num mês futuro, ajustado com o histórico até `base` (ver previsao_sazonal.py)."""
+    __tablename__ = "previsao_mensal"
+
+    mes = db.Column(db.String(7), primary_key=True)  # AAAA-MM previsto
+    tipo = db.Column(db.String(10), primary_key=True)  # Receita ou Despesa
+    categoria = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Float, nullable=False, default=0.0)
+    base = db.Column(db.String(7), nullable=False)  # último mês fechado usado no ajuste
+    assinatura = db.Column(db.String(40), nullable=False)  # sha1 dos totais mensais por categoria usados
+    calculado_em = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+# ============================
+# 🔹 Modelo: Importação de Arquivo
+# ============================
+class Importacao(db.Model):
+    """Andamento de uma importação em blocos; `linhas_processadas` é o ponto de retomada."""
+    __tablename__ = "importacoes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    nome_arquivo = db.Column(db.String(200), nullable=False)
+    caminho_arquivo = db.Column(db.String(300), nullable=True)  # cópia salva para processar/retomar
+    assinatura = db.Column(db.String(64), nullable=False, index=True)  # sha256 do conteúdo
+    tipo = db.Column(db.String(20), nullable=False, default="extrato")  # extrato ou planilha
+    formato = db.Column(db.String(10), nullable=False)  # csv ou xlsx
+    status = db.Column(db.String(20), nullable=False, default="na_fila")  # na_fila, em_andamento, concluida, erro
+    linhas_processadas = db.Column(db.Integer, nullable=False, default=0)
+    linhas_inseridas = db.Column(db.Integer, nullable=False, default=0)
+    linhas_rejeitadas = db.Column(db.Integer, nullable=False, default=0)
+    linhas_duplicadas = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    linhas_por_segundo = db.Column(db.Float, nullable=True)
+    mensagem = db.Column(db.String(500), nullable=True)
+    criado_em = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    atualizado_em = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+# ============================
+# 🔹 Modelo: Reclassificação em lote (job em segundo plano)
+# ============================
+class Reclassificacao(db.Model):
+    """Reclassificação dos lançamentos "Outros"; com `simulacao`, só registra o que mudaria."""
+    __tablename__ = "reclassificacoes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    simulacao = db.Column(db.Boolean, nullable=False, default=False)
+    status = db.Column(db.String(20), nullable=False, default="na_fila")  # na_fila, em_andamento, concluida, erro
+    linhas_analisadas = db.Column(db.Integer, nullable=False, default=0)
+    linhas_a_alterar = db.Column(db.Integer, nullable=False, default=0)
+    linhas_alteradas = db.Column(db.Integer, nullable=False, default=0)
+    resumo = db.Column(db.Text, nullable=True)  # JSON: categorias de destino, quantidades e exemplos
+    mensagem = db.Column(db.String(500), nullable=True)
+    criado_em = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    atualizado_em = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
 # ============================
 # 🔹 Função: Gerar Parcelas
 # ============================
 def gerar_parcelas(compra: CompraCartao):
-    """Gera as parcelas com base no valor total e na data da primeira fatura."""
-    valor_parcela = round(compra.valor_total / compra.total_parcelas, 2)
+    """
+    Gera as parcelas com base no valor total e na data da primeira fatura: todas com o valor
+    truncado no centavo e os centavos que sobram na última, para a soma bater com o total.
+    Mesma regra de `compras_lote.cronograma_parcelas`, usada na criação em lote.
+    """
+    centavos = int((Decimal(str(compra.valor_total)) * 100).to_integral_value())
+    base, resto = divmod(centavos, compra.total_parcelas)
     parcelas = []
-    data = compra.data_primeira_fatura
 
     for n in range(1, compra.total_parcelas + 1):
         parcela = ParcelaCartao(
             compra=compra,
             numero=n,
-            valor=valor_parcela,
-            vencimento=data,
+            valor=Decimal(base + (resto if n == compra.total_parcelas else 0)) / 100,
+            vencimento=somar_meses(compra.data_primeira_fatura, n - 1),
             paga=False,
         )
         parcelas.append(parcela)
-        data = proximo_mes(data)
 
     return parcelas
 
 # ============================
-# 🔹 Função Auxiliar: Próximo Mês
+# 🔹 Funções Auxiliares: Meses
 # ============================
-def proximo_mes(d: date) -> date:
-    """Calcula a mesma data no mês seguinte, ajustando para meses com menos dias."""
-    ano = d.year + (1 if d.month == 12 else 0)
-    mes = 1 if d.month == 12 else d.month + 1
-    dia = min(d.day, monthrange(ano, mes)[1])
-    return date(ano, mes, dia)
-
+def somar_meses(d: date, meses: int) -> date:
+    """Mesmo dia `meses` meses depois, limitado ao último dia dos meses mais curtos (31/01 + 1 → 28/02)."""
+    indice = d.year * 12 + d.month - 1 + meses
+    ano, mes = divmod(indice, 12)
+    mes += 1
+    return date(ano, mes, min(d.day, monthrange(ano, mes)[1]))
 
 
+def proximo_mes(d: date) -> date:
+    """Calcula a mesma data no mês seguinte, ajustando para meses com menos dias."""
+    return somar_meses(d, 1)
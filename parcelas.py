@@ -0,0 +1,142 @@
+from datetime import date, datetime
+
+from sqlalchemy import func, text
+
+from models import db, CompraCartao, Fatura, ParcelaCartao
+
+HORIZONTE_MAXIMO = 24  # maior horizonte oferecido no /planejamento (link "24 meses")
+
+
+# ============================
+# 🔹 Intervalos de mês
+# ============================
+def limites_do_mes(d):
+    """Primeiro dia do mês de `d` e do mês seguinte: o intervalo [inicio, fim) do mês."""
+    inicio = d.replace(day=1)
+    fim = date(inicio.year + 1, 1, 1) if inicio.month == 12 else date(inicio.year, inicio.month + 1, 1)
+    return inicio, fim
+
+
+def intervalo_do_mes(mes):
+    """Intervalo [inicio, fim) de um mês "AAAA-MM"; ValueError se o texto não for um mês."""
+    return limites_do_mes(datetime.strptime(mes, "%Y-%m").date())
+
+
+# ============================
+# 🔹 Consultas
+# ============================
+# Todas filtram por intervalos [inicio, fim) de vencimento, nunca por extract(ano/mês): assim usam
+# o índice (vencimento, paga). Totais por mês e cartão vêm da tabela fatura.
+
+def consulta_parcelas(mes=None, cartao=None):
+    """
+    Linhas da listagem de parcelas do mês "AAAA-MM" e/ou do cartão, por vencimento: só as colunas
+    exibidas da parcela e da compra (descricao, cartao, total_parcelas), sem carregar objetos.
+    """
+    query = db.session.query(
+        ParcelaCartao.id, ParcelaCartao.numero, ParcelaCartao.valor, ParcelaCartao.vencimento, ParcelaCartao.paga,
+        ParcelaCartao.compra_id, CompraCartao.descricao, CompraCartao.cartao, CompraCartao.total_parcelas,
+    ).join(CompraCartao, ParcelaCartao.compra_id == CompraCartao.id)
+    if cartao:
+        query = query.filter(CompraCartao.cartao.ilike(f"%{cartao}%"))
+    if mes:
+        inicio, fim = intervalo_do_mes(mes)
+        query = query.filter(ParcelaCartao.vencimento >= inicio, ParcelaCartao.vencimento < fim)
+    return query.order_by(ParcelaCartao.vencimento)
+
+
+def consulta_parcelas_futuras(hoje):
+    """Soma das parcelas ainda não pagas com vencimento a partir de hoje."""
+    return db.session.query(func.coalesce(func.sum(ParcelaCartao.valor), 0.0)).filter(
+        ParcelaCartao.vencimento >= hoje,
+        ParcelaCartao.paga == False
+    )
+
+
+# ============================
+# 🔹 Faturas (tabela fatura, mantida em faturas.py)
+# ============================
+def _rotulo_mes(mes):
+    return f"{mes[5:7]}/{mes[:4]}"
+
+
+def consulta_totais_por_mes():
+    """Total das faturas de todos os cartões por mês: uma leitura da chave primária (mes, cartao)."""
+    return db.session.query(Fatura.mes, func.sum(Fatura.total)).group_by(Fatura.mes).order_by(Fatura.mes)
+
+
+def consulta_faturas(inicio, fim):
+    """Faturas dos meses "AAAA-MM" em [inicio, fim), por mês e cartão."""
+    return Fatura.query.filter(Fatura.mes >= inicio, Fatura.mes < fim).order_by(Fatura.mes, Fatura.cartao)
+
+
+def consulta_faturas_do_mes(mes, cartao=None):
+    """Faturas do mês "AAAA-MM", opcionalmente só dos cartões que contêm `cartao` (como a listagem)."""
+    query = consulta_faturas(mes, intervalo_do_mes(mes)[1].strftime("%Y-%m"))
+    if cartao:
+        query = query.filter(Fatura.cartao.ilike(f"%{cartao}%"))
+    return query
+
+
+def totais_por_mes():
+    """[{"mes": "MM/AAAA", "total": float}] de todas as parcelas, em ordem cronológica."""
+    return [{"mes": _rotulo_mes(mes), "total": float(total)} for mes, total in consulta_totais_por_mes()]
+
+
+def horizonte(hoje=None, meses=None):
+    """Meses "AAAA-MM" [inicio, fim) do planejamento: do mês atual até dezembro, ou `meses` meses."""
+    hoje = hoje or date.today()
+    if meses is None:
+        meses = 13 - hoje.month
+    fim = hoje.year * 12 + hoje.month - 1 + max(1, meses)
+    return hoje.strftime("%Y-%m"), f"{fim // 12:04d}-{fim % 12 + 1:02d}"
+
+
+def planejamento_por_mes(hoje=None, meses=None):
+    """
+    Faturas do horizonte por mês e cartão, em ordem cronológica:
+    {"MM/AAAA": {cartao: {"quantidade", "total", "pago", "abertas"}}}.
+    """
+    resultado = {}
+    for fatura in consulta_faturas(*horizonte(hoje, meses)):
+        resultado.setdefault(_rotulo_mes(fatura.mes), {})[fatura.cartao or "Não informado"] = {
+            "quantidade": fatura.parcelas,
+            "total": float(fatura.total),
+            "pago": float(fatura.total_pago),
+            "abertas": fatura.abertas,
+        }
+    return resultado
+
+
+# ============================
+# 🔹 Planos de consulta (EXPLAIN QUERY PLAN)
+# ============================
+def consultas_quentes(hoje=None):
+    """As consultas de parcelas feitas a cada acesso às páginas de cartão e planejamento."""
+    hoje = hoje or date.today()
+    return {
+        "parcelas do mês": consulta_parcelas(mes=hoje.strftime("%Y-%m")),
+        "parcelas do mês por cartão": consulta_parcelas(mes=hoje.strftime("%Y-%m"), cartao="nubank"),
+        "todas as parcelas": consulta_parcelas(),
+        "totais por mês": consulta_totais_por_mes(),
+        "planejamento": consulta_faturas(*horizonte(hoje)),
+        "parcelas futuras em aberto": consulta_parcelas_futuras(hoje),
+    }
+
+
+def plano_de_consulta(query):
+    """Linhas do EXPLAIN QUERY PLAN da consulta (parâmetros já embutidos no SQL)."""
+    sql = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    return [linha[-1] for linha in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def consultas_sem_indice(hoje=None):
+    """{consulta: plano} das consultas quentes que varrem parcelas_cartao ou fatura sem índice."""
+    tabelas = (ParcelaCartao.__tablename__, Fatura.__tablename__)
+    sem_indice = {}
+    for nome, query in consultas_quentes(hoje).items():
+        plano = plano_de_consulta(query)
+        if any(passo.startswith("SCAN") and passo.split()[1] in tabelas and "INDEX" not in passo
+               for passo in plano):
+            sem_indice[nome] = plano
+    return sem_indice
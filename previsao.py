@@ -1,38 +1,183 @@
-import calendar
-from datetime import datetime
+import re
+import threading
+from datetime import date
 
-def prever_gastos(df_lancamentos, data_atual=None):
-    if data_atual is None:
-        data_atual = datetime.today()
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
 
-    df_mes = df_lancamentos[
-        (df_lancamentos['data'].dt.month == data_atual.month) &
-        (df_lancamentos['data'].dt.year == data_atual.year) &
-        (df_lancamentos['tipo'] == 'Despesa')
+from models import db, Lancamento
+from parcelas import consulta_faturas_do_mes, intervalo_do_mes
+from cache_lru import CacheLRU
+
+DIMENSOES = {"categorias": "categoria", "formas_pagamento": "forma_pagamento"}
+MINIMO_DIAS_COM_GASTO = 2  # com um único dia de gasto ainda não há ritmo para projetar
+TABELAS_OBSERVADAS = re.compile(r"\b(lancamento|parcelas_cartao|compras_cartao)\b")
+
+
+# ============================
+# 🔹 Fatia do mês
+# ============================
+def fatia_do_mes(df, mes):
+    """
+    Linhas do mês "AAAA-MM" de um DataFrame indexado por data em ordem crescente: duas buscas
+    binárias no índice, sem máscara sobre o DataFrame inteiro.
+    """
+    inicio, fim = intervalo_do_mes(mes)
+    indice = df.index.values
+    return df.iloc[indice.searchsorted(np.datetime64(inicio, "ns")):indice.searchsorted(np.datetime64(fim, "ns"))]
+
+
+# ============================
+# 🔹 Projeção do mês (vetorizada)
+# ============================
+def _projetar(codigos, quantidade, dias, valores, dias_restantes):
+    """
+    Realizado, dias com gasto e projeção de cada um dos `quantidade` grupos: dois bincount (valor e
+    ocorrências por grupo e dia) e a mesma regra da antiga prever_gastos — média por dia com gasto
+    vezes os dias que faltam, só a partir de MINIMO_DIAS_COM_GASTO dias.
+    """
+    realizado = np.bincount(codigos, weights=valores, minlength=quantidade)
+    por_dia = np.bincount(codigos * 31 + dias, minlength=quantidade * 31).reshape(quantidade, 31)
+    dias_com_gasto = (por_dia > 0).sum(axis=1)
+    media = np.divide(realizado, dias_com_gasto, out=np.zeros(quantidade), where=dias_com_gasto > 0)
+    restante = np.where(dias_com_gasto >= MINIMO_DIAS_COM_GASTO, media * dias_restantes, 0.0)
+    return realizado, dias_com_gasto, restante
+
+
+def _linhas(rotulos, realizado, dias_com_gasto, restante):
+    linhas = [
+        {"nome": nome or "Não informado", "realizado": round(float(r), 2), "restante": round(float(f), 2),
+         "previsto": round(float(r + f), 2), "dias_com_gasto": int(d)}
+        for nome, r, d, f in zip(rotulos, realizado, dias_com_gasto, restante)
     ]
+    return sorted(linhas, key=lambda linha: -linha["previsto"])
+
+
+def projetar_mes(lancamentos, mes, hoje=None, faturas=()):
+    """
+    Projeção do fim do mês "AAAA-MM" a partir dos lançamentos (DataFrame indexado por data, em ordem,
+    com "valor", "categoria", "forma_pagamento" e, opcionalmente, "tipo") e das faturas de cartão do
+    mês (objetos ou dicts com "cartao", "total", "total_pago").
+
+    Só despesas entram. Antes do mês nada foi realizado; depois dele nada falta. Devolve o total, cada
+    categoria e cada forma de pagamento ({"realizado", "restante", "previsto", "dias_com_gasto"}),
+    as parcelas de cada cartão no mês e o comprometido (previsto + parcelas em aberto).
+    """
+    hoje = hoje or date.today()
+    inicio, fim = intervalo_do_mes(mes)
+    dias_no_mes = (fim - inicio).days
+    dia = 0 if hoje < inicio else dias_no_mes if hoje >= fim else hoje.day
+    dias_restantes = dias_no_mes - dia
+
+    fatia = fatia_do_mes(lancamentos, mes)
+    if "tipo" in fatia.columns:
+        fatia = fatia[fatia["tipo"].to_numpy() == "Despesa"]
+    dias = fatia.index.day.to_numpy() - 1
+    valores = fatia["valor"].to_numpy(dtype=float)
+
+    realizado, dias_com_gasto, restante = _projetar(np.zeros(len(fatia), dtype=np.int64), 1, dias, valores,
+                                                    dias_restantes)
+    resultado = {
+        "mes": mes,
+        "dia": dia,
+        "dias_no_mes": dias_no_mes,
+        "dias_restantes": dias_restantes,
+        "total": _linhas([""], realizado, dias_com_gasto, restante)[0],
+    }
+    resultado["total"].pop("nome")
+
+    for chave, coluna in DIMENSOES.items():
+        codigos, rotulos = pd.factorize(fatia[coluna].fillna("").astype(str), sort=True)
+        resultado[chave] = _linhas(rotulos, *_projetar(codigos, len(rotulos), dias, valores, dias_restantes))
+
+    cartoes = []
+    for fatura in faturas:
+        fatura = fatura if isinstance(fatura, dict) else {
+            "cartao": fatura.cartao, "total": fatura.total, "total_pago": fatura.total_pago}
+        total, pago = float(fatura["total"]), float(fatura["total_pago"])
+        cartoes.append({"nome": fatura["cartao"] or "Não informado", "parcelas": round(total, 2),
+                        "pago": round(pago, 2), "em_aberto": round(total - pago, 2)})
+    resultado["cartoes"] = sorted(cartoes, key=lambda cartao: -cartao["parcelas"])
+    resultado["comprometido"] = round(resultado["total"]["previsto"] + sum(c["em_aberto"] for c in cartoes), 2)
+    return resultado
+
+
+# ============================
+# 🔹 Previsão do banco, em cache por mês
+# ============================
+_cache = CacheLRU(tamanho=64)
+_versao = 0
+_trava = threading.Lock()
+
+
+def carregar_despesas(mes):
+    """Despesas do mês "AAAA-MM" indexadas por data (faixa do índice (data, id))."""
+    inicio, fim = intervalo_do_mes(mes)
+    tabela = Lancamento.__table__
+    linhas = db.session.execute(
+        select(tabela.c.data, tabela.c.valor, tabela.c.categoria, tabela.c.forma_pagamento)
+        .where(tabela.c.data >= inicio, tabela.c.data < fim, tabela.c.tipo == "Despesa")
+        .order_by(tabela.c.data)
+    ).all()
+    df = pd.DataFrame(linhas, columns=["data", "valor", "categoria", "forma_pagamento"])
+    return df.set_index(pd.DatetimeIndex(pd.to_datetime(df.pop("data")), name="data"))
+
+
+def previsao_do_mes(mes=None, hoje=None):
+    """
+    `projetar_mes` para o mês "AAAA-MM" (padrão: o atual) com os dados do banco. O resultado fica em
+    cache por (mês, dia) até que um commit altere lançamentos, compras ou parcelas.
+    """
+    hoje = hoje or date.today()
+    mes = mes or hoje.strftime("%Y-%m")
+    chave = (mes, hoje)
+    versao = _versao
+    guardado = _cache.get(chave)
+    if guardado is not None and guardado[0] == versao:
+        return guardado[1]
+
+    resultado = projetar_mes(carregar_despesas(mes), mes, hoje, consulta_faturas_do_mes(mes).all())
+    with _trava:
+        if versao == _versao:  # dados mudaram durante o cálculo: não guarda um resultado já velho
+            _cache.put(chave, (versao, resultado))
+    return resultado
+
 
-    if df_mes.empty:
-        return 0.0
+def invalidar():
+    """Descarta as previsões em cache (ex.: dados alterados fora do app)."""
+    global _versao
+    with _trava:
+        _versao += 1
+        _cache.clear()
 
-    gastos_por_dia = df_mes.groupby(df_mes['data'].dt.date)['valor'].sum()
-    dias_com_gasto = len(gastos_por_dia)
 
-    # 🔒 Se só há 1 dia com gasto, não prever ainda
-    if dias_com_gasto < 2:
-        print("⚠️ Dados insuficientes para previsão realista.")
-        return 0.0
+# ============================
+# 🔹 Hooks: invalidação no commit que alterou os dados
+# ============================
+# Importações, compras em lote e pagamento de fatura gravam direto pela conexão, sem passar pelo
+# flush; por isso a escrita é detectada no cursor e a conexão marcada até o commit da sessão.
+@event.listens_for(Engine, "before_cursor_execute")
+def _marcar_escrita(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE") and TABELAS_OBSERVADAS.search(statement):
+        conn.info["previsao_alterada"] = True
 
-    media_diaria_real = gastos_por_dia.mean()
-    dias_totais = calendar.monthrange(data_atual.year, data_atual.month)[1]
-    dias_restantes = dias_totais - data_atual.day
-    previsao = media_diaria_real * dias_restantes
 
-    print("🔍 Dias com gasto:", dias_com_gasto)
-    print("🔍 Média diária real:", media_diaria_real)
-    print("🔍 Dias restantes:", dias_restantes)
-    print("🔍 Previsão final:", previsao)
+@event.listens_for(Session, "after_begin")
+def _registrar_conexao(session, transaction, connection):
+    session.info.setdefault("previsao_conexoes", []).append(connection.info)
 
-    return round(previsao, 2)
 
+@event.listens_for(Session, "after_commit")
+def _invalidar_no_commit(session):
+    alteradas = [info.pop("previsao_alterada", False) for info in session.info.pop("previsao_conexoes", [])]
+    if any(alteradas):
+        invalidar()
 
 
+@event.listens_for(Session, "after_rollback")
+def _descartar_escrita(session):
+    for info in session.info.pop("previsao_conexoes", []):
+        info.pop("previsao_alterada", None)
@@ -0,0 +1,192 @@
+import hashlib
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, insert, select
+
+from models import db, PrevisaoMensal, ResumoMensal
+from parcelas import HORIZONTE_MAXIMO
+
+HORIZONTE = HORIZONTE_MAXIMO  # meses previstos a partir do mês atual: todo o horizonte do planejamento
+TEMPORADA = 12
+
+
+# ============================
+# 🔹 Meses como índices inteiros
+# ============================
+def indice_do_mes(mes):
+    """"AAAA-MM" → ano * 12 + mês - 1, para somar meses com aritmética inteira."""
+    return int(mes[:4]) * 12 + int(mes[5:7]) - 1
+
+
+def mes_do_indice(indice):
+    return f"{indice // 12:04d}-{indice % 12 + 1:02d}"
+
+
+def ultimo_mes_fechado(hoje=None):
+    """Mês anterior ao de `hoje`: o último com o histórico completo."""
+    hoje = hoje or date.today()
+    return mes_do_indice(hoje.year * 12 + hoje.month - 2)
+
+
+# ============================
+# 🔹 Modelo sazonal (todas as séries de uma vez)
+# ============================
+def ajustar_sazonal(historico, primeiro_mes, horizonte=HORIZONTE):
+    """
+    Previsão dos `horizonte` meses seguintes ao histórico para cada série (linha) da matriz
+    `historico` (séries × meses consecutivos, o primeiro sendo o índice `primeiro_mes`).
+
+    Modelo aditivo simples, ajustado em operações sobre a matriz inteira:
+    - nível: média dos últimos 12 meses da série;
+    - efeito de cada mês do calendário: média, em todos os anos, da diferença entre o mês e a média
+      móvel dos 12 meses terminados nele (13º salário, IPVA em janeiro, matrícula escolar...),
+      centrada em zero.
+    Meses antes do primeiro valor da série não contam. Previsões negativas viram zero.
+    Devolve a matriz séries × horizonte.
+    """
+    historico = np.asarray(historico, dtype=float)
+    series, meses = historico.shape
+    colunas = np.arange(meses)
+    inicio = np.where(historico.any(axis=1), (historico != 0).argmax(axis=1), meses)
+    ativo = colunas >= inicio[:, None]
+
+    # Média móvel de 12 meses por somas acumuladas; vale só com 12 meses ativos na janela
+    acumulado = np.concatenate([np.zeros((series, 1)), historico.cumsum(axis=1)], axis=1)
+    janela = colunas >= inicio[:, None] + TEMPORADA - 1
+    media_movel = np.zeros_like(historico)
+    media_movel[:, TEMPORADA - 1:] = (acumulado[:, TEMPORADA:] - acumulado[:, :-TEMPORADA]) / TEMPORADA
+    desvio = np.where(janela, historico - media_movel, 0.0)
+
+    calendario = np.eye(TEMPORADA)[(primeiro_mes + colunas) % TEMPORADA]  # meses × 12
+    ocorrencias = janela.astype(float) @ calendario
+    sazonal = np.divide(desvio @ calendario, ocorrencias, out=np.zeros((series, TEMPORADA)), where=ocorrencias > 0)
+    definidos = ocorrencias > 0
+    sazonal -= np.where(definidos, sazonal, 0).sum(axis=1, keepdims=True) / np.maximum(definidos.sum(axis=1, keepdims=True), 1)
+    sazonal = np.where(definidos, sazonal, 0.0)
+
+    recentes = ativo[:, -TEMPORADA:]
+    nivel = np.where(recentes, historico[:, -TEMPORADA:], 0).sum(axis=1) / np.maximum(recentes.sum(axis=1), 1)
+
+    futuros = (primeiro_mes + meses + np.arange(horizonte)) % TEMPORADA
+    return np.maximum(nivel[:, None] + sazonal[:, futuros], 0.0)
+
+
+# ============================
+# 🔹 Histórico (resumo mensal)
+# ============================
+def historico_mensal(ate):
+    """
+    Totais por (tipo, categoria) e competência até o mês `ate`, lidos do resumo mensal (a soma dos
+    lançamentos já agregada). Devolve (séries [(tipo, categoria)], primeiro mês, matriz séries × meses).
+    """
+    tabela = ResumoMensal.__table__
+    df = pd.DataFrame(db.session.execute(
+        select(tabela.c.competencia, tabela.c.tipo, tabela.c.categoria, func.sum(tabela.c.total))
+        .where(tabela.c.competencia <= ate)
+        .group_by(tabela.c.competencia, tabela.c.tipo, tabela.c.categoria)
+    ).all(), columns=["competencia", "tipo", "categoria", "total"])
+    df = df[df["competencia"].str.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", na=False)]
+    if df.empty:
+        return [], indice_do_mes(ate), np.zeros((0, 0))
+
+    meses = df["competencia"].str[:4].astype(int).to_numpy() * 12 + df["competencia"].str[5:7].astype(int).to_numpy() - 1
+    codigos, series = pd.MultiIndex.from_frame(df[["tipo", "categoria"]]).factorize()
+    primeiro = int(meses.min())
+    historico = np.zeros((len(series), indice_do_mes(ate) - primeiro + 1))
+    np.add.at(historico, (codigos, meses - primeiro), df["total"].to_numpy(dtype=float))
+    return list(series), primeiro, historico
+
+
+def assinatura_historico(ate):
+    """
+    sha1 da quantidade e do total de cada (competência, tipo, categoria) até `ate` — exatamente o que o
+    modelo lê. Muda se o histórico fechado for alterado, inclusive quando um valor só troca de categoria
+    ou de mês (a soma geral ficaria igual).
+    """
+    tabela = ResumoMensal.__table__
+    resumo = hashlib.sha1()
+    for competencia, tipo, categoria, quantidade, total in db.session.execute(
+        select(tabela.c.competencia, tabela.c.tipo, tabela.c.categoria,
+               func.sum(tabela.c.quantidade), func.sum(tabela.c.total))
+        .where(tabela.c.competencia <= ate)
+        .group_by(tabela.c.competencia, tabela.c.tipo, tabela.c.categoria)
+        .order_by(tabela.c.competencia, tabela.c.tipo, tabela.c.categoria)
+    ):
+        resumo.update(f"{competencia}|{tipo}|{categoria}|{int(quantidade)}|{float(total):.2f}\n".encode("utf-8"))
+    return resumo.hexdigest()
+
+
+# ============================
+# 🔹 Job: atualização da tabela previsao_mensal
+# ============================
+def previsao_desatualizada(hoje=None, horizonte=HORIZONTE):
+    """Se um mês fechou, o histórico fechado mudou ou a tabela não cobre `horizonte` meses desde o último ajuste."""
+    base = ultimo_mes_fechado(hoje)
+    ultimo = mes_do_indice(indice_do_mes(base) + horizonte)
+    # Todas as linhas têm a mesma base e assinatura; a tabela vazia dá (None, None, None)
+    atual = db.session.query(
+        func.min(PrevisaoMensal.base), func.min(PrevisaoMensal.assinatura), func.max(PrevisaoMensal.mes)
+    ).one()
+    return tuple(atual) != (base, assinatura_historico(base), ultimo)
+
+
+def atualizar_previsoes(hoje=None, forcar=False, horizonte=HORIZONTE):
+    """
+    Ajusta o modelo sazonal de todas as categorias com o histórico até o último mês fechado e
+    regrava a tabela previsao_mensal com os `horizonte` meses seguintes — só quando um mês fechou,
+    o histórico mudou ou o horizonte é outro (ou `forcar`).
+    Devolve a quantidade de linhas gravadas, ou None se a tabela já estava em dia.
+    """
+    if not forcar and not previsao_desatualizada(hoje, horizonte):
+        return None
+    base = ultimo_mes_fechado(hoje)
+    assinatura = assinatura_historico(base)
+
+    series, primeiro, historico = historico_mensal(base)
+    previstos = ajustar_sazonal(historico, primeiro, horizonte) if series else np.zeros((0, horizonte))
+    meses = [mes_do_indice(indice_do_mes(base) + 1 + h) for h in range(horizonte)]
+    agora = datetime.now()
+    linhas = [
+        {"mes": mes, "tipo": tipo, "categoria": categoria, "valor": round(float(valor), 2),
+         "base": base, "assinatura": assinatura, "calculado_em": agora}
+        for (tipo, categoria), valores in zip(series, previstos)
+        for mes, valor in zip(meses, valores)
+    ]
+    if not linhas:  # sem histórico: uma linha vazia guarda a base (e o horizonte) para não reajustar a cada acesso
+        linhas = [{"mes": meses[-1], "tipo": "Despesa", "categoria": "", "valor": 0.0,
+                   "base": base, "assinatura": assinatura, "calculado_em": agora}]
+
+    tabela = PrevisaoMensal.__table__
+    db.session.execute(delete(tabela))
+    db.session.execute(insert(tabela), linhas)
+    db.session.commit()
+    return len(linhas)
+
+
+def garantir_previsoes(horizonte=HORIZONTE):
+    """Atualiza a tabela se estiver desatualizada (a tabela vem da migração 1defe7149ee7)."""
+    atualizar_previsoes(horizonte=horizonte)
+
+
+# ============================
+# 🔹 Consulta
+# ============================
+def fluxo_previsto(inicio, fim):
+    """
+    Previsões dos meses "AAAA-MM" em [inicio, fim), em ordem:
+    {"AAAA-MM": {"receitas", "despesas", "categorias": {(tipo, categoria): valor}}}.
+    """
+    resultado = {}
+    for mes, tipo, categoria, valor in db.session.query(
+        PrevisaoMensal.mes, PrevisaoMensal.tipo, PrevisaoMensal.categoria, PrevisaoMensal.valor
+    ).filter(
+        PrevisaoMensal.mes >= inicio, PrevisaoMensal.mes < fim, PrevisaoMensal.valor > 0
+    ).order_by(PrevisaoMensal.mes, PrevisaoMensal.valor.desc()):
+        previsto = resultado.setdefault(mes, {"receitas": 0.0, "despesas": 0.0, "categorias": {}})
+        previsto["receitas" if tipo == "Receita" else "despesas"] += valor
+        previsto["categorias"][(tipo, categoria)] = valor
+    for previsto in resultado.values():
+        previsto["receitas"], previsto["despesas"] = round(previsto["receitas"], 2), round(previsto["despesas"], 2)
+    return resultado
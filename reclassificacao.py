@@ -0,0 +1,141 @@
+import json
+
+import pandas as pd
+from sqlalchemy import insert, select, update
+
+from models import db, Categoria, Lancamento
+from classificador import CATEGORIA_PADRAO
+from cache_categorias import categorias_serie
+from importador import confirmar_gravacao, trava_gravacao
+from resumo_mensal import acumular, aplicar_deltas, novo_delta
+
+TAMANHO_UPDATE = 500  # ids por UPDATE ... WHERE id IN (...)
+TAMANHO_LOTE = 5000  # linhas alteradas por commit (o job grava o andamento a cada lote)
+EXEMPLOS = 3  # descrições de exemplo por categoria no resumo
+
+
+# ============================
+# 🔹 Plano: o que mudaria
+# ============================
+def planejar(gravar=True):
+    """
+    Classifica de uma vez todos os lançamentos "Outros" (cada estabelecimento distinto passa uma única vez
+    pelo classificador) e devolve (linhas analisadas, DataFrame id/categoria/tipo/descricao só dos
+    que mudariam de categoria). Só as correções do usuário são reaproveitadas: o "Outros" que o
+    classificador guardou no cache/tabela é justamente o que se quer refazer (e é renovado se `gravar`).
+    """
+    tabela = Lancamento.__table__
+    linhas = db.session.execute(
+        select(tabela.c.id, tabela.c.descricao, tabela.c.estabelecimento, tabela.c.tipo)
+        .where(tabela.c.categoria == CATEGORIA_PADRAO)
+    ).all()
+    df = pd.DataFrame(linhas, columns=["id", "descricao", "estabelecimento", "tipo"])
+    if df.empty:
+        return 0, df.assign(categoria=pd.Series(dtype=object))
+
+    df["categoria"] = categorias_serie(df["descricao"], df["estabelecimento"], gravar=gravar, renovar=True).to_numpy()
+    return len(df), df[df["categoria"] != CATEGORIA_PADRAO].reset_index(drop=True)
+
+
+def categorias_faltando(plano):
+    """Categorias de destino ainda sem cadastro, com o tipo predominante dos lançamentos de cada uma."""
+    existentes = {nome for (nome,) in db.session.query(Categoria.nome).all()}
+    tipos = plano.groupby("categoria")["tipo"].agg(lambda t: t.mode().iat[0] if t.notna().any() else "Despesa")
+    return {categoria: tipo for categoria, tipo in tipos.items() if categoria not in existentes}
+
+
+def resumir(plano, novas):
+    """Resumo serializável do plano: quantidade e exemplos por categoria de destino."""
+    grupos = plano.groupby("categoria")["descricao"]
+    return {
+        "categorias": [
+            {"categoria": categoria, "quantidade": int(quantidade),
+             "exemplos": grupos.get_group(categoria).drop_duplicates().head(EXEMPLOS).tolist()}
+            for categoria, quantidade in plano["categoria"].value_counts().items()
+        ],
+        "categoriasNovas": sorted(novas)
+    }
+
+
+# ============================
+# 🔹 Aplicação em lote
+# ============================
+def _atualizar(conn, categoria, ids, deltas):
+    """Um UPDATE ... IN por lote de ids; as linhas devolvidas alimentam o resumo mensal."""
+    tabela = Lancamento.__table__
+    # Só muda o que ainda é "Outros": um lançamento editado enquanto o job rodava fica como está
+    alteradas = conn.execute(
+        update(tabela)
+        .where(tabela.c.id.in_(ids), tabela.c.categoria == CATEGORIA_PADRAO)
+        .values(categoria=categoria)
+        .returning(tabela.c.competencia, tabela.c.tipo, tabela.c.forma_pagamento, tabela.c.valor)
+    ).mappings().all()
+    acumular(deltas, [dict(linha, categoria=CATEGORIA_PADRAO) for linha in alteradas], sinal=-1)
+    acumular(deltas, [dict(linha, categoria=categoria) for linha in alteradas])
+    return len(alteradas)
+
+
+def aplicar(plano, novas, reclassificacao=None):
+    """
+    Cadastra as categorias que faltam e grava o plano com UPDATEs agrupados por categoria,
+    ajustando o resumo mensal na mesma transação. Confirma a cada TAMANHO_LOTE linhas.
+    Devolve o total de lançamentos alterados.
+    """
+    # Lotes de commit: cada um com vários UPDATEs de até TAMANHO_UPDATE ids, todos de uma mesma categoria
+    lotes, atual = [], []
+    for categoria, serie in plano.groupby("categoria")["id"]:
+        ids = serie.tolist()
+        for inicio in range(0, len(ids), TAMANHO_UPDATE):
+            atual.append((categoria, ids[inicio:inicio + TAMANHO_UPDATE]))
+            if len(atual) * TAMANHO_UPDATE >= TAMANHO_LOTE:
+                lotes.append(atual)
+                atual = []
+    if atual:
+        lotes.append(atual)
+
+    alteradas = 0
+    for numero, lote in enumerate(lotes):
+        # A trava é solta entre os lotes: importações em andamento conseguem gravar no meio
+        with trava_gravacao:
+            if numero == 0 and novas:
+                db.session.execute(insert(Categoria.__table__), [
+                    {"nome": nome, "tipo": tipo, "meta_mensal": None} for nome, tipo in novas.items()
+                ])
+            conn = db.session.connection()
+            deltas = novo_delta()
+            for categoria, ids in lote:
+                alteradas += _atualizar(conn, categoria, ids, deltas)
+            aplicar_deltas(conn, deltas)
+            if reclassificacao is not None:
+                reclassificacao.linhas_alteradas = alteradas
+            db.session.commit()
+    return alteradas
+
+
+# ============================
+# 🔹 Job: simular ou reclassificar
+# ============================
+def reclassificar(reclassificacao):
+    """Executa (ou, em simulação, só planeja) a reclassificação registrada, gravando o andamento no registro."""
+    reclassificacao.status = "em_andamento"
+    confirmar_gravacao()
+
+    try:
+        analisadas, plano = planejar(gravar=not reclassificacao.simulacao)
+        novas = categorias_faltando(plano)
+        reclassificacao.linhas_analisadas = analisadas
+        reclassificacao.linhas_a_alterar = len(plano)
+        reclassificacao.resumo = json.dumps(resumir(plano, novas), ensure_ascii=False)
+        confirmar_gravacao()
+
+        if not reclassificacao.simulacao:
+            aplicar(plano, novas, reclassificacao)
+        reclassificacao.status = "concluida"
+        confirmar_gravacao()
+    except Exception as e:
+        db.session.rollback()
+        reclassificacao.status = "erro"
+        reclassificacao.mensagem = str(e)[:500]
+        confirmar_gravacao()
+        raise
+    return reclassificacao
@@ -0,0 +1,221 @@
+from collections import defaultdict
+
+from sqlalchemy import bindparam, event, func, inspect, select, delete, insert, update
+from sqlalchemy.orm import Session
+
+from models import db, Lancamento, ResumoMensal
+
+# Colunas que compõem a chave do resumo + o valor somado
+CHAVE = ("competencia", "tipo", "categoria", "forma_pagamento")
+CAMPOS = CHAVE + ("valor",)
+
+TOLERANCIA = 0.005
+
+
+# ============================
+# 🔹 Acúmulo de variações
+# ============================
+def _chave(valores):
+    return tuple(valores.get(c) or "" for c in CHAVE)
+
+
+def acumular(deltas, linhas, sinal=1):
+    """
+    Soma em `deltas` a contribuição de cada linha (dict com as colunas de CAMPOS).
+    Use sinal=-1 para linhas removidas. Serve tanto para o ORM quanto para inserts em lote.
+    """
+    for linha in linhas:
+        valor = linha.get("valor")
+        if valor is None:
+            continue
+        total, quantidade = deltas[_chave(linha)]
+        deltas[_chave(linha)] = (total + sinal * float(valor), quantidade + sinal)
+    return deltas
+
+
+def novo_delta():
+    return defaultdict(lambda: (0.0, 0))
+
+
+def deltas_de_dataframe(df, sinal=1):
+    """Mesmo que `acumular`, mas agregando um DataFrame inteiro com um único groupby."""
+    deltas = novo_delta()
+    if df.empty:
+        return deltas
+
+    chaves = df[list(CHAVE)].fillna("").astype(str)
+    grupos = df["valor"].astype(float).groupby([chaves[c] for c in CHAVE]).agg(["sum", "count"])
+    for chave, (total, quantidade) in zip(grupos.index, grupos.itertuples(index=False)):
+        deltas[chave] = (sinal * float(total), sinal * int(quantidade))
+    return deltas
+
+
+def aplicar_deltas(conn, deltas):
+    """
+    Aplica as variações na tabela resumo_mensal usando a conexão (e transação) informada.
+    Uma consulta descobre quais chaves já existem; depois um UPDATE e um INSERT em lote.
+    """
+    deltas = {k: v for k, v in deltas.items() if v[1] != 0 or abs(v[0]) >= TOLERANCIA}
+    if not deltas:
+        return
+
+    tabela = ResumoMensal.__table__
+    competencias = {chave[0] for chave in deltas}
+    existentes = {
+        tuple(linha) for linha in conn.execute(
+            select(*[tabela.c[c] for c in CHAVE]).where(tabela.c.competencia.in_(competencias))
+        )
+    }
+
+    atualizar, inserir = [], []
+    for chave, (total, quantidade) in deltas.items():
+        registro = dict(zip(("k_" + c for c in CHAVE), chave), d_total=total, d_quantidade=quantidade)
+        (atualizar if chave in existentes else inserir).append(registro)
+
+    if atualizar:
+        conn.execute(
+            update(tabela).where(
+                (tabela.c.competencia == bindparam("k_competencia")) &
+                (tabela.c.tipo == bindparam("k_tipo")) &
+                (tabela.c.categoria == bindparam("k_categoria")) &
+                (tabela.c.forma_pagamento == bindparam("k_forma_pagamento"))
+            ).values(
+                total=tabela.c.total + bindparam("d_total"),
+                quantidade=tabela.c.quantidade + bindparam("d_quantidade")
+            ),
+            atualizar
+        )
+    if inserir:
+        conn.execute(insert(tabela), [
+            dict(zip(CHAVE, (r["k_" + c] for c in CHAVE)), total=r["d_total"], quantidade=r["d_quantidade"])
+            for r in inserir
+        ])
+
+    conn.execute(delete(tabela).where(tabela.c.quantidade <= 0))
+
+
+# ============================
+# 🔹 Hooks do ORM
+# ============================
+def _valores_atuais(obj):
+    return {campo: getattr(obj, campo) for campo in CAMPOS}
+
+
+def _valores_anteriores(session, obj):
+    """Valores do lançamento antes das alterações pendentes (histórico ou, na falta dele, o banco)."""
+    estado = inspect(obj)
+    valores = {}
+    for campo in CAMPOS:
+        historico = estado.attrs[campo].history
+        if historico.deleted:
+            valores[campo] = historico.deleted[0]
+        elif historico.unchanged:
+            valores[campo] = historico.unchanged[0]
+        else:
+            break
+    else:
+        return valores
+
+    tabela = Lancamento.__table__
+    linha = session.connection().execute(
+        select(*[tabela.c[c] for c in CAMPOS]).where(tabela.c.id == estado.identity[0])
+    ).mappings().first()
+    return dict(linha) if linha else None
+
+
+def _alterou(obj):
+    estado = inspect(obj)
+    return any(estado.attrs[campo].history.has_changes() for campo in CAMPOS)
+
+
+@event.listens_for(Session, "before_flush")
+def _registrar_variacoes(session, flush_context, instances):
+    deltas = session.info.setdefault("resumo_deltas", novo_delta())
+
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, Lancamento):
+                acumular(deltas, [_valores_atuais(obj)])
+
+        for obj in session.dirty:
+            if isinstance(obj, Lancamento) and _alterou(obj):
+                anteriores = _valores_anteriores(session, obj)
+                if anteriores:
+                    acumular(deltas, [anteriores], sinal=-1)
+                acumular(deltas, [_valores_atuais(obj)])
+
+        for obj in session.deleted:
+            if isinstance(obj, Lancamento):
+                anteriores = _valores_anteriores(session, obj)
+                if anteriores:
+                    acumular(deltas, [anteriores], sinal=-1)
+
+
+@event.listens_for(Session, "after_flush")
+def _aplicar_variacoes(session, flush_context):
+    deltas = session.info.pop("resumo_deltas", None)
+    if deltas:
+        aplicar_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_variacoes(session):
+    session.info.pop("resumo_deltas", None)
+
+
+# ============================
+# 🔹 Reconstrução e verificação
+# ============================
+def _agregado_completo():
+    """Agregação direta sobre a tabela lancamento (varredura completa)."""
+    forma = func.coalesce(Lancamento.forma_pagamento, "")
+    return db.session.query(
+        Lancamento.competencia,
+        Lancamento.tipo,
+        Lancamento.categoria,
+        forma.label("forma_pagamento"),
+        func.sum(Lancamento.valor).label("total"),
+        func.count(Lancamento.id).label("quantidade")
+    ).group_by(Lancamento.competencia, Lancamento.tipo, Lancamento.categoria, forma)
+
+
+def reconstruir_resumo():
+    """Apaga e recalcula toda a tabela resumo_mensal a partir dos lançamentos."""
+    tabela = ResumoMensal.__table__
+    db.session.execute(delete(tabela))
+    linhas = [dict(r._mapping) for r in _agregado_completo().all()]
+    if linhas:
+        db.session.execute(insert(tabela), linhas)
+    db.session.commit()
+    return len(linhas)
+
+
+def verificar_resumo():
+    """Compara o resumo com a agregação completa e devolve a lista de divergências."""
+    esperado = {
+        (r.competencia, r.tipo, r.categoria, r.forma_pagamento): (float(r.total or 0.0), r.quantidade)
+        for r in _agregado_completo().all()
+    }
+    atual = {
+        (r.competencia, r.tipo, r.categoria, r.forma_pagamento): (r.total, r.quantidade)
+        for r in ResumoMensal.query.all()
+    }
+
+    divergencias = []
+    for chave in sorted(set(esperado) | set(atual)):
+        total_esp, qtd_esp = esperado.get(chave, (0.0, 0))
+        total_atu, qtd_atu = atual.get(chave, (0.0, 0))
+        if qtd_esp != qtd_atu or abs(total_esp - total_atu) > TOLERANCIA:
+            divergencias.append({
+                "chave": dict(zip(CHAVE, chave)),
+                "esperado": {"total": round(total_esp, 2), "quantidade": qtd_esp},
+                "resumo": {"total": round(total_atu, 2), "quantidade": qtd_atu}
+            })
+    return divergencias
+
+
+def garantir_resumo():
+    """Reconstrói o resumo quando ele está vazio mas há lançamentos (a tabela vem da migração a38243e75319)."""
+    vazio = db.session.query(ResumoMensal.competencia).first() is None
+    if vazio and db.session.query(Lancamento.id).first() is not None:
+        reconstruir_resumo()
@@ -0,0 +1,202 @@
+import numpy as np
+
+from cache_lru import CacheLRU
+
+TAXA_PADRAO = 0.3  # % ao mês
+MAXIMO_CENARIOS = 250_000
+MAXIMO_PRAZO = 600  # meses
+MAXIMO_VALORES = 500  # por eixo
+
+# Retorno mensal médio e desvio padrão de cada perfil (log-normal): renda fixa pós-fixada, carteira
+# mista e carteira com renda variável
+PERFIS_RETORNO = {
+    "conservador": (0.007, 0.002),
+    "moderado": (0.008, 0.015),
+    "arrojado": (0.010, 0.045),
+}
+CAMINHOS = 100_000
+MAXIMO_CAMINHOS = 200_000
+MAXIMO_PRAZO_ESTOCASTICO = 360  # meses
+AMOSTRA_PERCENTIS = 20_000  # caminhos usados nas faixas mês a mês
+# Trabalho por simulação em caminhos × meses (100 mil caminhos por 5 anos e faixas com 20 mil caminhos por
+# 5 anos, ~100ms): prazos mais longos usam menos caminhos, para o tempo não crescer com o prazo
+ORCAMENTO_CAMINHOS_MESES = CAMINHOS * 60
+ORCAMENTO_FAIXAS_MESES = AMOSTRA_PERCENTIS * 60
+PERCENTIS = (5, 25, 50, 75, 95)
+SEMENTE_PADRAO = 42
+
+
+# ============================
+# 🔹 Fórmulas fechadas (anuidade antecipada)
+# ============================
+# Cada mês recebe o aporte e depois rende a taxa: saldo_n = saldo·(1+r)^n + aporte·Σ(1+r)^i, i = 1..n.
+# A soma é a anuidade (1+r)·((1+r)^n − 1)/r (ou n, com r = 0); tudo funciona com arrays que se
+# combinam por broadcasting, um cenário por posição.
+
+def fator_acumulacao(prazos, taxas):
+    """Σ(1+r)^i para i = 1..n: quanto vale no fim um aporte de 1 por mês durante `prazos` meses."""
+    prazos, taxas = np.asarray(prazos, dtype=float), np.asarray(taxas, dtype=float)
+    crescimento = (1 + taxas) ** prazos
+    com_juros = np.divide((1 + taxas) * (crescimento - 1), taxas, out=np.zeros(np.broadcast(prazos, taxas).shape),
+                          where=taxas != 0)
+    return np.where(taxas != 0, com_juros, prazos)
+
+
+def saldo_final(saldo, aportes, prazos, taxas):
+    """Saldo ao fim de `prazos` meses com aportes mensais e taxa mensal (fração, 0.003 = 0,3%)."""
+    taxas = np.asarray(taxas, dtype=float)
+    return saldo * (1 + taxas) ** np.asarray(prazos, dtype=float) + np.asarray(aportes, dtype=float) * fator_acumulacao(prazos, taxas)
+
+
+def aporte_necessario(meta, saldo, prazos, taxas):
+    """Aporte mensal que leva `saldo` à `meta` no prazo (zero se o saldo sozinho já chega lá)."""
+    taxas = np.asarray(taxas, dtype=float)
+    falta = meta - saldo * (1 + taxas) ** np.asarray(prazos, dtype=float)
+    fator = fator_acumulacao(prazos, taxas)
+    return np.maximum(np.divide(falta, fator, out=np.zeros(np.broadcast(falta, fator).shape), where=fator > 0), 0.0)
+
+
+def projecao(saldo, aporte, prazo, taxa):
+    """Saldo ao fim de cada mês, 1..prazo."""
+    return saldo_final(saldo, aporte, np.arange(1, prazo + 1), taxa)
+
+
+# ============================
+# 🔹 Grade de cenários
+# ============================
+def valores_do_eixo(especificacao, nome, minimo=0.0, maximo=None):
+    """
+    Valores de um eixo da grade: lista de números ou {"inicio", "fim", "passo"} (fim incluído).
+    ValueError com mensagem para o usuário se a especificação for inválida.
+    """
+    try:
+        if isinstance(especificacao, dict):
+            inicio, fim = float(especificacao["inicio"]), float(especificacao["fim"])
+            passo = float(especificacao.get("passo") or 0) or (fim - inicio) or 1.0
+        else:
+            valores = np.asarray([float(v) for v in especificacao], dtype=float)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Intervalo inválido para {nome}.") from None
+
+    if isinstance(especificacao, dict):
+        if passo <= 0 or fim < inicio:
+            raise ValueError(f"Intervalo inválido para {nome}.")
+        quantidade = int(np.floor((fim - inicio) / passo + 1e-9)) + 1
+        if quantidade > MAXIMO_VALORES:
+            raise ValueError(f"O eixo {nome} teria {quantidade} valores (máximo {MAXIMO_VALORES}).")
+        valores = inicio + passo * np.arange(quantidade)
+
+    if not len(valores) or len(valores) > MAXIMO_VALORES or not np.isfinite(valores).all():
+        raise ValueError(f"Informe de 1 a {MAXIMO_VALORES} valores para {nome}.")
+    if valores.min() < minimo or (maximo is not None and valores.max() > maximo):
+        raise ValueError(f"Valores de {nome} fora do intervalo permitido.")
+    return np.unique(np.round(valores, 6))
+
+
+_cache = CacheLRU(tamanho=128)
+
+
+def grade_cenarios(saldo, meta, aportes, prazos, taxas):
+    """
+    Avalia todos os cenários aportes × prazos × taxas (% ao mês) de uma vez. Devolve os eixos, o saldo
+    final [taxa][prazo][aporte], se cada cenário atinge a meta e a superfície de aporte necessário
+    [taxa][prazo] para a meta. Grades repetidas saem do cache.
+    """
+    aportes = valores_do_eixo(aportes, "aportes")
+    prazos = valores_do_eixo(prazos, "prazos", minimo=1, maximo=MAXIMO_PRAZO)
+    taxas = valores_do_eixo(taxas, "taxas", minimo=-99)
+    if (prazos % 1).any():
+        raise ValueError("Os prazos devem ser meses inteiros.")
+    if len(aportes) * len(prazos) * len(taxas) > MAXIMO_CENARIOS:
+        raise ValueError(f"Grade grande demais: {len(aportes) * len(prazos) * len(taxas)} cenários "
+                         f"(máximo {MAXIMO_CENARIOS}).")
+
+    chave = (float(saldo), float(meta), aportes.tobytes(), prazos.tobytes(), taxas.tobytes())
+    resultado = _cache.get(chave)
+    if resultado is not None:
+        return resultado
+
+    r = (taxas / 100)[:, None, None]
+    n = prazos[None, :, None]
+    finais = saldo_final(saldo, aportes[None, None, :], n, r)
+    necessario = aporte_necessario(meta, saldo, n[..., 0], r[..., 0])
+    resultado = {
+        "saldo_atual": float(saldo),
+        "meta": float(meta),
+        "aportes": aportes.tolist(),
+        "prazos": prazos.astype(int).tolist(),
+        "taxas": taxas.tolist(),
+        "cenarios": int(finais.size),
+        "saldo_final": np.round(finais, 2).tolist(),
+        "atinge_meta": (finais >= meta).tolist(),
+        "aporte_necessario": np.round(necessario, 2).tolist(),
+    }
+    _cache.put(chave, resultado)
+    return resultado
+
+
+# ============================
+# 🔹 Simulação de Monte Carlo (retornos aleatórios por perfil)
+# ============================
+_cache_monte_carlo = CacheLRU(tamanho=64)
+
+
+def monte_carlo(saldo, meta, aporte, prazo, perfil="conservador", caminhos=CAMINHOS, semente=SEMENTE_PADRAO):
+    """
+    Simula `caminhos` trajetórias do saldo com retornos mensais log-normais do perfil, todas de uma vez
+    (um vetor por mês, em float32). Metade dos sorteios é espelhada (variáveis antitéticas), o que
+    corta pela metade a geração de números e reduz a variância. Mesma semente, mesmo resultado.
+    Em prazos longos os caminhos são limitados a ORCAMENTO_CAMINHOS_MESES / prazo (16 mil em 30 anos).
+
+    Devolve a probabilidade de o saldo final atingir a meta (sobre todos os caminhos), o saldo final
+    nos PERCENTIS e as faixas de percentis mês a mês (estimadas numa amostra fixa de até
+    AMOSTRA_PERCENTIS caminhos, também limitada pelo prazo). Simulações repetidas saem do cache.
+    ValueError com mensagem para o usuário se os parâmetros forem inválidos.
+    """
+    if perfil not in PERFIS_RETORNO:
+        raise ValueError(f"Perfil inválido. Use {', '.join(PERFIS_RETORNO)}.")
+    if not 1 <= prazo <= MAXIMO_PRAZO_ESTOCASTICO:
+        raise ValueError(f"O prazo da simulação deve ficar entre 1 e {MAXIMO_PRAZO_ESTOCASTICO} meses.")
+    if not 2 <= caminhos <= MAXIMO_CAMINHOS:
+        raise ValueError(f"O número de caminhos deve ficar entre 2 e {MAXIMO_CAMINHOS}.")
+
+    chave = (float(saldo), float(meta), float(aporte), int(prazo), perfil, int(caminhos), int(semente))
+    resultado = _cache_monte_carlo.get(chave)
+    if resultado is not None:
+        return resultado
+
+    media, desvio = PERFIS_RETORNO[perfil]
+    sigma = np.log1p((desvio / (1 + media)) ** 2) ** 0.5
+    mu = np.log1p(media) - sigma ** 2 / 2  # E[fator] = 1 + media
+    metade = min(caminhos, max(2, ORCAMENTO_CAMINHOS_MESES // prazo)) // 2
+    por_lado = min(metade, AMOSTRA_PERCENTIS // 2, max(1, ORCAMENTO_FAIXAS_MESES // prazo // 2))
+    amostra = np.concatenate([np.arange(por_lado), metade + np.arange(por_lado)])
+
+    gerador = np.random.default_rng(semente)
+    atual = np.full(2 * metade, saldo, dtype=np.float32)
+    fatores = np.empty(2 * metade, dtype=np.float32)
+    faixas = np.empty((prazo, len(PERCENTIS)), dtype=np.float32)
+    posicoes = [round(q / 100 * (len(amostra) - 1)) for q in PERCENTIS]
+    for mes in range(prazo):
+        sorteio = gerador.standard_normal(metade, dtype=np.float32)
+        np.multiply(sorteio, np.float32(sigma), out=fatores[:metade])
+        np.negative(fatores[:metade], out=fatores[metade:])
+        fatores += np.float32(mu)
+        np.exp(fatores, out=fatores)
+        atual += np.float32(aporte)
+        atual *= fatores
+        faixas[mes] = np.partition(atual[amostra], posicoes)[posicoes]
+
+    finais = np.percentile(atual, PERCENTIS)
+    resultado = {
+        "perfil": perfil,
+        "caminhos": int(2 * metade),
+        "semente": int(semente),
+        "retorno_medio_mensal": media * 100,
+        "volatilidade_mensal": desvio * 100,
+        "probabilidade_meta": round(float((atual >= meta).mean()), 4),
+        "saldo_final": {f"p{q}": round(float(v), 2) for q, v in zip(PERCENTIS, finais)},
+        "faixas": {f"p{q}": np.round(faixas[:, i].astype(float), 2).tolist() for i, q in enumerate(PERCENTIS)},
+    }
+    _cache_monte_carlo.put(chave, resultado)
+    return resultado
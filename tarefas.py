@@ -0,0 +1,272 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from uuid import uuid4
+
+from werkzeug.utils import secure_filename
+
+from models import db, Importacao, Reclassificacao
+from importador import confirmar_gravacao, iniciar_importacao, processar_importacao, processar_lote
+from reclassificacao import reclassificar
+from previsao_sazonal import atualizar_previsoes
+from modelo_categorias import ATRASO_GRAVACAO, gravar_modelo
+
+# 🔹 Pool de workers em processo para as importações (criado sob demanda)
+_executor = None
+# 🔹 Pool de processos que prepara os arquivos de um lote em paralelo (um por núcleo, por padrão);
+# criado na inicialização, pela thread principal (ver `iniciar_processos`)
+_processos = None
+_ativas = set()
+_trava = threading.Lock()
+
+
+def _pool(app):
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("IMPORTACAO_WORKERS", 2),
+                thread_name_prefix="importacao"
+            )
+        return _executor
+
+
+def iniciar_processos(app):
+    """
+    Cria o pool de processos das importações em lote. Chamar uma vez, da thread principal, ao iniciar:
+    os workers usam "spawn" (o único modo no Windows e no executável), que não deve partir de uma thread de fundo.
+    """
+    global _processos
+    with _trava:
+        if _processos is None:
+            _processos = ProcessPoolExecutor(
+                max_workers=app.config.get("IMPORTACAO_PROCESSOS"),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _processos
+
+
+def _pool_processos():
+    if _processos is None:
+        raise RuntimeError("Pool de processos não iniciado; chame iniciar_processos ao subir o app.")
+    return _processos
+
+
+def _submeter(app, importacao_id):
+    with _trava:
+        if importacao_id in _ativas:
+            return False
+        _ativas.add(importacao_id)
+    _pool(app).submit(_executar, app, importacao_id)
+    return True
+
+
+def _executar(app, importacao_id):
+    try:
+        with app.app_context():
+            importacao = db.session.get(Importacao, importacao_id)
+            caminho = importacao.caminho_arquivo
+            with open(caminho, "rb") as arquivo:
+                processar_importacao(importacao, arquivo)
+            os.remove(caminho)
+    except Exception as e:
+        # O status "erro" e a mensagem já ficam gravados na importação
+        print(f"❌ Erro na importação #{importacao_id}: {e}")
+    finally:
+        with _trava:
+            _ativas.discard(importacao_id)
+
+
+def _submeter_lote(app, importacao_ids, processos):
+    with _trava:
+        livres = [i for i in importacao_ids if i not in _ativas]
+        _ativas.update(livres)
+    if livres:
+        _pool(app).submit(_executar_lote, app, livres, processos)
+    return livres
+
+
+def _executar_lote(app, importacao_ids, processos):
+    try:
+        with app.app_context():
+            importacoes = [db.session.get(Importacao, i) for i in importacao_ids]
+            processar_lote(importacoes, processos)
+            for importacao in importacoes:
+                os.remove(importacao.caminho_arquivo)
+    except Exception as e:
+        print(f"❌ Erro na importação em lote {importacao_ids}: {e}")
+    finally:
+        with _trava:
+            _ativas.difference_update(importacao_ids)
+
+
+def _registrar(arquivo, tipo, formato, pasta):
+    """Salva o upload em `pasta` e registra (ou reaproveita) a importação correspondente."""
+    caminho = os.path.join(pasta, f"{uuid4().hex}_{secure_filename(arquivo.filename)}")
+    arquivo.save(caminho)
+
+    with open(caminho, "rb") as salvo:
+        importacao = iniciar_importacao(salvo, arquivo.filename, formato, tipo)
+
+    if importacao.id in _ativas:
+        # O mesmo arquivo já está sendo processado: apenas devolve o andamento
+        os.remove(caminho)
+        return importacao
+
+    anterior = importacao.caminho_arquivo
+    if anterior and anterior != caminho and os.path.exists(anterior):
+        os.remove(anterior)
+    importacao.caminho_arquivo = caminho
+    confirmar_gravacao()
+    return importacao
+
+
+def enfileirar_importacao(app, arquivo, tipo, formato, pasta):
+    """
+    Salva o upload em `pasta`, registra (ou reaproveita) a importação e a coloca na fila.
+    Devolve a Importacao imediatamente, sem esperar o processamento.
+    """
+    importacao = _registrar(arquivo, tipo, formato, pasta)
+    _submeter(app, importacao.id)
+    return importacao
+
+
+def enfileirar_lote(app, arquivos, pasta):
+    """
+    Como `enfileirar_importacao`, para vários arquivos de uma vez (lista de (arquivo, tipo, formato)).
+    Cada arquivo ganha sua Importacao, mas todos são preparados em paralelo e gravados juntos.
+    Devolve as importações na ordem dos arquivos.
+    """
+    processos = _pool_processos()
+    importacoes = [_registrar(arquivo, tipo, formato, pasta) for arquivo, tipo, formato in arquivos]
+    _submeter_lote(app, list(dict.fromkeys(i.id for i in importacoes)), processos)
+    return importacoes
+
+
+def _executar_reclassificacao(app, reclassificacao_id):
+    try:
+        with app.app_context():
+            reclassificar(db.session.get(Reclassificacao, reclassificacao_id))
+    except Exception as e:
+        # O status "erro" e a mensagem já ficam gravados na reclassificação
+        print(f"❌ Erro na reclassificação #{reclassificacao_id}: {e}")
+
+
+def enfileirar_reclassificacao(app, simulacao=False):
+    """
+    Registra e coloca na fila a reclassificação dos lançamentos "Outros" (ou só a simulação dela).
+    Se já houver uma reclassificação de verdade na fila ou em andamento, devolve essa em vez de criar outra.
+    """
+    if not simulacao:
+        ativa = Reclassificacao.query.filter(
+            Reclassificacao.simulacao.is_(False),
+            Reclassificacao.status.in_(["na_fila", "em_andamento"])
+        ).first()
+        if ativa is not None:
+            return ativa
+
+    reclassificacao = Reclassificacao(simulacao=simulacao)
+    db.session.add(reclassificacao)
+    confirmar_gravacao()
+    _pool(app).submit(_executar_reclassificacao, app, reclassificacao.id)
+    return reclassificacao
+
+
+def _executar_previsao(app):
+    try:
+        with app.app_context():
+            atualizar_previsoes()
+    except Exception as e:
+        print(f"❌ Erro ao atualizar as previsões: {e}")
+    finally:
+        with _trava:
+            _ativas.discard("previsao")
+
+
+def enfileirar_previsao(app):
+    """Coloca na fila o reajuste da previsão sazonal (uma vez só, se já houver um na fila ou rodando)."""
+    with _trava:
+        if "previsao" in _ativas:
+            return False
+        _ativas.add("previsao")
+    _pool(app).submit(_executar_previsao, app)
+    return True
+
+
+def _executar_gravacao_modelo():
+    with _trava:
+        _ativas.discard("modelo")  # correções que chegarem durante a gravação agendam a próxima
+    try:
+        gravar_modelo()
+    except Exception as e:
+        print(f"❌ Erro ao gravar o modelo de categorias: {e}")
+
+
+def agendar_gravacao_modelo(atraso=ATRASO_GRAVACAO):
+    """
+    Regrava o arquivo do modelo de categorias daqui a `atraso` segundos, fora da requisição.
+    Várias correções nesse intervalo viram uma gravação só (se já há uma agendada, não agenda outra).
+    """
+    with _trava:
+        if "modelo" in _ativas:
+            return False
+        _ativas.add("modelo")
+    temporizador = threading.Timer(atraso, _executar_gravacao_modelo)
+    temporizador.daemon = True
+    temporizador.start()
+    return True
+
+
+def retomar_pendentes(app):
+    """Recoloca na fila as importações interrompidas (ex.: reinício do servidor) e encerra as reclassificações."""
+    with app.app_context():
+        pendentes = Importacao.query.filter(Importacao.status.in_(["na_fila", "em_andamento"])).all()
+        retomadas = 0
+        for importacao in pendentes:
+            if importacao.caminho_arquivo and os.path.exists(importacao.caminho_arquivo):
+                retomadas += _submeter(app, importacao.id)
+            else:
+                importacao.status = "erro"
+                importacao.mensagem = "Arquivo da importação não encontrado para retomar."
+        # Reclassificação interrompida: as linhas já confirmadas ficam; basta rodar de novo para o resto
+        for reclassificacao in Reclassificacao.query.filter(Reclassificacao.status.in_(["na_fila", "em_andamento"])).all():
+            reclassificacao.status = "erro"
+            reclassificacao.mensagem = "Interrompida antes de terminar; rode a reclassificação novamente."
+        db.session.commit()
+        return retomadas
+
+
+def progresso(importacao):
+    """Resumo serializável do andamento de uma importação."""
+    return {
+        "id": importacao.id,
+        "arquivo": importacao.nome_arquivo,
+        "tipo": importacao.tipo,
+        "status": importacao.status,
+        "linhasProcessadas": importacao.linhas_processadas,
+        "linhasInseridas": importacao.linhas_inseridas,
+        "linhasRejeitadas": importacao.linhas_rejeitadas,
+        "linhasDuplicadas": importacao.linhas_duplicadas,
+        "linhasPorSegundo": round(importacao.linhas_por_segundo, 1) if importacao.linhas_por_segundo else None,
+        "mensagem": importacao.mensagem,
+        "criadoEm": importacao.criado_em.isoformat() if importacao.criado_em else None,
+        "atualizadoEm": importacao.atualizado_em.isoformat() if importacao.atualizado_em else None
+    }
+
+
+def progresso_reclassificacao(reclassificacao):
+    """Resumo serializável do andamento (e, na simulação, do resultado) de uma reclassificação."""
+    return {
+        "id": reclassificacao.id,
+        "simulacao": reclassificacao.simulacao,
+        "status": reclassificacao.status,
+        "linhasAnalisadas": reclassificacao.linhas_analisadas,
+        "linhasAAlterar": reclassificacao.linhas_a_alterar,
+        "linhasAlteradas": reclassificacao.linhas_alteradas,
+        "resumo": json.loads(reclassificacao.resumo) if reclassificacao.resumo else None,
+        "mensagem": reclassificacao.mensagem,
+        "criadoEm": reclassificacao.criado_em.isoformat() if reclassificacao.criado_em else None,
+        "atualizadoEm": reclassificacao.atualizado_em.isoformat() if reclassificacao.atualizado_em else None
+    }
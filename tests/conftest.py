@@ -0,0 +1,72 @@
+"""Fixtures dos testes: app Flask isolado com SQLite temporário e o esquema criado pelas migrações."""
+import contextlib
+import io
+import os
+import shutil
+import sys
+
+import pytest
+from flask import Flask
+from flask_migrate import Migrate, upgrade
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from models import db  # noqa: E402
+
+
+def criar_app(caminho):
+    """App Flask apontando para o SQLite em `caminho`, com as migrações do projeto registradas."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{caminho}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["MODELO_CATEGORIAS"] = os.path.join(os.path.dirname(caminho), "modelo_categorias.npz")
+    db.init_app(app)
+    Migrate(app, db, directory=os.path.join(RAIZ, "migrations"), render_as_batch=True)
+    return app
+
+
+@pytest.fixture(scope="session")
+def banco_migrado(tmp_path_factory):
+    """Banco com todas as migrações aplicadas, criado uma vez e copiado para cada teste."""
+    caminho = tmp_path_factory.mktemp("migrado") / "financeiro.db"
+    with criar_app(caminho).app_context():
+        upgrade()
+    return caminho
+
+
+@pytest.fixture
+def app(banco_migrado, tmp_path):
+    """App com contexto ativo sobre uma cópia do banco migrado."""
+    caminho = tmp_path / "financeiro.db"
+    shutil.copy(banco_migrado, caminho)
+    app = criar_app(caminho)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def app_financeiro(tmp_path_factory):
+    """O app completo (financeiro.py), importado uma única vez apontando para um SQLite temporário."""
+    pasta = tmp_path_factory.mktemp("financeiro")
+    os.environ["DATABASE_URL"] = f"sqlite:///{pasta / 'financeiro.db'}"
+    os.environ["MODELO_CATEGORIAS"] = str(pasta / "modelo_categorias.npz")
+    os.environ.setdefault("SECRET_KEY", "testes")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import financeiro
+    return financeiro.app
+
+
+@pytest.fixture
+def cliente(app_financeiro, banco_migrado):
+    """Cliente de teste do app completo, com o banco dele trocado por uma cópia do banco migrado."""
+    with app_financeiro.app_context():
+        db.engine.dispose()
+        shutil.copy(banco_migrado, db.engine.url.database)
+        modelo = app_financeiro.config["MODELO_CATEGORIAS"]
+        if os.path.exists(modelo):
+            os.remove(modelo)
+        yield app_financeiro.test_client()
+        db.session.remove()
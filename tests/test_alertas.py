@@ -0,0 +1,49 @@
+"""Alertas de meta: o limite do cartão vem da tabela meta_forma_pagamento, não de uma constante."""
+from datetime import date
+
+import pytest
+
+from analisador_financeiro import alertas_do_mes, limites_cadastrados, mensagens
+from models import db, Categoria, Lancamento, MetaFormaPagamento
+from resumo_mensal import reconstruir_resumo
+
+MES = "2025-05"
+
+
+@pytest.fixture
+def gastos(app):
+    db.session.add_all([
+        Lancamento(competencia=MES, data=date(2025, 5, 10), descricao="Compra", valor=valor, tipo="Despesa",
+                   categoria="Mercado", forma_pagamento=forma)
+        for valor, forma in ((1200.0, "Cartão"), (700.0, "Cartão"), (300.0, "Pix"))
+    ])
+    db.session.add(Categoria(nome="Mercado", tipo="Despesa", meta_mensal=5000.0))
+    db.session.commit()
+    reconstruir_resumo()
+
+
+def test_migracao_semeia_a_meta_do_cartao(app):
+    assert limites_cadastrados()["forma_pagamento"] == {"Cartão": 1500.0}
+
+
+def test_estouro_usa_a_meta_cadastrada(gastos):
+    assert mensagens(alertas_do_mes(MES))[0] == "⚠️ Você ultrapassou sua meta no cartão em R$ 400.00."
+
+    db.session.get(MetaFormaPagamento, "Cartão").meta_mensal = 2500.0
+    db.session.commit()
+    assert mensagens(alertas_do_mes(MES)) == ["✅ Gastos no cartão estão dentro da meta."]
+
+
+def test_sem_meta_do_cartao_nao_ha_estouro(gastos):
+    db.session.delete(db.session.get(MetaFormaPagamento, "Cartão"))
+    db.session.commit()
+    assert alertas_do_mes(MES).empty
+    assert limites_cadastrados() == {"categoria": {"Mercado": 5000.0}, "forma_pagamento": {}}
+
+
+def test_rota_define_e_remove_a_meta(cliente):
+    cliente.post("/categorias/metas-pagamento", data={"forma_pagamento": "Pix", "meta_mensal": "800"})
+    assert limites_cadastrados()["forma_pagamento"] == {"Cartão": 1500.0, "Pix": 800.0}
+    cliente.post("/categorias/metas-pagamento", data={"forma_pagamento": "Cartão", "meta_mensal": ""})
+    assert limites_cadastrados()["forma_pagamento"] == {"Pix": 800.0}
+    assert "Pix" in cliente.get("/categorias").get_data(as_text=True)
@@ -0,0 +1,40 @@
+"""LRU de categorias: um rollback descarta só as chaves que a transação desfeita pôs no cache."""
+import pytest
+
+import cache_categorias
+from cache_categorias import categoria_de, chave_estabelecimento, registrar_correcao
+from models import db, EstabelecimentoCategoria
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    cache_categorias._cache.clear()
+    yield
+    cache_categorias._cache.clear()
+
+
+def test_rollback_descarta_so_as_chaves_da_transacao(app):
+    confirmada = chave_estabelecimento("Padaria do Bairro")
+    assert categoria_de("Padaria do Bairro") is not None
+    db.session.commit()
+    lida = chave_estabelecimento("Supermercado Extra")
+    categoria_de("Supermercado Extra", gravar=False)
+
+    categoria_de("Posto Shell 4821")
+    registrar_correcao("Uber *Trip", "", "Lazer")
+    db.session.rollback()
+
+    assert cache_categorias._cache.get(confirmada) is not None
+    assert cache_categorias._cache.get(lida) is not None
+    assert cache_categorias._cache.get(chave_estabelecimento("Posto Shell 4821")) is None
+    assert cache_categorias._cache.get(chave_estabelecimento("Uber *Trip")) is None
+    assert db.session.get(EstabelecimentoCategoria, chave_estabelecimento("Uber *Trip")) is None
+
+
+def test_commit_mantem_as_chaves_e_esquece_a_anotacao(app):
+    registrar_correcao("Uber *Trip", "", "Lazer")
+    db.session.commit()
+    db.session.rollback()
+
+    assert cache_categorias._cache.get(chave_estabelecimento("Uber *Trip")) == "Lazer"
+    assert "chaves_cache" not in db.session.info
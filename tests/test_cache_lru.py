@@ -0,0 +1,20 @@
+"""CacheLRU: descarta a chave usada há mais tempo ao passar do tamanho."""
+from cache_lru import CacheLRU
+
+
+def test_descarta_a_menos_usada():
+    cache = CacheLRU(tamanho=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser a mais recente
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c"), len(cache)) == (1, None, 3, 2)
+
+
+def test_pop_e_clear():
+    cache = CacheLRU(tamanho=4)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.pop("a") == 1 and cache.pop("a") is None
+    cache.clear()
+    assert len(cache) == 0
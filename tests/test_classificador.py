@@ -0,0 +1,26 @@
+"""Classificador compilado: a Series dá o mesmo resultado que a classificação linha a linha."""
+import pandas as pd
+import pytest
+
+from classificador import Classificador, PALAVRAS_POR_VARREDURA, REGRAS_MODELO, Regra
+from modelo_ia import classificar_texto
+
+DESCRICOES = pd.Series(["Supermercado Extra 1234", "UBER *TRIP", "Farmácia São João", "Cinema", "Pix recebido",
+                        None, "academia e mercado", "Remédio"])
+ESTABELECIMENTOS = pd.Series(["", "99 Táxi", "", "Netflix", "Supermercado", "", None, "Loja X"])
+
+
+def test_classificar_texto_com_series():
+    obtido = classificar_texto(DESCRICOES, ESTABELECIMENTOS)
+    assert obtido.tolist() == [classificar_texto(d or "", e or "") for d, e in zip(DESCRICOES, ESTABELECIMENTOS)]
+    assert obtido.iloc[:4].tolist() == ["Alimentação", "Transporte", "Saúde", "Lazer"]
+
+
+@pytest.mark.parametrize("extras", [0, PALAVRAS_POR_VARREDURA])
+def test_varredura_literal_e_em_arvore_concordam(extras):
+    regras = [Regra(f"loja {i:03d}", "Compras", "qualquer") for i in range(extras)] + REGRAS_MODELO
+    classificador = Classificador(regras)
+    descricoes = pd.concat([DESCRICOES, pd.Series(["LOJA 007 mercado", "supermercado"])], ignore_index=True)
+    estabelecimentos = ESTABELECIMENTOS.reindex(descricoes.index).fillna("")
+    obtido = classificador.classificar_serie(descricoes, estabelecimentos)
+    assert obtido.tolist() == [classificador.classificar(d or "", e) for d, e in zip(descricoes, estabelecimentos)]
@@ -0,0 +1,125 @@
+"""Reparcelamento: diferença mínima entre o cronograma atual e o desejado, e sua aplicação no banco."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from compras_lote import importar_compras
+from cronograma import diferenca_cronograma, reparcelar
+from faturas import totais_da_fatura, verificar_faturas
+from models import db, CompraCartao, Fatura, somar_meses
+
+PRIMEIRA = date(2025, 1, 10)
+
+
+def cronograma(*valores, pagas=(), primeira=PRIMEIRA, primeiro_id=1):
+    """Parcelas existentes (id, numero, centavos, vencimento, paga) com vencimentos mensais."""
+    return [(primeiro_id + i, i + 1, v, somar_meses(primeira, i), i + 1 in pagas) for i, v in enumerate(valores)]
+
+
+def test_sem_mudanca_nao_gera_comandos():
+    assert diferenca_cronograma(cronograma(3333, 3333, 3334), 10000, 3, PRIMEIRA) == ([], [], [])
+
+
+def test_parcelas_pagas_sao_mantidas():
+    existentes = cronograma(3333, 3333, 3334, pagas={1})
+    inserir, atualizar, remover = diferenca_cronograma(existentes, 10000, 4, PRIMEIRA)
+    # As 6667 restantes divididas entre as parcelas 2, 3 e 4; a paga (id 1) não aparece
+    assert atualizar == [(2, 2222, date(2025, 2, 10)), (3, 2222, date(2025, 3, 10))]
+    assert inserir == [(4, 2223, date(2025, 4, 10))]
+    assert remover == []
+
+
+def test_reduzir_parcelas_remove_as_em_aberto():
+    inserir, atualizar, remover = diferenca_cronograma(cronograma(2500, 2500, 2500, 2500, pagas={1}), 10000, 2,
+                                                       PRIMEIRA)
+    assert (inserir, atualizar, remover) == ([], [(2, 7500, date(2025, 2, 10))], [3, 4])
+
+
+def test_parcela_paga_alem_da_nova_quantidade():
+    with pytest.raises(ValueError, match="parcela 3 já está paga"):
+        diferenca_cronograma(cronograma(2500, 2500, 2500, 2500, pagas={3}), 10000, 2, PRIMEIRA)
+
+
+def test_total_menor_que_o_ja_pago():
+    with pytest.raises(ValueError, match="menor que a soma das parcelas já pagas"):
+        diferenca_cronograma(cronograma(5000, 5000, pagas={1, 2}), 9000, 3, PRIMEIRA)
+
+
+def test_todas_pagas_e_total_diferente():
+    with pytest.raises(ValueError, match="Todas as parcelas estão pagas"):
+        diferenca_cronograma(cronograma(5000, 5000, pagas={1, 2}), 12000, 2, PRIMEIRA)
+
+
+def test_quantidade_invalida():
+    with pytest.raises(ValueError, match="pelo menos 1"):
+        diferenca_cronograma([], 10000, 0, PRIMEIRA)
+
+
+def test_numeros_repetidos_mantem_a_paga():
+    existentes = cronograma(5000, 5000) + [(9, 1, 5000, PRIMEIRA, True)]
+    inserir, atualizar, remover = diferenca_cronograma(existentes, 10000, 2, PRIMEIRA)
+    assert remover == [1]  # a cópia em aberto do número 1 sai; a paga (id 9) fica
+    assert (inserir, atualizar) == ([], [])
+
+
+def test_numeros_repetidos_ambos_pagos():
+    existentes = cronograma(5000, 5000, pagas={1}) + [(9, 1, 5000, PRIMEIRA, True)]
+    with pytest.raises(ValueError, match="parcela 1 já está paga"):
+        diferenca_cronograma(existentes, 10000, 2, PRIMEIRA)
+
+
+def test_vencimento_limitado_ao_fim_do_mes():
+    primeira = date(2024, 1, 31)
+    inserir, _, _ = diferenca_cronograma([], 40000, 4, primeira)
+    assert [vencimento for _, _, vencimento in inserir] == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)
+    ]
+
+
+# ============================
+# 🔹 reparcelar no banco
+# ============================
+def test_reparcelar_ida_e_volta(app):
+    importar_compras(pd.DataFrame({
+        "descricao": ["Geladeira"], "cartao": ["Nubank"], "valor_total": [300], "total_parcelas": [3],
+        "data_primeira_fatura": [PRIMEIRA.isoformat()],
+    }))
+    compra = CompraCartao.query.one()
+    compra.parcelas[0].paga = True
+    db.session.commit()
+
+    compra.total_parcelas = 5
+    assert reparcelar(compra) == {"inseridas": 2, "atualizadas": 2, "removidas": 0}
+    db.session.commit()
+    assert [(p.numero, float(p.valor), p.paga) for p in compra.parcelas] == [
+        (1, 100.0, True), (2, 50.0, False), (3, 50.0, False), (4, 50.0, False), (5, 50.0, False)
+    ]
+    assert verificar_faturas() == []
+    assert [(f.mes, float(f.total), float(f.total_pago), f.abertas) for f in Fatura.query.order_by(Fatura.mes)] == [
+        ("2025-01", 100.0, 100.0, 0), ("2025-02", 50.0, 0.0, 1), ("2025-03", 50.0, 0.0, 1),
+        ("2025-04", 50.0, 0.0, 1), ("2025-05", 50.0, 0.0, 1),
+    ]
+
+    compra.total_parcelas = 3
+    assert reparcelar(compra) == {"inseridas": 0, "atualizadas": 2, "removidas": 2}
+    db.session.commit()
+    assert [(p.numero, float(p.valor), p.paga) for p in compra.parcelas] == [
+        (1, 100.0, True), (2, 100.0, False), (3, 100.0, False)
+    ]
+    assert verificar_faturas() == []
+    assert totais_da_fatura("2025-02", "Nubank")["total"] == 100.0
+    assert db.session.query(Fatura.mes).filter(Fatura.mes > "2025-03", Fatura.parcelas > 0).count() == 0
+
+
+def test_edicao_completa_invalida_registra_no_log(cliente, caplog):
+    importar_compras(pd.DataFrame({
+        "descricao": ["Geladeira"], "cartao": ["Nubank"], "valor_total": [300], "total_parcelas": [3],
+        "data_primeira_fatura": [PRIMEIRA.isoformat()],
+    }))
+    compra = CompraCartao.query.one()
+    resposta = cliente.post(f"/cartao/compra/editar-completo/{compra.id}", data={
+        "descricao": "Geladeira", "cartao": "Nubank", "total_parcelas": "três"})
+    assert resposta.status_code == 200
+    assert f"Erro ao atualizar a compra {compra.id}" in caplog.text
+    assert [float(p.valor) for p in CompraCartao.query.one().parcelas] == [100.0, 100.0, 100.0]
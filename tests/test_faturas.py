@@ -0,0 +1,74 @@
+"""Tabela fatura mantida pelos hooks da sessão: depois de cada rota de cartão, bate com as parcelas."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from compras_lote import importar_compras
+from faturas import totais_da_fatura, verificar_faturas
+from models import db, CompraCartao, Fatura, ParcelaCartao
+
+HOJE = date(2025, 3, 10)
+MES = HOJE.strftime("%Y-%m")
+
+
+@pytest.fixture
+def compras(cliente):
+    """Três compras de 3 parcelas (duas no Nubank, uma no Itaú) a partir de março/2025."""
+    importar_compras(pd.DataFrame({
+        "descricao": ["Geladeira", "Notebook", "Bicicleta"],
+        "cartao": ["Nubank", "Nubank", "Itaú"],
+        "valor_total": [300, 600, 900],
+        "total_parcelas": 3,
+        "data_primeira_fatura": HOJE.isoformat(),
+    }))
+    assert verificar_faturas() == []
+    return cliente
+
+
+def primeira_parcela(descricao):
+    return ParcelaCartao.query.join(CompraCartao).filter(
+        CompraCartao.descricao == descricao, ParcelaCartao.numero == 1
+    ).one()
+
+
+def test_toggle_parcela(compras):
+    parcela = primeira_parcela("Geladeira")
+    assert compras.post(f"/cartao/parcela/{parcela.id}/toggle").status_code == 302
+    assert verificar_faturas() == []
+    assert totais_da_fatura(MES, "Nubank")["total_pago"] == 100
+
+
+def test_editar_parcela(compras):
+    parcela = primeira_parcela("Notebook")
+    resposta = compras.post(f"/cartao/parcela/editar/{parcela.id}", data={"valor": "250", "vencimento": "2025-04-10"})
+    assert resposta.status_code == 302
+    assert verificar_faturas() == []
+    assert totais_da_fatura(MES, "Nubank")["total"] == 100
+    assert totais_da_fatura("2025-04", "Nubank")["total"] == 550
+
+
+def test_trocar_o_cartao_da_compra(compras):
+    compra = CompraCartao.query.filter_by(descricao="Bicicleta").one()
+    resposta = compras.post(f"/cartao/editar/{compra.id}", data={
+        "descricao": "Bicicleta", "cartao": "Nubank", "valor_total": "900", "data_primeira_fatura": HOJE.isoformat()})
+    assert resposta.status_code == 302
+    assert verificar_faturas() == []
+    assert totais_da_fatura(MES, "Itaú") is None or totais_da_fatura(MES, "Itaú")["parcelas"] == 0
+    assert totais_da_fatura(MES, "Nubank")["total"] == 600
+
+
+def test_excluir_compra_cartao(compras):
+    compra = CompraCartao.query.filter_by(descricao="Bicicleta").one()
+    assert compras.post(f"/cartao/excluir/{compra.id}").status_code == 302
+    assert verificar_faturas() == []
+    assert ParcelaCartao.query.count() == 6
+    assert db.session.query(Fatura.cartao).filter(Fatura.cartao == "Itaú", Fatura.parcelas > 0).count() == 0
+
+
+def test_marcar_fatura(compras):
+    resposta = compras.post("/cartao/fatura/pagamento", json={"mes": MES, "cartao": "Nubank", "paga": True})
+    assert resposta.status_code == 200
+    assert verificar_faturas() == []
+    assert totais_da_fatura(MES, "Nubank")["abertas"] == 0
+    assert totais_da_fatura(MES, "Itaú")["abertas"] == 1
@@ -0,0 +1,37 @@
+"""Conversão de valores e competências dos arquivos importados."""
+import math
+
+import pandas as pd
+import pytest
+
+from formatos_br import competencia_valida, converter_valores
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("1.234,56", 1234.56),
+    ("R$ 1.234,56", 1234.56),
+    ("1.234,56-", -1234.56),
+    ("123,45 D", -123.45),
+    ("12,5", 12.5),
+    ("1.234", 1234.0),
+    ("1234.56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("-1,234,567.89", -1234567.89),
+    ("(1,234.56)", -1234.56),
+])
+def test_converter_valores(texto, esperado):
+    valores, invalidos = converter_valores(pd.Series([texto], dtype=object))
+    assert valores.iloc[0] == pytest.approx(esperado) and not invalidos.iloc[0]
+
+
+@pytest.mark.parametrize("texto", ["1,23.45", "1,234,5.6", "1.234,56.7", "abc"])
+def test_converter_valores_marca_ilegiveis(texto):
+    valores, invalidos = converter_valores(pd.Series([texto], dtype=object))
+    assert math.isnan(valores.iloc[0]) and invalidos.iloc[0]
+
+
+def test_competencia_valida():
+    assert competencia_valida("2025-09")
+    assert not competencia_valida("2025-13")
+    assert not competencia_valida("2025-09\n")
+    assert not competencia_valida(None)
@@ -0,0 +1,109 @@
+"""Retomada da importação em blocos: as linhas já confirmadas só são convertidas e numeradas, sem classificar."""
+import io
+
+import pandas as pd
+import pytest
+
+import importador
+from models import db, Importacao, Lancamento
+
+
+def extrato_csv(linhas=50):
+    # Compras idênticas atravessando a fronteira dos blocos (linhas 15 a 24): a numeração de
+    # ocorrências do hash precisa continuar de onde parou para nenhuma virar "duplicada"
+    descricoes = ["Padaria do Bairro" if 15 <= i < 25 else f"Compra {i}" for i in range(linhas)]
+    df = pd.DataFrame({
+        "Data": ["2025-09-05"] * linhas,
+        "Lançamentos": descricoes,
+        "Valor": [-12.5 if 15 <= i < 25 else -(i + 1.0) for i in range(linhas)],
+    })
+    return io.BytesIO(df.to_csv(index=False).encode("utf-8"))
+
+
+def test_retomada_nao_reclassifica_linhas_ja_gravadas(app, monkeypatch):
+    arquivo = extrato_csv()
+    importacao = importador.iniciar_importacao(arquivo, "extrato.csv", "csv", "extrato")
+
+    original = importador.inserir_em_lote
+    chamadas = []
+
+    def falha_no_segundo_bloco(*args, **kwargs):
+        chamadas.append(1)
+        if len(chamadas) == 2:
+            raise RuntimeError("queda no meio da importação")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(importador, "inserir_em_lote", falha_no_segundo_bloco)
+    with pytest.raises(RuntimeError):
+        importador.processar_importacao(importacao, arquivo, tamanho_bloco=20)
+    assert importacao.status == "erro" and importacao.linhas_processadas == 20
+    assert Lancamento.query.count() == 20
+
+    monkeypatch.setattr(importador, "inserir_em_lote", original)
+    classificadas = []
+    classificar = importador.classificar_colunas
+    monkeypatch.setattr(importador, "classificar_colunas",
+                        lambda descricoes, estabelecimentos: classificadas.append(len(descricoes))
+                        or classificar(descricoes, estabelecimentos))
+
+    arquivo = extrato_csv()
+    retomada = importador.iniciar_importacao(arquivo, "extrato.csv", "csv", "extrato")
+    assert retomada.id == importacao.id
+    inseridas, _, ja_importadas = importador.processar_importacao(retomada, arquivo, tamanho_bloco=20)
+
+    assert (inseridas, ja_importadas) == (30, 20)
+    assert sum(classificadas) == 30
+    assert Lancamento.query.count() == 50
+    final = db.session.get(Importacao, importacao.id)
+    assert (final.status, final.linhas_processadas, final.linhas_duplicadas) == ("concluida", 50, 0)
+
+
+@pytest.mark.parametrize("separador", [";", ","])
+def test_valores_br_em_varios_blocos(app, separador):
+    # Em texto: o pandas não pode inferir "1.500" como 1,5 nem tipos diferentes em cada bloco
+    valores = ["1.500", "-2.000", "-1.234,56", "12,5", "3.000.000,00", "-0,99"] * 4
+    linhas = [separador.join(["Data", "Lançamentos", "Valor"])] + [
+        separador.join([f"2025-09-{i % 28 + 1:02d}", f"Lançamento {i}", f'"{v}"' if separador in v else v])
+        for i, v in enumerate(valores)
+    ]
+    arquivo = io.BytesIO("\n".join(linhas).encode("utf-8"))
+
+    inseridas, _, _ = importador.importar_em_blocos(arquivo, "extrato.csv", "csv", "extrato", tamanho_bloco=2)
+
+    assert inseridas == len(valores)
+    gravados = [(l.tipo, l.valor) for l in Lancamento.query.order_by(Lancamento.id)]
+    esperado = [1500.0, -2000.0, -1234.56, 12.5, 3000000.0, -0.99] * 4
+    assert gravados == [("Despesa" if v < 0 else "Receita", abs(v)) for v in esperado]
+
+
+def extrato_com_repetidas():
+    # "Padaria" 3x no mesmo dia (linhas 0, 3 e 6): com blocos de 2, cada cópia cai num bloco diferente
+    descricoes = ["Padaria", "Mercado", "Farmácia", "Padaria", "Cinema", "Mercado", "Padaria", "Posto"]
+    df = pd.DataFrame({"Data": ["2025-09-05"] * 8, "Lançamentos": descricoes, "Valor": ["-12,50"] * 8})
+    return io.BytesIO(df.to_csv(index=False, sep=";").encode("utf-8"))
+
+
+@pytest.mark.parametrize("tamanho_bloco", [2, 3, 100])
+def test_repetidas_no_arquivo_e_entre_blocos(app, tamanho_bloco):
+    inseridas, _, _ = importador.importar_em_blocos(extrato_com_repetidas(), "a.csv", "csv", "extrato",
+                                                    tamanho_bloco=tamanho_bloco)
+    # Linhas idênticas dentro do arquivo são compras distintas, em qualquer divisão em blocos
+    assert inseridas == 8
+    assert Lancamento.query.filter_by(descricao="Padaria").count() == 3
+    hashes = {l.hash_conteudo for l in Lancamento.query}
+    assert len(hashes) == 8
+
+    # O mesmo conteúdo reenviado (outro arquivo, blocos de outro tamanho) é todo duplicado
+    conteudo = extrato_com_repetidas().getvalue() + b"\n"
+    importacao = importador.iniciar_importacao(io.BytesIO(conteudo), "b.csv", "csv", "extrato")
+    inseridas, _, _ = importador.processar_importacao(importacao, io.BytesIO(conteudo), tamanho_bloco=5)
+    assert inseridas == 0 and importacao.linhas_duplicadas == 8
+    assert {l.hash_conteudo for l in Lancamento.query} == hashes
+
+
+def test_ocorrencias_guardam_digests(app):
+    linhas, _ = importador.preparar_extrato(pd.read_csv(extrato_com_repetidas(), sep=";", dtype=str))
+    ocorrencias = {}
+    importador.calcular_hashes(linhas, ocorrencias)
+    assert sorted(ocorrencias.values()) == [1, 1, 1, 2, 3]
+    assert all(isinstance(d, bytes) and len(d) == 16 for d in ocorrencias)
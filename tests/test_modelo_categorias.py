@@ -0,0 +1,63 @@
+"""Modelo de categorias: a correção confirmada não regrava o arquivo no commit; a gravação é adiada e atômica."""
+import os
+import time
+
+import pytest
+
+import modelo_categorias
+import tarefas
+from modelo_categorias import ModeloBayes, aprender, gravar_modelo
+from models import db
+
+TEXTOS = ["Supermercado Extra", "Padaria do Bairro", "Posto Shell", "Uber Trip"]
+CATEGORIAS = ["Alimentação", "Alimentação", "Transporte", "Transporte"]
+
+
+@pytest.fixture
+def modelo_em_uso(app, tmp_path, monkeypatch):
+    (tmp_path / "modelo").mkdir()
+    caminho = str(tmp_path / "modelo" / "modelo.npz")
+    modelo = ModeloBayes.treinar(TEXTOS, CATEGORIAS)
+    modelo.salvar(caminho)
+    monkeypatch.setattr(modelo_categorias, "_atual", modelo)
+    monkeypatch.setattr(modelo_categorias, "_caminho_atual", caminho)
+    agendadas = []
+    monkeypatch.setattr(tarefas, "agendar_gravacao_modelo", lambda: agendadas.append(True))
+    return modelo, caminho, agendadas
+
+
+def test_commit_so_marca_o_modelo_e_agenda_a_gravacao(modelo_em_uso):
+    modelo, caminho, agendadas = modelo_em_uso
+    versao = os.stat(caminho).st_mtime_ns
+
+    aprender("Cinema Kinoplex", "", "Lazer")
+    db.session.commit()
+
+    assert modelo.sujo and "Lazer" in modelo.categorias
+    assert agendadas == [True]
+    assert os.stat(caminho).st_mtime_ns == versao
+    assert ModeloBayes.carregar(caminho).categorias == ["Alimentação", "Transporte"]
+
+    gravar_modelo()
+    assert not modelo.sujo
+    assert ModeloBayes.carregar(caminho).categorias == ["Alimentação", "Transporte", "Lazer"]
+    assert os.listdir(os.path.dirname(caminho)) == ["modelo.npz"]  # nenhum temporário sobrando
+
+
+def test_rollback_nao_ensina_nem_agenda(modelo_em_uso):
+    modelo, _, agendadas = modelo_em_uso
+    aprender("Cinema Kinoplex", "", "Lazer")
+    db.session.rollback()
+    assert not modelo.sujo and agendadas == []
+
+
+def test_agendamento_junta_as_correcoes(monkeypatch):
+    gravacoes = []
+    monkeypatch.setattr(tarefas, "gravar_modelo", lambda: gravacoes.append(True))
+    assert tarefas.agendar_gravacao_modelo(atraso=0.05)
+    assert not tarefas.agendar_gravacao_modelo(atraso=0.05)  # já há uma agendada
+    limite = time.monotonic() + 2
+    while not gravacoes and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert gravacoes == [True]
+    assert "modelo" not in tarefas._ativas
@@ -0,0 +1,47 @@
+"""Planos de consulta (EXPLAIN QUERY PLAN): as consultas quentes de parcelas e faturas usam índice."""
+from datetime import date
+
+import numpy as np
+from sqlalchemy import text
+
+from faturas import reconstruir_faturas
+from models import db
+from parcelas import consultas_sem_indice
+
+HOJE = date(2025, 3, 15)
+
+
+def popular(n=2000, semente=3):
+    """n compras de 1 a 12 parcelas espalhadas por 8 anos, com estatísticas (ANALYZE) para o planejador."""
+    rng = np.random.default_rng(semente)
+    conn = db.session.connection()
+    conn.exec_driver_sql(
+        "INSERT INTO compras_cartao (id, descricao, cartao, valor_total, total_parcelas, data_primeira_fatura, criado_em) "
+        "VALUES (?, 'Compra', ?, 0, 0, '2020-01-10', '2020-01-01')",
+        [(i + 1, c) for i, c in enumerate(rng.choice(["Nubank", "Itaú", "Inter", "C6"], n).tolist())]
+    )
+    parcelas = []
+    for compra, (inicio, quantidade) in enumerate(zip(rng.integers(0, 96, n).tolist(), rng.integers(1, 13, n).tolist())):
+        for numero in range(quantidade):
+            mes = inicio + numero
+            parcelas.append((compra + 1, numero + 1, 50.0, f"{2020 + mes // 12}-{mes % 12 + 1:02d}-10", int(mes < 60)))
+    conn.exec_driver_sql(
+        "INSERT INTO parcelas_cartao (compra_id, numero, valor, vencimento, paga) VALUES (?, ?, ?, ?, ?)", parcelas
+    )
+    db.session.commit()
+    reconstruir_faturas()
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+
+
+def test_consultas_quentes_usam_indice(app):
+    popular()
+    assert consultas_sem_indice(HOJE) == {}
+
+
+def test_detecta_consulta_sem_indice(app):
+    popular()
+    db.session.execute(text("DROP INDEX ix_parcelas_cartao_vencimento_paga"))
+    db.session.commit()
+    sem_indice = consultas_sem_indice(HOJE)
+    assert any(passo.startswith("SCAN parcelas_cartao") for passo in sem_indice.get("parcelas futuras em aberto", []))
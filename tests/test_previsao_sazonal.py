@@ -0,0 +1,49 @@
+"""Previsão sazonal: cobre o horizonte do planejamento e percebe qualquer mudança nos totais por categoria."""
+from datetime import date
+
+from models import db, Lancamento, PrevisaoMensal
+from parcelas import HORIZONTE_MAXIMO
+from previsao_sazonal import assinatura_historico, atualizar_previsoes, previsao_desatualizada
+
+HOJE = date(2025, 7, 10)
+
+
+def lancamento(competencia, categoria, valor):
+    return Lancamento(competencia=competencia, data=date.fromisoformat(f"{competencia}-10"), descricao="Compra",
+                      valor=valor, tipo="Despesa", categoria=categoria)
+
+
+def test_previsao_cobre_o_planejamento_de_24_meses(app):
+    db.session.add_all([lancamento("2025-05", "Mercado", 300.0), lancamento("2025-06", "Mercado", 300.0)])
+    db.session.commit()
+
+    atualizar_previsoes(HOJE)
+    meses = sorted(m for (m,) in db.session.query(PrevisaoMensal.mes).distinct())
+    assert len(meses) == HORIZONTE_MAXIMO and (meses[0], meses[-1]) == ("2025-07", "2027-06")
+    assert not previsao_desatualizada(HOJE)
+
+    # Uma tabela gravada com horizonte menor fica desatualizada para o planejamento
+    atualizar_previsoes(HOJE, forcar=True, horizonte=12)
+    assert previsao_desatualizada(HOJE)
+    assert atualizar_previsoes(HOJE) == HORIZONTE_MAXIMO
+
+
+def test_assinatura_muda_quando_o_valor_troca_de_categoria(app):
+    mercado, farmacia = lancamento("2025-05", "Mercado", 300.0), lancamento("2025-05", "Farmácia", 100.0)
+    db.session.add_all([mercado, farmacia])
+    db.session.commit()
+    atualizar_previsoes(HOJE)
+    antes = assinatura_historico("2025-06")
+    assert len(antes) == 40
+
+    # Mesma quantidade e mesma soma geral, outra distribuição por categoria
+    mercado.valor, farmacia.valor = 100.0, 300.0
+    db.session.commit()
+    assert assinatura_historico("2025-06") != antes
+    assert previsao_desatualizada(HOJE)
+
+
+def test_tabela_vazia_sem_historico(app):
+    assert previsao_desatualizada(HOJE)
+    assert atualizar_previsoes(HOJE) == 1  # só a linha que guarda a base e o horizonte
+    assert not previsao_desatualizada(HOJE) and atualizar_previsoes(HOJE) is None
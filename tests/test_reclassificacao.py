@@ -0,0 +1,65 @@
+"""Reclassificação dos "Outros": o "Outros" guardado pelo classificador é refeito; a correção do usuário fica."""
+from datetime import date
+
+import pytest
+
+import cache_categorias
+from cache_categorias import chave_estabelecimento
+from classificador import CATEGORIA_PADRAO
+from models import db, EstabelecimentoCategoria, Lancamento, Reclassificacao
+from reclassificacao import planejar, reclassificar
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    cache_categorias._cache.clear()
+    yield
+    cache_categorias._cache.clear()
+
+
+def lancamento(descricao):
+    return Lancamento(competencia="2025-05", data=date(2025, 5, 10), descricao=descricao, valor=50.0,
+                      tipo="Despesa", categoria=CATEGORIA_PADRAO)
+
+
+@pytest.fixture
+def outros_guardados(app):
+    """Dois "Outros": um guardado pelo classificador (cache e tabela), outro confirmado pelo usuário."""
+    classificado, confirmado = chave_estabelecimento("Supermercado Extra"), chave_estabelecimento("Mercado Livre")
+    db.session.add_all([
+        lancamento("Supermercado Extra"), lancamento("Mercado Livre"),
+        EstabelecimentoCategoria(chave=classificado, categoria=CATEGORIA_PADRAO, origem="classificador"),
+        EstabelecimentoCategoria(chave=confirmado, categoria=CATEGORIA_PADRAO, origem="usuario"),
+    ])
+    db.session.commit()
+    cache_categorias._cache.put(classificado, CATEGORIA_PADRAO)
+    cache_categorias._cache.put(confirmado, CATEGORIA_PADRAO)
+    return classificado, confirmado
+
+
+def test_simulacao_ignora_o_outros_do_classificador(outros_guardados):
+    classificado, _ = outros_guardados
+    analisadas, plano = planejar(gravar=False)
+    assert analisadas == 2
+    assert plano[["descricao", "categoria"]].values.tolist() == [["Supermercado Extra", "Alimentação"]]
+    # Simulação: nada muda no cache nem na tabela
+    assert cache_categorias._cache.get(classificado) == CATEGORIA_PADRAO
+    assert db.session.get(EstabelecimentoCategoria, classificado).categoria == CATEGORIA_PADRAO
+
+
+def test_reclassificar_renova_o_cache_e_a_tabela(outros_guardados):
+    classificado, confirmado = outros_guardados
+    reclassificacao = Reclassificacao()
+    db.session.add(reclassificacao)
+    db.session.commit()
+
+    reclassificar(reclassificacao)
+
+    assert reclassificacao.status == "concluida" and reclassificacao.linhas_alteradas == 1
+    assert dict(db.session.query(Lancamento.descricao, Lancamento.categoria).all()) == {
+        "Supermercado Extra": "Alimentação", "Mercado Livre": CATEGORIA_PADRAO
+    }
+    renovada = db.session.get(EstabelecimentoCategoria, classificado)
+    assert (renovada.categoria, renovada.origem) == ("Alimentação", "classificador")
+    assert db.session.get(EstabelecimentoCategoria, confirmado).categoria == CATEGORIA_PADRAO
+    assert cache_categorias._cache.get(classificado) == "Alimentação"
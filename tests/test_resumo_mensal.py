@@ -0,0 +1,99 @@
+"""Resumo mensal mantido pelos hooks da sessão: sempre igual a um GROUP BY novo sobre os lançamentos."""
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from models import db, Lancamento, ResumoMensal
+from resumo_mensal import verificar_resumo  # importar o módulo registra os hooks da sessão
+
+
+def agrupado():
+    """Totais por (competência, tipo, categoria, forma de pagamento) calculados agora, direto de lancamento."""
+    tabela = Lancamento.__table__
+    return {
+        (competencia, tipo, categoria, forma): (round(total, 2), quantidade)
+        for competencia, tipo, categoria, forma, total, quantidade in db.session.execute(
+            select(tabela.c.competencia, tabela.c.tipo, tabela.c.categoria, tabela.c.forma_pagamento,
+                   func.sum(tabela.c.valor), func.count())
+            .group_by(tabela.c.competencia, tabela.c.tipo, tabela.c.categoria, tabela.c.forma_pagamento)
+        )
+    }
+
+
+def resumo():
+    return {
+        (r.competencia, r.tipo, r.categoria, r.forma_pagamento): (round(r.total, 2), r.quantidade)
+        for r in ResumoMensal.query.all()
+    }
+
+
+def lancamento(valor, categoria="Mercado", competencia="2025-05", forma="Pix"):
+    return Lancamento(competencia=competencia, data=date.fromisoformat(f"{competencia}-10"), descricao="Compra",
+                      valor=valor, tipo="Despesa", categoria=categoria, forma_pagamento=forma)
+
+
+@pytest.fixture
+def lancamentos(app):
+    itens = [lancamento(100.0), lancamento(50.0), lancamento(30.0, "Farmácia"), lancamento(80.0, competencia="2025-06")]
+    db.session.add_all(itens)
+    db.session.commit()
+    return itens
+
+
+def test_insercao(lancamentos):
+    assert resumo() == agrupado() == {
+        ("2025-05", "Despesa", "Mercado", "Pix"): (150.0, 2),
+        ("2025-05", "Despesa", "Farmácia", "Pix"): (30.0, 1),
+        ("2025-06", "Despesa", "Mercado", "Pix"): (80.0, 1),
+    }
+
+
+def test_alteracao_de_valor_e_de_mes(lancamentos):
+    lancamentos[0].valor = 120.0
+    lancamentos[3].competencia = "2025-05"
+    db.session.commit()
+    assert resumo() == agrupado()
+    assert resumo()[("2025-05", "Despesa", "Mercado", "Pix")] == (250.0, 3)
+    assert ("2025-06", "Despesa", "Mercado", "Pix") not in resumo()
+
+
+def test_troca_de_categoria(lancamentos):
+    lancamentos[1].categoria = "Farmácia"
+    lancamentos[2].categoria = "Saúde"
+    db.session.commit()
+    assert resumo() == agrupado()
+    assert resumo()[("2025-05", "Despesa", "Farmácia", "Pix")] == (50.0, 1)
+    assert resumo()[("2025-05", "Despesa", "Saúde", "Pix")] == (30.0, 1)
+
+
+def test_exclusao(lancamentos):
+    db.session.delete(lancamentos[2])
+    db.session.delete(lancamentos[0])
+    db.session.commit()
+    assert resumo() == agrupado() == {
+        ("2025-05", "Despesa", "Mercado", "Pix"): (50.0, 1),
+        ("2025-06", "Despesa", "Mercado", "Pix"): (80.0, 1),
+    }
+
+
+def test_rollback_depois_do_flush(lancamentos):
+    antes = resumo()
+    db.session.add(lancamento(999.0, "Viagem"))
+    lancamentos[0].categoria = "Lazer"
+    db.session.delete(lancamentos[3])
+    db.session.flush()
+    assert resumo() == agrupado()  # dentro da transação também bate
+    db.session.rollback()
+    assert resumo() == agrupado() == antes
+    assert verificar_resumo() == []
+
+
+def test_rollback_sem_flush_nao_vaza_para_o_proximo_commit(lancamentos):
+    with db.session.no_autoflush:
+        lancamentos[0].valor = 1.0
+        db.session.rollback()
+    lancamentos[1].valor = 60.0
+    db.session.commit()
+    assert resumo() == agrupado()
+    assert resumo()[("2025-05", "Despesa", "Mercado", "Pix")] == (160.0, 2)
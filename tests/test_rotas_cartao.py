@@ -0,0 +1,103 @@
+"""
+Quantidade de comandos SQL por rota de cartão: tem de ser a mesma com a base pequena (compras de 3
+parcelas) e com uma 4x maior de compras de 12 parcelas; se crescer, há N+1. Nenhuma consulta de
+compra pode arrastar as parcelas por JOIN (uma linha por parcela para cada compra).
+"""
+import shutil
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import event
+
+from compras_lote import importar_compras
+from models import db
+from previsao_sazonal import atualizar_previsoes
+
+HOJE = date.today()
+MES = HOJE.strftime("%Y-%m")
+
+
+def popular(n, parcelas):
+    """n compras de `parcelas` parcelas, começando no mês atual, via cadastro em lote."""
+    importar_compras(pd.DataFrame({
+        "descricao": [f"Compra {i}" for i in range(n)],
+        "cartao": ["Nubank", "Itaú"] * (n // 2) + ["Nubank"] * (n % 2),
+        "valor_total": [100 + i for i in range(n)],
+        "total_parcelas": parcelas,
+        "data_primeira_fatura": HOJE.isoformat(),
+    }))
+    atualizar_previsoes()  # previsão em dia: /planejamento não dispara o reajuste em segundo plano
+
+
+def rotas(cliente, parcelas):
+    """(rótulo, requisição) das rotas de cartão; a compra 1 tem `parcelas` parcelas."""
+    nova = {"descricao": "Nova", "cartao": "Nubank", "valor_total": "120", "total_parcelas": str(parcelas),
+            "data_primeira_fatura": HOJE.isoformat()}
+    return [
+        ("GET  /cartao/nova", lambda: cliente.get("/cartao/nova")),
+        ("POST /cartao/nova", lambda: cliente.post("/cartao/nova", data=nova)),
+        ("POST /cartao/nova (duplicada)", lambda: cliente.post("/cartao/nova", data=nova)),
+        ("GET  /cartao/parcelas", lambda: cliente.get("/cartao/parcelas")),
+        ("GET  /cartao/parcelas?mes", lambda: cliente.get(f"/cartao/parcelas?mes={MES}")),
+        ("GET  /cartao/parcela/editar/1", lambda: cliente.get("/cartao/parcela/editar/1")),
+        ("POST /cartao/parcela/editar/1", lambda: cliente.post("/cartao/parcela/editar/1", data={
+            "valor": "10", "vencimento": HOJE.isoformat()})),
+        ("GET  /cartao/editar/1", lambda: cliente.get("/cartao/editar/1")),
+        ("POST /cartao/editar/1", lambda: cliente.post("/cartao/editar/1", data={
+            "descricao": "Compra 0", "cartao": "Nubank", "valor_total": "100",
+            "data_primeira_fatura": HOJE.isoformat()})),
+        ("GET  /cartao/compra/editar-completo/1", lambda: cliente.get("/cartao/compra/editar-completo/1")),
+        ("POST /cartao/compra/editar-completo/1", lambda: cliente.post("/cartao/compra/editar-completo/1", data={
+            "descricao": "Compra 0", "cartao": "Nubank", "total_parcelas": str(parcelas), "valor_2": "9"})),
+        ("POST /cartao/compra/editar-completo/1 (reparcela)", lambda: cliente.post(
+            "/cartao/compra/editar-completo/1", data={
+                "descricao": "Compra 0", "cartao": "Nubank", "total_parcelas": str(parcelas + 1)})),
+        ("POST /cartao/parcela/1/toggle", lambda: cliente.post("/cartao/parcela/1/toggle")),
+        ("POST /cartao/fatura/pagamento", lambda: cliente.post("/cartao/fatura/pagamento", json={
+            "mes": MES, "cartao": "Nubank", "paga": True})),
+        ("GET  /planejamento", lambda: cliente.get("/planejamento")),
+        ("GET  /api/parcelas-por-mes", lambda: cliente.get("/api/parcelas-por-mes")),
+        ("GET  /api/planejamento-por-cartao", lambda: cliente.get("/api/planejamento-por-cartao")),
+        ("POST /cartao/excluir/1", lambda: cliente.post("/cartao/excluir/1")),
+    ]
+
+
+def contar(cliente, banco_migrado, n, parcelas):
+    """{rota: [comandos SQL]} com o banco recriado com n compras de `parcelas` parcelas."""
+    db.session.remove()
+    db.engine.dispose()
+    shutil.copy(banco_migrado, db.engine.url.database)
+    popular(n, parcelas)
+    db.session.remove()
+
+    comandos = []
+
+    def registrar(conn, cursor, sql, parametros, contexto, executemany):
+        comandos.append(" ".join(sql.split()))
+
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    resultado = {}
+    try:
+        for rotulo, requisicao in rotas(cliente, parcelas):
+            comandos.clear()
+            resposta = requisicao()
+            assert resposta.status_code < 400, f"{rotulo}: HTTP {resposta.status_code}"
+            resultado[rotulo] = list(comandos)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", registrar)
+    return resultado
+
+
+def test_comandos_por_rota_nao_crescem_com_a_base(cliente, banco_migrado):
+    pequena = contar(cliente, banco_migrado, 10, 3)
+    grande = contar(cliente, banco_migrado, 40, 12)
+    assert {rotulo: len(comandos) for rotulo, comandos in grande.items()} == \
+        {rotulo: len(comandos) for rotulo, comandos in pequena.items()}
+
+
+def test_compras_nao_carregam_parcelas_por_join(cliente, banco_migrado):
+    com_join = [
+        (rotulo, sql) for rotulo, comandos in contar(cliente, banco_migrado, 10, 12).items()
+        for sql in comandos if sql.startswith("SELECT") and "JOIN parcelas_cartao" in sql
+    ]
+    assert com_join == []
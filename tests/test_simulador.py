@@ -0,0 +1,35 @@
+"""Monte Carlo do simulador: o trabalho fica dentro do orçamento de caminhos × meses em qualquer prazo."""
+import time
+
+import numpy as np
+import pytest
+
+import simulador
+from simulador import (CAMINHOS, MAXIMO_PRAZO_ESTOCASTICO, ORCAMENTO_CAMINHOS_MESES, PERCENTIS, PERFIS_RETORNO,
+                       monte_carlo, saldo_final)
+
+
+@pytest.fixture(autouse=True)
+def sem_cache():
+    simulador._cache_monte_carlo.clear()
+
+
+@pytest.mark.parametrize("prazo", [60, 120, MAXIMO_PRAZO_ESTOCASTICO])
+def test_caminhos_limitados_pelo_prazo(prazo):
+    resultado = monte_carlo(1_000.0, 30_000.0, 500.0, prazo, "moderado")
+    assert resultado["caminhos"] == min(CAMINHOS, ORCAMENTO_CAMINHOS_MESES // prazo // 2 * 2)
+    assert resultado["caminhos"] * prazo <= ORCAMENTO_CAMINHOS_MESES
+    faixas = np.array([resultado["faixas"][f"p{q}"] for q in PERCENTIS])
+    assert faixas.shape == (len(PERCENTIS), prazo) and (np.diff(faixas, axis=0) >= 0).all()
+
+
+def test_prazo_longo_segue_o_valor_esperado_e_o_orcamento_de_tempo():
+    prazo = MAXIMO_PRAZO_ESTOCASTICO
+    monte_carlo(1_000.0, 30_000.0, 500.0, 12, "conservador")  # aquece o NumPy fora da medição
+    inicio = time.perf_counter()
+    resultado = monte_carlo(1_000.0, 300_000.0, 500.0, prazo, "conservador")
+    duracao = time.perf_counter() - inicio
+
+    esperado = float(saldo_final(1_000.0, 500.0, prazo, PERFIS_RETORNO["conservador"][0]))
+    assert resultado["saldo_final"]["p50"] == pytest.approx(esperado, rel=0.01)
+    assert duracao < 0.3  # ~0,1s; sem o orçamento, 100 mil caminhos levavam ~0,45s
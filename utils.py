@@ -1,5 +1,3 @@
-from unidecode import unidecode
-
 # Dicionário de palavras-chave por categoria
 CATEGORIAS_PALAVRAS = {
     "Contas e Serviços": ["agua", "luz", "internet", "celular"],
@@ -18,14 +16,8 @@ CATEGORIAS_PALAVRAS = {
 def sugerir_categoria(descricao):
     """
     Sugere uma categoria com base na descrição textual de um lançamento.
-    Normaliza o texto e verifica palavras-chave em cada grupo.
+    Usa o classificador compilado só com as palavras deste dicionário (acentos ignorados).
     """
-    descricao = unidecode(descricao.lower())
-
-    for categoria, palavras in CATEGORIAS_PALAVRAS.items():
-        if any(palavra in descricao for palavra in palavras):
-            return categoria
-
-    return "Outros"
-
+    from classificador import classificador_de_palavras  # import local: o classificador lê este dicionário
 
+    return classificador_de_palavras().classificar(descricao)